@@ -0,0 +1,4 @@
+"""Performance benchmarks.
+
+Every module is a command line tool writing its results as JSON, and comparing them against a
+baseline written by a previous run; see :mod:`.harness`."""
@@ -0,0 +1,299 @@
+"""Bus and peripheral performance benchmarks.
+
+Measures the clock cycles taken by the transactions of the main bus paths, and how many clock
+cycles per second the simulator runs them at. The ``topology`` benchmarks compare the aggregate
+bandwidth of two initiators on a shared bus and through a crossbar::
+
+    python -m benchmarks.bus -o results.json
+    python -m benchmarks.bus --baseline results.json
+
+Transactions are driven back to back through :mod:`systemonachip.sim`, in a simulator made by
+:func:`systemonachip.sim.create_simulator`, so the ``SYSTEMONACHIP_SIMULATOR`` environment
+variable chooses the backend."""
+
+import sys
+
+from nmigen import *
+from nmigen.utils import log2_int
+from nmigen_soc import csr, wishbone
+from nmigen_soc.memory import MemoryMap
+
+from systemonachip.bus.arbiter import Arbiter
+from systemonachip.bus.bridge import WishboneCSRBridge
+from systemonachip.bus.crossbar import Crossbar
+from systemonachip.bus.decoder import Decoder
+from systemonachip.peripheral.event import EventSource, InterruptSource
+from systemonachip.peripheral.memory import RandomAccessMemory
+from systemonachip.sim import *
+
+from .harness import Stopwatch, main
+
+
+# Number of transactions of each kind run by a benchmark.
+TRANSACTIONS = 256
+
+
+def _bus(*, addr_width, pipelined=False):
+    """32-bit Wishbone bus with a memory map addressing bytes, burst capable or in pipelined
+    mode."""
+    bus = wishbone.Interface(addr_width=addr_width, data_width=32, granularity=8,
+                             features={"stall"} if pipelined else {"cti", "bte"})
+    bus.memory_map = MemoryMap(addr_width=addr_width + 2, data_width=8)
+    return bus
+
+
+def _transactions(bus, addresses):
+    """Read then write the words at `addresses` back to back through the simulator bus `bus`,
+    and return the metrics."""
+    stopwatch = Stopwatch()
+    with stopwatch:
+        start = bus.cycles
+        values = bus.read_many(addresses)
+        read_cycles = bus.cycles - start
+
+        start = bus.cycles
+        bus.write_many(zip(addresses, values))
+        write_cycles = bus.cycles - start
+    return {
+        "read_cycles_per_transaction":  read_cycles  / len(addresses),
+        "write_cycles_per_transaction": write_cycles / len(addresses),
+        "cycles_per_second": (read_cycles + write_cycles) / stopwatch.seconds,
+    }
+
+
+class _CSRRegisters(Elaboratable):
+    """32-bit CSR registers behind a Wishbone to CSR bridge with a `csr_data_width` bit CSR
+    bus."""
+    def __init__(self, bus, count, *, csr_data_width=8):
+        self.bridge = WishboneCSRBridge(bus, data_width=csr_data_width)
+        self._mux   = csr.Multiplexer(addr_width=self.bridge.csr_bus.addr_width,
+                                      data_width=csr_data_width)
+        self._regs  = [csr.Element(32, "rw") for _ in range(count)]
+        for reg in self._regs:
+            self._mux.add(reg)
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.bridge = self.bridge
+        m.submodules.mux    = self._mux
+
+        csr_bus = self.bridge.csr_bus
+        m.d.comb += [
+            self._mux.bus.addr.eq(csr_bus.addr),
+            self._mux.bus.r_stb.eq(csr_bus.r_stb),
+            self._mux.bus.w_stb.eq(csr_bus.w_stb),
+            self._mux.bus.w_data.eq(csr_bus.w_data),
+            csr_bus.r_data.eq(self._mux.bus.r_data),
+        ]
+        for reg in self._regs:
+            value = Signal(32)
+            with m.If(reg.w_stb):
+                m.d.sync += value.eq(reg.w_data)
+            m.d.comb += reg.r_data.eq(value)
+        return m
+
+
+def wishbone_csr_bridge(data_width, *, word=False):
+    """32-bit register accesses through a :class:`WishboneCSRBridge` with a Wishbone bus of
+    `data_width` bits, and an 8-bit CSR bus or, if `word` is true, a CSR bus as wide as the
+    Wishbone bus."""
+    addr_width = 8 - log2_int(data_width // 8)
+    bus = wishbone.Interface(addr_width=addr_width, data_width=data_width, granularity=8)
+    bus.memory_map = MemoryMap(addr_width=addr_width, data_width=data_width)
+    dut = _CSRRegisters(bus, count=16, csr_data_width=data_width if word else 8)
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    return _transactions(WishboneSimulatorBus(sim, bus),
+                         [4 * (index % 16) for index in range(TRANSACTIONS)])
+
+
+def _ram(size, *, pipelined=False):
+    bus = _bus(addr_width=log2_int(size // 4), pipelined=pipelined)
+    return RandomAccessMemory(bus, size=size, data_width=32, name="ram")
+
+
+def ram_single(*, pipelined=False):
+    """Single word accesses to a :class:`RandomAccessMemory`, in pipelined mode if
+    `pipelined` is true."""
+    dut = _ram(4 * TRANSACTIONS, pipelined=pipelined)
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    return _transactions(WishboneSimulatorBus(sim, dut.bus),
+                         [4 * index for index in range(TRANSACTIONS)])
+
+
+def ram_burst():
+    """Incrementing bursts to a :class:`RandomAccessMemory`."""
+    dut = _ram(4 * TRANSACTIONS)
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    results = {}
+    def process():
+        results["write"] = yield from wb_burst_write(dut.bus, 0, range(TRANSACTIONS))
+        yield
+        results["read"]  = yield from wb_burst_read(dut.bus, 0, TRANSACTIONS)
+    sim.add_sync_process(process)
+    stopwatch = Stopwatch()
+    with stopwatch:
+        sim.run()
+    cycles = results["read"].cycles + results["write"].cycles
+    return {
+        "read_cycles_per_beat":  results["read"].cycles_per_beat,
+        "write_cycles_per_beat": results["write"].cycles_per_beat,
+        "cycles_per_second": cycles / stopwatch.seconds,
+    }
+
+
+class _DecodedMemories(Elaboratable):
+    """Memories in the bins of a :class:`Decoder`."""
+    def __init__(self, count, size):
+        self.decoder  = Decoder(_bus(addr_width=30), 0x10000000)
+        self.memories = [RandomAccessMemory(self.decoder[index], size=size, data_width=32,
+                                            name="ram{}".format(index))
+                         for index in range(count)]
+
+    @property
+    def bus(self):
+        return self.decoder.bus
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.decoder = self.decoder
+        for index, memory in enumerate(self.memories):
+            m.submodules["ram{}".format(index)] = memory
+        return m
+
+
+def decoder():
+    """Single word accesses routed by a :class:`Decoder` to memories in turn."""
+    dut = _DecodedMemories(count=4, size=64)
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    # Bins are 0x10000000 words apart on the bus, which is 0x40000000 bytes.
+    return _transactions(WishboneSimulatorBus(sim, dut.bus),
+                         [0x40000000 * (index % 4) + 4 * (index // 4 % 16)
+                          for index in range(TRANSACTIONS)])
+
+
+class _Topology(Elaboratable):
+    """Two initiators and two memories, connected either by a shared bus, an :class:`Arbiter`
+    in front of a :class:`Decoder` like in ``examples/basic.py``, or by a :class:`Crossbar`."""
+    def __init__(self, kind, *, size):
+        self.intrs = [_bus(addr_width=30), _bus(addr_width=30)]
+        if kind == "shared":
+            self._arbiter = Arbiter(addr_width=30, data_width=32, granularity=8,
+                                    features={"cti", "bte"})
+            for intr_bus in self.intrs:
+                self._arbiter.add(intr_bus)
+            self._decoder = Decoder(_bus(addr_width=30), 0x10000000)
+            windows = self._decoder
+        else:
+            self._crossbar = Crossbar(addr_width=30, data_width=32, granularity=8,
+                                      window_size=0x10000000, features={"cti", "bte"})
+            for intr_bus in self.intrs:
+                self._crossbar.add(intr_bus)
+            windows = self._crossbar
+        self.kind     = kind
+        self.memories = [RandomAccessMemory(windows[index], size=size, data_width=32,
+                                            name="ram{}".format(index))
+                         for index in range(2)]
+
+    def elaborate(self, platform):
+        m = Module()
+        if self.kind == "shared":
+            m.submodules.arbiter = self._arbiter
+            m.submodules.decoder = self._decoder
+            m.d.comb += self._arbiter.bus.connect(self._decoder.bus)
+        else:
+            m.submodules.crossbar = self._crossbar
+        for index, memory in enumerate(self.memories):
+            m.submodules["ram{}".format(index)] = memory
+        return m
+
+
+def topology(kind):
+    """Two initiators each reading a different memory at once, through a shared bus or a
+    :class:`Crossbar`."""
+    dut = _Topology(kind, size=4 * TRANSACTIONS)
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    buses = [WishboneSimulatorBus(sim, intr_bus) for intr_bus in dut.intrs]
+    stopwatch = Stopwatch()
+    with stopwatch:
+        start = buses[-1].cycles
+        # Memories are 0x10000000 words apart on the bus, which is 0x40000000 bytes.
+        for index, bus in enumerate(buses):
+            for address in range(0, 4 * TRANSACTIONS, 4):
+                bus.queue_read(0x40000000 * index + address)
+        for bus in buses:
+            bus.flush()
+        cycles = buses[-1].cycles - start
+    return {
+        "cycles_per_transaction": cycles / (len(buses) * TRANSACTIONS),
+        "cycles_per_second": cycles / stopwatch.seconds,
+    }
+
+
+def interrupt_source(mode):
+    """Cycles from an event of an :class:`InterruptSource` in trigger `mode` to its interrupt
+    request."""
+    event = EventSource(mode=mode, name="event")
+    dut   = InterruptSource([event], name="source")
+    sim   = create_simulator(dut)
+    sim.add_clock(1e-6)
+    latencies = []
+    cycles    = []
+    def process():
+        yield dut.enable.w_data.eq(1)
+        yield dut.enable.w_stb.eq(1)
+        yield
+        yield dut.enable.w_stb.eq(0)
+        elapsed = 1
+        for _ in range(TRANSACTIONS):
+            if mode == "fall":
+                yield event.stb.eq(1)
+                yield
+                elapsed += 1
+            yield event.stb.eq(mode != "fall")
+            latency = 0
+            while True:
+                yield
+                latency += 1
+                if (yield dut.irq):
+                    break
+            latencies.append(latency)
+            yield event.stb.eq(0)
+            yield dut.pending.w_data.eq(1)
+            yield dut.pending.w_stb.eq(1)
+            yield
+            yield dut.pending.w_stb.eq(0)
+            yield
+            elapsed += latency + 2
+        cycles.append(elapsed)
+    sim.add_sync_process(process)
+    stopwatch = Stopwatch()
+    with stopwatch:
+        sim.run()
+    return {
+        "latency_cycles":    max(latencies),
+        "cycles_per_second": cycles[0] / stopwatch.seconds,
+    }
+
+
+BENCHMARKS = [
+    *[("wishbone_csr_bridge[{}]".format(width), lambda width=width: wishbone_csr_bridge(width))
+      for width in (8, 16, 32, 64)],
+    ("wishbone_csr_bridge[32,word]", lambda: wishbone_csr_bridge(32, word=True)),
+    ("ram_single", ram_single),
+    ("ram_pipelined", lambda: ram_single(pipelined=True)),
+    ("ram_burst",  ram_burst),
+    ("decoder",    decoder),
+    *[("topology[{}]".format(kind), lambda kind=kind: topology(kind))
+      for kind in ("shared", "crossbar")],
+    *[("interrupt_source[{}]".format(mode), lambda mode=mode: interrupt_source(mode))
+      for mode in ("level", "rise", "fall")],
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS, description=__doc__.splitlines()[0]))
@@ -0,0 +1,150 @@
+"""Elaboration and Verilog generation scaling benchmarks.
+
+Builds SoCs with N timers and N memories behind a :class:`Decoder`, for growing N, and measures
+each stage of turning them into a netlist::
+
+    python -m benchmarks.elaboration -o results.json
+    python -m benchmarks.elaboration -k "soc\\[(1|10|100)\\]"
+
+For every stage, from constructing the SoC to rendering its build configuration with
+:class:`ConfigBuilder`, the wall time and the peak memory allocated by the stage are recorded,
+along with the size of the netlists. A summary lists how each stage grows with N, as the exponent
+``k`` of ``time ~ N ** k`` between consecutive sizes, so that superlinear stages stand out.
+Memory is traced with :mod:`tracemalloc`, which slows down every stage by a similar factor.
+
+Converting to Verilog requires Yosys; without it the ``verilog`` stage is skipped."""
+
+import math
+import re
+import sys
+import tempfile
+import tracemalloc
+
+from nmigen import *
+from nmigen.hdl.ir import Fragment
+from nmigen.back import rtlil, verilog
+from nmigen._toolchain import ToolNotFound
+from nmigen_soc import wishbone
+
+from systemonachip.bus.bridge import WishboneCSRBridge
+from systemonachip.bus.decoder import Decoder
+from systemonachip.peripheral.memory import RandomAccessMemory
+from systemonachip.peripheral.timer import Timer
+from systemonachip.soc.base import SoC, ConfigBuilder
+
+from .harness import Stopwatch, main
+
+
+# Numbers of peripherals of each kind in the generated SoCs.
+SIZES = (1, 10, 100, 1000)
+
+STAGES = ("construct", "elaborate", "prepare", "rtlil", "verilog", "config")
+
+# Growth exponent above which a stage is reported as superlinear.
+SUPERLINEAR = 1.2
+
+
+class ScaledSoC(SoC, Elaboratable):
+    """SoC with `timers` timers, each behind a Wishbone to CSR bridge, and `rams` memories of
+    `ram_size` bytes, each in its own bin of the decoder."""
+    def __init__(self, *, timers, rams, ram_size=1024):
+        self._decoder = Decoder(wishbone.Interface(addr_width=30, data_width=32, granularity=8,
+                                                   features={"cti", "bte"}),
+                                1 << 18)
+        self.bus = self._decoder.bus
+
+        bins = iter(range(len(self._decoder)))
+        self.timer_bridges = []
+        self.timers = []
+        for _ in range(timers):
+            bridge = WishboneCSRBridge(self._decoder[next(bins)])
+            self.timer_bridges.append(bridge)
+            self.timers.append(Timer(bridge.csr_bus, width=32))
+        self.rams = [RandomAccessMemory(self._decoder[next(bins)], size=ram_size,
+                                        name="ram{}".format(index))
+                     for index in range(rams)]
+
+        self.memory_map = self.bus.memory_map
+
+    @property
+    def ports(self):
+        return list(self.bus.fields.values())
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.decoder = self._decoder
+        for index, (bridge, timer) in enumerate(zip(self.timer_bridges, self.timers)):
+            m.submodules["timer{}_bridge".format(index)] = bridge
+            m.submodules["timer{}".format(index)] = timer
+        for ram in self.rams:
+            m.submodules[ram.name] = ram
+        return m
+
+
+def _stage(metrics, name, function):
+    """Run `function` as stage `name`, recording its wall time and peak memory in `metrics`."""
+    tracemalloc.reset_peak()
+    allocated, _ = tracemalloc.get_traced_memory()
+    stopwatch = Stopwatch()
+    with stopwatch:
+        result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    metrics["{}_seconds".format(name)]    = stopwatch.seconds
+    metrics["{}_peak_bytes".format(name)] = peak - allocated
+    return result
+
+
+def soc(size):
+    """Generate a SoC with `size` timers and `size` memories, and convert it to a netlist."""
+    metrics = {}
+    tracemalloc.start()
+    try:
+        design = _stage(metrics, "construct", lambda: ScaledSoC(timers=size, rams=size))
+        fragment = _stage(metrics, "elaborate", lambda: Fragment.get(design, platform=None))
+        fragment = _stage(metrics, "prepare", lambda: fragment.prepare(ports=design.ports))
+        rtlil_text, _ = _stage(metrics, "rtlil", lambda: rtlil.convert_fragment(fragment))
+        metrics["rtlil_cells"] = len(re.findall(r"^\s*cell ", rtlil_text, re.MULTILINE))
+        metrics["rtlil_bytes"] = len(rtlil_text)
+        try:
+            verilog_text = _stage(metrics, "verilog",
+                                  lambda: verilog._convert_rtlil_text(rtlil_text))
+            metrics["verilog_bytes"] = len(verilog_text)
+        except (ToolNotFound, verilog.YosysError) as error:
+            print("Skipping verilog stage: {}".format(error), file=sys.stderr)
+        with tempfile.TemporaryDirectory() as build_dir:
+            _stage(metrics, "config",
+                   lambda: ConfigBuilder().prepare(design, build_dir, "soc"))
+    finally:
+        tracemalloc.stop()
+    return metrics
+
+
+def summarize(results):
+    """Growth exponent of the wall time of every stage between consecutive sizes."""
+    sizes = sorted(int(re.fullmatch(r"soc\[(\d+)\]", name).group(1)) for name in results)
+    yield "Growth exponent of wall time between sizes:"
+    yield "  {:<10}".format("stage") + "".join("{:>14}".format("{}..{}".format(a, b))
+                                               for a, b in zip(sizes, sizes[1:]))
+    for stage in STAGES:
+        metric = "{}_seconds".format(stage)
+        line = "  {:<10}".format(stage)
+        superlinear = False
+        for a, b in zip(sizes, sizes[1:]):
+            time_a = results["soc[{}]".format(a)].get(metric)
+            time_b = results["soc[{}]".format(b)].get(metric)
+            if not time_a or not time_b:
+                line += "{:>14}".format("-")
+                continue
+            exponent = math.log(time_b / time_a) / math.log(b / a)
+            superlinear |= exponent > SUPERLINEAR
+            line += "{:>14.2f}".format(exponent)
+        if superlinear:
+            line += "  superlinear"
+        yield line
+
+
+BENCHMARKS = [("soc[{}]".format(size), lambda size=size: soc(size)) for size in SIZES]
+
+
+if __name__ == "__main__":
+    sys.exit(main(BENCHMARKS, description=__doc__.splitlines()[0], summarize=summarize))
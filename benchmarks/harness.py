@@ -0,0 +1,135 @@
+"""Running benchmarks, and comparing their results against a baseline.
+
+A benchmark is a function returning a dict of metrics. Metrics are compared against the baseline
+according to their names:
+
+* metrics ending in ``_per_second`` are throughputs, which regress when they drop by more than
+  the tolerance;
+* metrics ending in ``_seconds`` or ``_bytes`` are costs measured on the host, which regress when
+  they grow by more than the tolerance;
+* other metrics, such as cycle counts and latencies, are exact, and regress when they grow at
+  all.
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+
+import nmigen
+
+from systemonachip.sim import simulator_backend
+
+
+__all__ = ["Stopwatch", "compare", "main"]
+
+
+class Stopwatch:
+    """Context manager measuring the wall time of its body into :attr:`seconds`."""
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._start
+
+
+def _kind(metric):
+    if metric.endswith("_per_second"):
+        return "throughput"
+    if metric.endswith("_seconds") or metric.endswith("_bytes"):
+        return "cost"
+    return "exact"
+
+
+def compare(results, baseline, *, tolerance):
+    """Compare the metrics of `results` against those of `baseline`.
+
+    Parameters
+    ----------
+    results : dict(str, dict(str, float))
+        Metrics, by benchmark name.
+    baseline : dict(str, dict(str, float))
+        Baseline metrics, by benchmark name. Benchmarks and metrics missing from either side are
+        not compared.
+    tolerance : float
+        Relative change of throughputs and host costs that is not a regression.
+
+    Returns
+    -------
+    list of str
+        Descriptions of the regressions.
+    """
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        for metric, value in sorted(metrics.items()):
+            reference = baseline.get(name, {}).get(metric)
+            if reference is None:
+                continue
+            kind = _kind(metric)
+            if kind == "throughput":
+                regressed = value < reference * (1 - tolerance)
+            elif kind == "cost":
+                regressed = value > reference * (1 + tolerance)
+            else:
+                regressed = value > reference
+            if regressed:
+                regressions.append("{}: {} is {:.6g}, baseline is {:.6g}"
+                                   .format(name, metric, value, reference))
+    return regressions
+
+
+def main(benchmarks, args=None, *, description, summarize=None):
+    """Command line interface running `benchmarks`, a list of ``(name, function)`` pairs.
+
+    If given, ``summarize(results)`` returns lines describing the results, which are printed
+    after they are written.
+
+    Returns the exit status, which is 1 if a metric regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-k", metavar="PATTERN", dest="patterns", action="append", default=[],
+        help="only run benchmarks whose names match the regular expression PATTERN")
+    parser.add_argument("-o", "--output", metavar="FILE", type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="write the JSON results to FILE (default: standard output)")
+    parser.add_argument("--baseline", metavar="FILE", type=argparse.FileType("r"),
+        help="compare the results against the JSON results in FILE")
+    parser.add_argument("--tolerance", metavar="FRACTION", type=float, default=0.2,
+        help="relative change of host-dependent metrics that is not a regression "
+             "(default: %(default)s)")
+    args = parser.parse_args(args)
+
+    results = {}
+    for name, function in benchmarks:
+        if args.patterns and not any(re.search(pattern, name) for pattern in args.patterns):
+            continue
+        print("Running {}...".format(name), file=sys.stderr)
+        results[name] = function()
+
+    report = {
+        "environment": {
+            "python":    platform.python_version(),
+            "nmigen":    getattr(nmigen, "__version__", None),
+            "simulator": simulator_backend(),
+        },
+        "benchmarks": results,
+    }
+    json.dump(report, args.output, indent=2, sort_keys=True)
+    args.output.write("\n")
+    if summarize is not None:
+        for line in summarize(results):
+            print(line, file=sys.stderr)
+
+    if args.baseline is None:
+        return 0
+    regressions = compare(results, json.load(args.baseline)["benchmarks"],
+                          tolerance=args.tolerance)
+    for regression in regressions:
+        print("Regression: {}".format(regression), file=sys.stderr)
+    return 1 if regressions else 0
@@ -5,6 +5,7 @@ from nmigen import *
 from nmigen_soc import wishbone
 from nmigen.back import verilog
 
+from systemonachip.bus.arbiter import Arbiter
 from systemonachip.bus.decoder import Decoder
 from systemonachip.bus.bridge import WishboneCSRBridge
 from systemonachip.cpu.minerva import MinervaCPU
@@ -21,8 +22,9 @@ __all__ = ["Basic"]
 class Basic(Elaboratable):
     def __init__(self, *, clock_frequency, rom_size, ram_size):
 
-        self._arbiter = wishbone.Arbiter(addr_width=30, data_width=32, granularity=8,
-                                         features={"cti", "bte"})
+        self._arbiter = Arbiter(addr_width=30, data_width=32, granularity=8,
+                                features={"cti", "bte"}, scheduler="priority")
+        """Bus arbiter giving data accesses precedence over instruction fetches."""
 
         self.bus = wishbone.Interface(addr_width=30, data_width=32, granularity=8,
                                       features={"cti", "bte"})
@@ -60,8 +62,7 @@ class Basic(Elaboratable):
     def elaborate(self, platform):
         m = Module()
 
-        for name in dir(self):
-            attr = getattr(self, name)
+        for name, attr in vars(self).items():
             if isinstance(attr, Elaboratable):
                 setattr(m.submodules, name, attr)
 
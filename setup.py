@@ -26,6 +26,9 @@ setup(
     install_requires=[
         "nmigen>=0.1,<0.3",
     ],
+    extras_require={
+        "snapshot": ["numpy"],
+    },
     packages=find_packages(),
     include_package_data=True,
     project_urls={
@@ -1 +1,3 @@
+from .arbiter import *
+from .crossbar import *
 from .decoder import *
@@ -0,0 +1,179 @@
+from nmigen import *
+
+from nmigen_soc import wishbone
+from nmigen_soc.wishbone import CycleType
+
+
+__all__ = ["Arbiter"]
+
+
+class Arbiter(Elaboratable):
+    """Wishbone bus arbiter.
+
+    An arbiter shares a bus between several initiators, such as the instruction and data buses
+    of a CPU. It grants the bus to one initiator at a time.
+
+    Scheduling
+    ----------
+
+    The grant is reconsidered when the initiator holding it ends its bus cycle, and also after
+    each of its transfers if it keeps its bus cycle going. It is kept for the whole of an
+    incrementing or constant address burst (``cti``), and while the initiator asserts ``lock``.
+
+    With the ``"round-robin"`` scheduler, the next requesting initiator in the order they were
+    added is granted the bus, so that they take turns. With the ``"priority"`` scheduler, the
+    first requesting initiator in the order they were added is granted the bus.
+
+    An initiator may be given a budget of transfers per `window` of clock cycles. Once it has used
+    its budget, it is only granted the bus if no initiator within its budget requests it, so the
+    bus is never left idle.
+
+    Parameters
+    ----------
+    addr_width : int
+        Address width. See :class:`nmigen_soc.wishbone.Interface`.
+    data_width : int
+        Data width. See :class:`nmigen_soc.wishbone.Interface`.
+    granularity : int or None
+        Granularity. See :class:`nmigen_soc.wishbone.Interface`.
+    features : iter(str)
+        Optional signal set. See :class:`nmigen_soc.wishbone.Interface`. Pipelined mode
+        (``stall``) is not supported.
+    scheduler : ``"round-robin"`` or ``"priority"``
+        Scheduling policy.
+    window : int or None
+        Number of clock cycles over which the budgets of the initiators are counted. Required to
+        add initiators with a budget.
+
+    Attributes
+    ----------
+    bus : :class:`nmigen_soc.wishbone.Interface`
+        Shared bus to which the initiators are connected.
+    """
+    def __init__(self, *, addr_width, data_width, granularity=None, features=frozenset(),
+                 scheduler="round-robin", window=None):
+        if scheduler not in ("round-robin", "priority"):
+            raise ValueError("Scheduler must be one of round-robin, priority, not {!r}"
+                             .format(scheduler))
+        if window is not None and (not isinstance(window, int) or window <= 0):
+            raise ValueError("Window must be a positive integer, not {!r}"
+                             .format(window))
+        features = frozenset(features)
+        if "stall" in features:
+            raise ValueError("Arbiter does not support pipelined mode")
+
+        self.bus = wishbone.Interface(addr_width=addr_width, data_width=data_width,
+                                      granularity=granularity, features=features)
+        self.scheduler = scheduler
+        self.window    = window
+        self._intrs    = []
+
+    def add(self, intr_bus, *, budget=None):
+        """Add an initiator bus to the arbiter.
+
+        Parameters
+        ----------
+        intr_bus : :class:`nmigen_soc.wishbone.Interface`
+            Initiator bus. Its address width, data width and granularity must be those of the
+            arbiter. Optional signals missing on either side are left at zero.
+        budget : int or None
+            Number of transfers per window granted to the initiator before initiators within
+            their budget take precedence. Unlimited if ``None``.
+        """
+        if not isinstance(intr_bus, wishbone.Interface):
+            raise TypeError("Initiator bus must be an instance of wishbone.Interface, not {!r}"
+                            .format(intr_bus))
+        for name in ("addr_width", "data_width", "granularity"):
+            if getattr(intr_bus, name) != getattr(self.bus, name):
+                raise ValueError("Initiator bus has {} {}, which is not the same as arbiter "
+                                 "{} {}"
+                                 .format(name.replace("_", " "), getattr(intr_bus, name),
+                                         name.replace("_", " "), getattr(self.bus, name)))
+        if budget is not None:
+            if self.window is None:
+                raise ValueError("Arbiter must have a window for initiators to have a budget")
+            if not isinstance(budget, int) or budget <= 0 or budget > self.window:
+                raise ValueError("Budget must be a positive integer no greater than the window "
+                                 "{}, not {!r}"
+                                 .format(self.window, budget))
+        self._intrs.append((intr_bus, budget))
+
+    def elaborate(self, platform):
+        m = Module()
+
+        if not self._intrs:
+            return m
+
+        grant    = Signal(range(max(len(self._intrs), 2)))
+        requests = Cat(intr_bus.cyc for intr_bus, _ in self._intrs)
+
+        # Initiators that have used up their budget in the current window.
+        spent = Signal(len(self._intrs))
+        if self.window is not None:
+            elapsed = Signal(range(self.window))
+            m.d.sync += elapsed.eq(Mux(elapsed == self.window - 1, 0, elapsed + 1))
+            for index, (intr_bus, budget) in enumerate(self._intrs):
+                if budget is None:
+                    continue
+                used = Signal(range(budget + 1), name="used{}".format(index))
+                m.d.comb += spent[index].eq(used == budget)
+                with m.If(elapsed == self.window - 1):
+                    m.d.sync += used.eq(0)
+                with m.Elif((grant == index) & self.bus.ack & ~spent[index]):
+                    m.d.sync += used.eq(used + 1)
+
+        within_budget = requests & ~spent
+        candidates    = Mux(within_budget.any(), within_budget, requests)
+
+        locked = Signal()
+        for index, (intr_bus, _) in enumerate(self._intrs):
+            with m.If(grant == index):
+                m.d.comb += [
+                    self.bus.adr.eq(intr_bus.adr),
+                    self.bus.dat_w.eq(intr_bus.dat_w),
+                    self.bus.sel.eq(intr_bus.sel),
+                    self.bus.we.eq(intr_bus.we),
+                    self.bus.stb.eq(intr_bus.stb),
+                    self.bus.cyc.eq(intr_bus.cyc),
+                ]
+                for name in ("lock", "cti", "bte"):
+                    if hasattr(self.bus, name) and hasattr(intr_bus, name):
+                        m.d.comb += getattr(self.bus, name).eq(getattr(intr_bus, name))
+                for name in ("ack", "err", "rty"):
+                    if hasattr(self.bus, name) and hasattr(intr_bus, name):
+                        m.d.comb += getattr(intr_bus, name).eq(getattr(self.bus, name))
+
+                if hasattr(intr_bus, "lock"):
+                    m.d.comb += locked.eq(intr_bus.lock)
+                if hasattr(intr_bus, "cti"):
+                    with m.If((intr_bus.cti == CycleType.INCR_BURST) |
+                              (intr_bus.cti == CycleType.CONST_BURST)):
+                        m.d.comb += locked.eq(1)
+            m.d.comb += intr_bus.dat_r.eq(self.bus.dat_r)
+
+        # The grant may change once the bus cycle of its holder ends, or after each of its
+        # transfers outside of a burst or a locked sequence.
+        done = self.bus.ack
+        for name in ("err", "rty"):
+            if hasattr(self.bus, name):
+                done |= getattr(self.bus, name)
+        release = ~self.bus.cyc | done & ~locked
+
+        with m.If(release):
+            if self.scheduler == "priority":
+                for index in reversed(range(len(self._intrs))):
+                    with m.If(candidates[index]):
+                        m.d.sync += grant.eq(index)
+            else:
+                with m.Switch(grant):
+                    for index in range(len(self._intrs)):
+                        with m.Case(index):
+                            # The last assignment wins, so the initiators are considered in
+                            # reverse order, starting from the one that just held the grant.
+                            order = [(index + offset) % len(self._intrs)
+                                     for offset in range(len(self._intrs), 0, -1)]
+                            for pred in order:
+                                with m.If(candidates[pred]):
+                                    m.d.sync += grant.eq(pred)
+
+        return m
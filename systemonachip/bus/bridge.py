@@ -12,26 +12,40 @@ __all__ = ["WishboneCSRBridge"]
 class WishboneCSRBridge(Elaboratable):
     """Wishbone to CSR bridge.
 
-    A bus bridge for accessing CSR registers from Wishbone. This bridge supports any Wishbone
-    data width greater or equal to CSR data width and performs appropriate address translation.
+    A bus bridge for accessing CSR registers from Wishbone. The CSR bus is either as wide as the
+    Wishbone granularity (byte mode), or as wide as the Wishbone bus (word mode).
 
     Latency
     -------
 
-    Reads and writes always take ``self.data_width // csr_bus.data_width + 1`` cycles to complete,
-    regardless of the select inputs. Write side effects occur simultaneously with acknowledgement.
+    In byte mode, reads and writes always take ``wb_bus.data_width // csr_bus.data_width + 1``
+    cycles to complete, regardless of the select inputs, as every granule is accessed in turn.
+
+    In word mode, reads and full word writes take 2 cycles: one CSR bus cycle and the
+    acknowledgement. Writes to part of a word take 3 cycles, as the bridge reads the word first and
+    writes it back with the selected granules replaced. That read has the side effects of any CSR
+    read of the register.
+
+    Write side effects occur simultaneously with acknowledgement.
+
+    If the Wishbone bus has a ``stall`` signal, it is in pipelined mode. In word mode, the bridge
+    then accepts a read or a full word write on every cycle, except for a read following a write,
+    which waits a cycle for the write to reach its CSR element. In byte mode, the bridge stalls
+    until the last cycle of every access.
 
     Parameters
     ----------
-    csr_bus : :class:`..csr.Interface`
-        CSR bus driven by the bridge.
+    wb_bus : :class:`..wishbone.Interface`
+        Wishbone bus provided by the bridge.
     data_width : int or None
-        Wishbone bus data width. If not specified, defaults to ``csr_bus.data_width``.
+        CSR bus data width. Either ``wb_bus.granularity`` for byte mode, which is the default, or
+        ``wb_bus.data_width`` for word mode.
 
     Attributes
     ----------
-    wb_bus : :class:`..wishbone.Interface`
-        Wishbone bus provided by the bridge.
+    csr_bus : :class:`..csr.Interface`
+        CSR bus driven by the bridge. It has one address per Wishbone granule in byte mode, and
+        one per Wishbone word in word mode.
     """
     def __init__(self, wb_bus, *, data_width=None):
         if not isinstance(wb_bus, wishbone.Interface):
@@ -41,19 +55,23 @@ class WishboneCSRBridge(Elaboratable):
             raise ValueError("Wishbone bus data width must be one of 8, 16, 32, 64, not {!r}"
                              .format(wb_bus.data_width))
         if data_width is None:
-            data_width = wb_bus.data_width
+            data_width = wb_bus.granularity
+        if data_width not in (wb_bus.granularity, wb_bus.data_width):
+            raise ValueError("CSR bus data width must be either the Wishbone bus granularity {} "
+                             "or data width {}, not {!r}"
+                             .format(wb_bus.granularity, wb_bus.data_width, data_width))
 
         self.wb_bus = wb_bus
 
         self.csr_bus = csr.Interface(
-            addr_width=max(0, wb_bus.addr_width - log2_int(data_width // wb_bus.data_width)),
+            addr_width=wb_bus.addr_width + log2_int(wb_bus.data_width // data_width),
             data_width=data_width)
 
         self.csr_bus.memory_map = MemoryMap(addr_width=wb_bus.addr_width,
                                            data_width=wb_bus.data_width)
 
-        # Since granularity of the Wishbone interface matches the data width of the CSR bus,
-        # no width conversion is performed, even if the Wishbone data width is greater.
+        # The CSR bus is addressed by Wishbone granule or by Wishbone word, so no width
+        # conversion is performed.
         self.csr_bus.memory_map.add_window(self.wb_bus.memory_map)
 
     def elaborate(self, platform):
@@ -62,14 +80,65 @@ class WishboneCSRBridge(Elaboratable):
 
         m = Module()
 
+        pipelined = hasattr(wb_bus, "stall")
+
+        def segment(index):
+            return slice(index * wb_bus.granularity, (index + 1) * wb_bus.granularity)
+
+        if csr_bus.data_width == wb_bus.data_width and len(wb_bus.sel) > 1:
+            # Word mode. CSR read data is only valid on the cycle after the read strobe, which is
+            # the acknowledgement cycle.
+            merge   = Signal()
+            written = Signal()
+            accept  = Signal()
+            m.d.comb += [
+                csr_bus.addr.eq(wb_bus.adr),
+                wb_bus.dat_r.eq(csr_bus.r_data),
+            ]
+
+            request = wb_bus.cyc & wb_bus.stb
+            if pipelined:
+                m.d.comb += wb_bus.stall.eq(~accept)
+            else:
+                request &= ~wb_bus.ack
+
+            with m.If(request):
+                with m.If(merge):
+                    m.d.comb += csr_bus.w_stb.eq(1)
+                    for index, sel_index in enumerate(wb_bus.sel):
+                        m.d.comb += csr_bus.w_data[segment(index)].eq(
+                            Mux(sel_index, wb_bus.dat_w[segment(index)],
+                                csr_bus.r_data[segment(index)]))
+                    m.d.sync += merge.eq(0)
+                    m.d.comb += accept.eq(1)
+                with m.Elif(written & (~wb_bus.we | ~wb_bus.sel.all())):
+                    # A write accepted on the previous cycle only reaches its CSR element now,
+                    # so reading it has to wait. This only happens in pipelined mode.
+                    pass
+                with m.Elif(wb_bus.we & ~wb_bus.sel.all()):
+                    m.d.comb += csr_bus.r_stb.eq(1)
+                    m.d.sync += merge.eq(1)
+                with m.Else():
+                    m.d.comb += csr_bus.r_stb.eq(~wb_bus.we)
+                    m.d.comb += csr_bus.w_stb.eq(wb_bus.we)
+                    m.d.comb += csr_bus.w_data.eq(wb_bus.dat_w)
+                    m.d.comb += accept.eq(1)
+
+            with m.If(~wb_bus.cyc):
+                m.d.sync += merge.eq(0)
+
+            m.d.sync += [
+                wb_bus.ack.eq(accept),
+                written.eq(accept & wb_bus.we),
+            ]
+
+            return m
+
         cycle = Signal(range(len(wb_bus.sel) + 1))
         m.d.comb += csr_bus.addr.eq(Cat(cycle[:log2_int(len(wb_bus.sel))], wb_bus.adr))
 
-        with m.If(wb_bus.cyc & wb_bus.stb):
+        with m.If(wb_bus.cyc & wb_bus.stb & ~wb_bus.ack):
             with m.Switch(cycle):
-                def segment(index):
-                    return slice(index * wb_bus.granularity, (index + 1) * wb_bus.granularity)
-
                 for index, sel_index in enumerate(wb_bus.sel):
                     with m.Case(index):
                         if index > 0:
@@ -90,4 +159,9 @@ class WishboneCSRBridge(Elaboratable):
         with m.If(wb_bus.ack):
             m.d.sync += cycle.eq(0)
 
+        if pipelined:
+            # Requests are only accepted on their last cycle, once the bus inputs are no longer
+            # needed.
+            m.d.comb += wb_bus.stall.eq((cycle != len(wb_bus.sel)) | wb_bus.ack)
+
         return m
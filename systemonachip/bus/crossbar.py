@@ -0,0 +1,185 @@
+from nmigen import *
+from nmigen.utils import log2_int
+
+from nmigen_soc import wishbone
+from nmigen_soc.memory import MemoryMap
+
+from .arbiter import Arbiter
+
+
+__all__ = ["Crossbar"]
+
+
+class Crossbar(Elaboratable):
+    """Wishbone crossbar.
+
+    A crossbar connects several initiators to the regions of an address space, which are evenly
+    spaced chunks of `window_size` words accessible by index, like the bins of a
+    :class:`.Decoder`. Every region has its own :class:`.Arbiter`, so initiators accessing
+    different regions proceed in the same cycle, and only initiators accessing the same region
+    wait for each other.
+
+    Like a decoder, regions are only instantiated when they are first accessed.
+
+    Parameters
+    ----------
+    addr_width : int
+        Address width. See :class:`nmigen_soc.wishbone.Interface`.
+    data_width : int
+        Data width. See :class:`nmigen_soc.wishbone.Interface`.
+    window_size : int
+        Size of every region, in words. Must be a power of two.
+    granularity : int or None
+        Granularity. See :class:`nmigen_soc.wishbone.Interface`.
+    features : iter(str)
+        Optional signal set of the initiator and region buses. See :class:`.Arbiter`.
+    scheduler : ``"round-robin"`` or ``"priority"``
+        Scheduling policy of the arbiter of every region. See :class:`.Arbiter`.
+    window : int or None
+        Number of clock cycles over which the budgets of the initiators are counted. See
+        :class:`.Arbiter`.
+
+    Attributes
+    ----------
+    memory_map : :class:`nmigen_soc.memory.MemoryMap`
+        Memory map of the address space, holding the windows of the instantiated regions.
+    """
+    def __init__(self, *, addr_width, data_width, window_size, granularity=None,
+                 features=frozenset(), scheduler="round-robin", window=None):
+        if not isinstance(window_size, int) or window_size <= 0 or window_size & window_size - 1:
+            raise ValueError("Window size must be an integer power of two, not {!r}"
+                             .format(window_size))
+        if window_size > 2 ** addr_width:
+            raise ValueError("Window size must be at most {:#x}, the size of the address space, "
+                             "not {:#x}"
+                             .format(2 ** addr_width, window_size))
+        if scheduler not in ("round-robin", "priority"):
+            raise ValueError("Scheduler must be one of round-robin, priority, not {!r}"
+                             .format(scheduler))
+        if window is not None and (not isinstance(window, int) or window <= 0):
+            raise ValueError("Window must be a positive integer, not {!r}"
+                             .format(window))
+        if "stall" in features:
+            raise ValueError("Crossbar does not support pipelined mode")
+
+        self.addr_width  = addr_width
+        self.data_width  = data_width
+        self.granularity = granularity or data_width
+        self.features    = frozenset(features)
+        self.scheduler   = scheduler
+        self.window      = window
+        self.window_size = window_size
+        self.memory_map  = MemoryMap(addr_width=addr_width, data_width=data_width)
+
+        self._sub_bus_address_bits = log2_int(window_size)
+        self._intrs   = []
+        self._regions = {}
+
+    def add(self, intr_bus, *, budget=None):
+        """Add an initiator bus to the crossbar.
+
+        Initiators must all be added before the regions are instantiated.
+
+        Parameters
+        ----------
+        intr_bus : :class:`nmigen_soc.wishbone.Interface`
+            Initiator bus. Its address width, data width and granularity must be those of the
+            crossbar.
+        budget : int or None
+            Budget of the initiator in the arbiter of every region. See :meth:`.Arbiter.add`.
+        """
+        if self._regions:
+            raise ValueError("Initiators must be added before regions are instantiated")
+        if not isinstance(intr_bus, wishbone.Interface):
+            raise TypeError("Initiator bus must be an instance of wishbone.Interface, not {!r}"
+                            .format(intr_bus))
+        for name in ("addr_width", "data_width", "granularity"):
+            if getattr(intr_bus, name) != getattr(self, name):
+                raise ValueError("Initiator bus has {} {}, which is not the same as crossbar "
+                                 "{} {}"
+                                 .format(name.replace("_", " "), getattr(intr_bus, name),
+                                         name.replace("_", " "), getattr(self, name)))
+        if budget is not None:
+            if self.window is None:
+                raise ValueError("Crossbar must have a window for initiators to have a budget")
+            if not isinstance(budget, int) or budget <= 0 or budget > self.window:
+                raise ValueError("Budget must be a positive integer no greater than the window "
+                                 "{}, not {!r}"
+                                 .format(self.window, budget))
+        self._intrs.append((intr_bus, budget))
+
+    def __len__(self):
+        return 2 ** (self.addr_width - self._sub_bus_address_bits)
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError("Region index must be an integer, not {!r}".format(index))
+        if index < 0 or index >= len(self):
+            raise IndexError("Invalid region")
+        region = self._regions.get(index)
+        if region is not None:
+            return region.bus
+
+        if not self._intrs:
+            raise ValueError("Initiators must be added before regions are instantiated")
+        arbiter = Arbiter(addr_width=self._sub_bus_address_bits, data_width=self.data_width,
+                          granularity=self.granularity, features=self.features,
+                          scheduler=self.scheduler, window=self.window)
+        links = []
+        for intr_bus, budget in self._intrs:
+            link = wishbone.Interface(addr_width=self._sub_bus_address_bits,
+                                      data_width=self.data_width, granularity=self.granularity,
+                                      features=self.features)
+            arbiter.add(link, budget=budget)
+            links.append(link)
+        arbiter.bus.memory_map = MemoryMap(addr_width=self._sub_bus_address_bits,
+                                           data_width=self.data_width)
+        self.memory_map.add_window(arbiter.bus.memory_map, addr=index * self.window_size)
+        self._regions[index] = _Region(arbiter, links)
+        return arbiter.bus
+
+    def items(self):
+        """Iterate over the ``(index, bus)`` pairs of the instantiated regions, in address
+        order."""
+        for index, region in sorted(self._regions.items()):
+            yield index, region.bus
+
+    def elaborate(self, platform):
+        m = Module()
+
+        regions = sorted(self._regions.items())
+        for index, region in regions:
+            m.submodules["region{}".format(index)] = region.arbiter
+
+        for position, (intr_bus, _) in enumerate(self._intrs):
+            for index, region in regions:
+                link   = region.links[position]
+                chosen = intr_bus.adr[self._sub_bus_address_bits:] == index
+                m.d.comb += [
+                    link.adr.eq(intr_bus.adr),
+                    link.dat_w.eq(intr_bus.dat_w),
+                    link.sel.eq(intr_bus.sel),
+                    link.we.eq(intr_bus.we),
+                    link.cyc.eq(intr_bus.cyc & chosen),
+                    link.stb.eq(intr_bus.stb & chosen),
+                ]
+                for name in ("lock", "cti", "bte"):
+                    if hasattr(link, name) and hasattr(intr_bus, name):
+                        m.d.comb += getattr(link, name).eq(getattr(intr_bus, name))
+                with m.If(chosen):
+                    m.d.comb += intr_bus.dat_r.eq(link.dat_r)
+                    for name in ("ack", "err", "rty"):
+                        if hasattr(link, name) and hasattr(intr_bus, name):
+                            m.d.comb += getattr(intr_bus, name).eq(getattr(link, name))
+
+        return m
+
+
+class _Region:
+    def __init__(self, arbiter, links):
+        self.arbiter = arbiter
+        self.links   = links
+
+    @property
+    def bus(self):
+        return self.arbiter.bus
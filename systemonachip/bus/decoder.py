@@ -1,52 +1,111 @@
 import math
 
+from nmigen import *
+
 from nmigen_soc import wishbone
 
 from nmigen_soc import memory
 
+from ..window import block
+
 class DecoderWindow:
+	"""Memory window onto one bin of a parent window. Integer indices access a single address,
+	   slices and :meth:`readinto`/:meth:`write` move a block of bytes at once through the parent's
+	   own block methods when it has them."""
 	def __init__(self, parent_window, address, bin_size):
 		self._parent = parent_window
 		self._address = address
 		self._bin_size = bin_size
 
-	def __getitem__(self, index):
-		if index > bin_size or index < -bin_size:
+	def _index(self, index):
+		if index >= self._bin_size or index < -self._bin_size:
 			raise IndexError()
 		if index < 0:
-			index += bin_size
-		return self._parent[self._address + index]
+			index += self._bin_size
+		return self._address + index
+
+	def _block(self, offset, size):
+		if offset < 0 or offset + size > self._bin_size:
+			raise IndexError("Block of {} bytes at {:#x} is outside of the {:#x} byte window"
+			                 .format(size, offset, self._bin_size))
+		return self._address + offset
+
+	def _slice(self, key):
+		start, stop, step = key.indices(self._bin_size)
+		if step != 1:
+			raise ValueError("Window slices must be contiguous")
+		return start, max(stop - start, 0)
+
+	def readinto(self, offset, buffer):
+		"""Fill `buffer` with the bytes starting at `offset` within the bin."""
+		size = memoryview(buffer).nbytes
+		return block.readinto(self._parent, self._block(offset, size), buffer)
+
+	def write(self, offset, data):
+		"""Write the bytes-like `data` starting at `offset` within the bin."""
+		size = memoryview(data).nbytes
+		block.write(self._parent, self._block(offset, size), data)
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			start, size = self._slice(index)
+			return bytes(block.read(self._parent, self._block(start, size), size))
+		return self._parent[self._index(index)]
 
 	def __setitem__(self, index, value):
-		if index > bin_size or index < -bin_size:
-			raise IndexError()
-		if index < 0:
-			index += bin_size
-		self._parent[self._address + index] = value
+		if isinstance(index, slice):
+			start, size = self._slice(index)
+			if len(value) != size:
+				raise ValueError("Cannot assign {} bytes to a {} byte slice"
+				                 .format(len(value), size))
+			self.write(start, value)
+			return
+		self._parent[self._index(index)] = value
 
 
 class Decoder(wishbone.Decoder):
 	"""A decoder splits the incoming address space into evenly spaced chunks of
-	   the given window_size. Each chunk is accessible by index."""
-	def __init__(self, memory_window, window_size, *, cycle_type=True, burst_type=True):
+	   the given window_size. Each chunk is accessible by index.
+
+	   Only the bins that have been accessed are instantiated and stored, so the cost of a
+	   decoder does not depend on how small its bins are compared to the address space.
+
+	   With `pipelined`, the bus and the bins are in Wishbone pipelined mode (``stall``), and a
+	   request can be issued on every cycle. Requests to one bin may be outstanding while the
+	   next ones are issued, but a request to another bin stalls until they are acknowledged,
+	   so that acknowledgements come back in order."""
+	# Number of requests that may be waiting for an acknowledgement in pipelined mode.
+	MAX_OUTSTANDING = 8
+
+	def __init__(self, memory_window, window_size, *, cycle_type=True, burst_type=True, pipelined=False):
 		self.features = []
 		if cycle_type:
 			self.features.append("cti")
 		if burst_type:
 			self.features.append("bte")
+		if pipelined:
+			self.features.append("stall")
+		self.pipelined = pipelined
 		super().__init__(addr_width=memory_window.addr_width, data_width=memory_window.data_width, features=self.features)
 		self.memory_window_bits = 32
 		self.start_address = 0
 		self.bin_size = window_size
 		self._sub_bus_address_bits = int(math.log2(window_size))
-		self._bins = [None] * (2 ** (self.memory_window_bits - self._sub_bus_address_bits))
+		self.bin_count = 2 ** (self.memory_window_bits - self._sub_bus_address_bits)
+		self._bins = {}
 		self._memory_window = memory_window
 
+	def __len__(self):
+		return self.bin_count
+
 	def __getitem__(self, index):
-		if index > len(self._bins):
+		if not isinstance(index, int):
+			raise TypeError("Bin index must be an integer, not {!r}".format(index))
+		if index < 0 or index >= self.bin_count:
 			raise IndexError("Invalid bin")
-		if self._bins[index]:
-			return self._bins[index]
+		window = self._bins.get(index)
+		if window is not None:
+			return window
 		bin_address = self.start_address + index * self.bin_size
 		if isinstance(self._memory_window, wishbone.Interface):
 			window = wishbone.Interface(addr_width=self._sub_bus_address_bits, data_width=self._memory_window.data_width, features=self.features)
@@ -56,3 +115,66 @@ class Decoder(wishbone.Decoder):
 			window = DecoderWindow(self._memory_window, bin_address, self.bin_size)
 		self._bins[index] = window
 		return window
+
+	def items(self):
+		"""Iterate over the ``(index, window)`` pairs of the instantiated bins, in address
+		   order."""
+		return iter(sorted(self._bins.items()))
+
+	def bin_at(self, address):
+		"""The instantiated bin holding `address` as an ``(index, window)`` pair, or ``None`` if
+		   its bin has not been instantiated."""
+		index = (address - self.start_address) // self.bin_size
+		window = self._bins.get(index)
+		if window is None:
+			return None
+		return index, window
+
+	def elaborate(self, platform):
+		if not self.pipelined:
+			return super().elaborate(platform)
+
+		m = Module()
+		bus = self.bus
+		bins = [window for _, window in self.items()]
+
+		selected = Signal(range(max(len(bins), 2)))
+		hit = Signal()
+		for position, (index, _) in enumerate(self.items()):
+			with m.If(bus.adr[self._sub_bus_address_bits:] == index):
+				m.d.comb += [selected.eq(position), hit.eq(1)]
+
+		# Requests accepted but not acknowledged yet, which all went to the `owner` bin.
+		outstanding = Signal(range(self.MAX_OUTSTANDING + 1))
+		owner = Signal.like(selected)
+		blocked = (outstanding != 0) & (owner != selected) | (outstanding == self.MAX_OUTSTANDING)
+		sub_stall = Signal()
+		for position, window in enumerate(bins):
+			chosen = hit & (selected == position)
+			m.d.comb += [
+				window.adr.eq(bus.adr),
+				window.dat_w.eq(bus.dat_w),
+				window.sel.eq(bus.sel),
+				window.we.eq(bus.we),
+				window.cyc.eq(bus.cyc & (chosen | (outstanding != 0) & (owner == position))),
+				window.stb.eq(bus.stb & chosen & ~blocked),
+			]
+			for name in ("cti", "bte"):
+				if hasattr(window, name):
+					m.d.comb += getattr(window, name).eq(getattr(bus, name))
+			with m.If(chosen):
+				m.d.comb += sub_stall.eq(window.stall)
+			with m.If(window.ack):
+				m.d.comb += [bus.ack.eq(1), bus.dat_r.eq(window.dat_r)]
+
+		m.d.comb += bus.stall.eq(bus.stb & (blocked | sub_stall))
+
+		accepted = bus.cyc & bus.stb & ~bus.stall
+		with m.If(~bus.cyc):
+			m.d.sync += outstanding.eq(0)
+		with m.Else():
+			m.d.sync += outstanding.eq(outstanding + accepted - bus.ack)
+		with m.If(accepted):
+			m.d.sync += owner.eq(selected)
+
+		return m
@@ -4,19 +4,48 @@ from nmigen_soc import wishbone
 from minerva.core import Minerva
 
 from . import CPU
+from ..bus.arbiter import Arbiter
 
 
 __all__ = ["MinervaCPU"]
 
 
 class MinervaCPU(CPU, Elaboratable):
+    """Minerva RISC-V CPU.
+
+    Parameters
+    ----------
+    instruction_bus : :class:`..bus.Arbiter` or :class:`nmigen_soc.wishbone.Interface` or None
+        Where the instruction bus of the CPU goes. It is added to an arbiter, connected to a bus,
+        or, if ``None``, only available as :attr:`ibus`.
+    data_bus : :class:`..bus.Arbiter` or :class:`nmigen_soc.wishbone.Interface` or None
+        Where the data bus of the CPU goes, like `instruction_bus`. When both buses go to the
+        same arbiter, the data bus is added first, so that it takes precedence over instruction
+        fetches with the ``"priority"`` scheduler.
+    kwargs
+        Configuration of the core. See :class:`minerva.core.Minerva`.
+
+    Attributes
+    ----------
+    ibus : :class:`nmigen_soc.wishbone.Interface`
+        Instruction bus.
+    dbus : :class:`nmigen_soc.wishbone.Interface`
+        Data bus.
+    ip : Signal
+        External interrupt lines.
+    """
     name       = "minerva"
     arch       = "riscv"
     byteorder  = "little"
     data_width = 32
 
-    def __init__(self, instruction_bus, data_bus, **kwargs):
+    def __init__(self, instruction_bus=None, data_bus=None, **kwargs):
         super().__init__()
+        for name, target in (("Instruction", instruction_bus), ("Data", data_bus)):
+            if target is not None and not isinstance(target, (Arbiter, wishbone.Interface)):
+                raise TypeError("{} bus must be None, an Arbiter or a wishbone.Interface, "
+                                "not {!r}"
+                                .format(name, target))
         self._cpu = Minerva(**kwargs)
         self.ibus = wishbone.Interface(addr_width=30, data_width=32, granularity=8,
                                        features={"err", "cti", "bte"})
@@ -24,6 +53,13 @@ class MinervaCPU(CPU, Elaboratable):
                                        features={"err", "cti", "bte"})
         self.ip   = Signal.like(self._cpu.external_interrupt)
 
+        self._targets = []
+        for bus, target in ((self.dbus, data_bus), (self.ibus, instruction_bus)):
+            if isinstance(target, Arbiter):
+                target.add(bus)
+            elif target is not None:
+                self._targets.append((bus, target))
+
     @property
     def reset_addr(self):
         return self._cpu.reset_address
@@ -41,5 +77,9 @@ class MinervaCPU(CPU, Elaboratable):
             self._cpu.dbus.connect(self.dbus),
             self._cpu.external_interrupt.eq(self.ip),
         ]
+        for bus, target in self._targets:
+            # Optional signals the target bus lacks are left unconnected.
+            m.d.comb += bus.connect(target, exclude={name for name in bus.fields
+                                                     if name not in target.fields})
 
         return m
@@ -1,13 +1,17 @@
 from nmigen import Record, Signal
 
-class Event:
-    def __init__(self, address, bit, *, mode="rise"):
+from ..register.base import Register
+
+class Event(Register):
+    _width  = 1
+    _access = "r"
+
+    def __init__(self, address, bit, *, mode="rise", cache="volatile"):
         self._address = address
         self._mode = mode
         self._bit = bit
-
-    def __set_name__(self, owner, name):
-        self._name = name
+        self._position = bit
+        self._set_cache(cache)
 
     def __get__(self, obj, type=None):
         if obj == None:
@@ -23,7 +27,10 @@ class Event:
             event  = Signal(name="{}_stb".format(self._name))
             obj._events[key] = event
             return event
-        return (obj._memory_window[self._address] & (1 << self._bit)) != 0
+        return self._decode(self._read(obj))
+
+    def _decode(self, word):
+        return (word & (1 << self._bit)) != 0
 
 class AggregateEvent:
     pass
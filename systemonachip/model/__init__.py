@@ -0,0 +1,6 @@
+from .base import *
+from .event import *
+from .timer import *
+from .memory import *
+from .serial import *
+from .bus import *
@@ -0,0 +1,82 @@
+__all__ = ["PeripheralModel"]
+
+
+class PeripheralModel:
+    """Transaction-level model of a peripheral.
+
+    A model is a memory window that behaves like the registers of a peripheral, without
+    simulating its logic. Driver code can use a model or a simulator bus of the RTL
+    interchangeably, but accesses to a model take no simulated time, and time only passes when
+    :meth:`advance` is called. Models compute the state reached after any number of clock cycles
+    directly, so advancing them costs the same for one cycle or a million.
+
+    Subclasses set `peripheral` to the peripheral class whose register descriptors they model, and
+    implement a ``read_<name>()`` method for every readable descriptor and a
+    ``write_<name>(value)`` method for every writable one. This is checked when the subclass is
+    created. Words are assembled from, and split into, descriptor values with the descriptors
+    themselves, so a model cannot disagree with the driver about the register layout.
+
+    Attributes
+    ----------
+    cycles : int
+        Number of clock cycles elapsed so far.
+    irq : bool
+        Interrupt request. Models without interrupts never raise it.
+    """
+    peripheral = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.peripheral is None:
+            return
+        for field in cls.peripheral._layout:
+            for access, method in (("r", "read_"), ("w", "write_")):
+                if access in field.access and not hasattr(cls, method + field.name):
+                    raise TypeError("Model {} must implement {}{} for register {!r} of {}"
+                                    .format(cls.__name__, method, field.name, field.name,
+                                            cls.peripheral.__name__))
+
+    def __init__(self):
+        self.cycles = 0
+
+    @property
+    def irq(self):
+        return False
+
+    def _fields_at(self, address):
+        return [field for field in self.peripheral._layout
+                if address <= field.address < address + 4]
+
+    def __getitem__(self, address):
+        word = 0
+        for field in self._fields_at(address):
+            if "r" not in field.access:
+                continue
+            value = getattr(self, "read_" + field.name)()
+            shift = 8 * (field.address - address) + field.position
+            if isinstance(field.width, int):
+                value &= (1 << field.width) - 1
+            word |= value << shift
+        return word & 0xffffffff
+
+    def __setitem__(self, address, value):
+        for field in self._fields_at(address):
+            if field.address != address or "w" not in field.access:
+                continue
+            getattr(self, "write_" + field.name)(field.register._decode(value))
+
+    def advance(self, cycles):
+        """Let `cycles` clock cycles elapse."""
+        if not isinstance(cycles, int) or cycles < 0:
+            raise ValueError("Number of cycles must be a non-negative integer, not {!r}"
+                             .format(cycles))
+        if cycles:
+            self._advance(cycles)
+            self.cycles += cycles
+
+    def _advance(self, cycles):
+        pass
+
+    # Memory window hook of :meth:`..peripheral.Peripheral.wait_until`.
+    def idle(self, cycles):
+        self.advance(cycles)
@@ -0,0 +1,63 @@
+import bisect
+
+from ..window import block
+
+
+__all__ = ["ModelBus"]
+
+
+class ModelBus:
+    """Memory window over several models sharing a clock.
+
+    Accesses are routed to the model whose base address is the closest below them, with the base
+    address subtracted, and :meth:`advance` lets time pass for every model at once.
+
+    Parameters
+    ----------
+    models : dict(int, model)
+        Models by base address.
+
+    Attributes
+    ----------
+    cycles : int
+        Number of clock cycles elapsed so far.
+    """
+    def __init__(self, models):
+        self._bases  = sorted(models)
+        self._models = [models[base] for base in self._bases]
+        self.cycles  = 0
+
+    def _decode(self, address):
+        index = bisect.bisect_right(self._bases, address) - 1
+        if index < 0:
+            raise IndexError("Address {:#x} is not mapped to any model".format(address))
+        return self._models[index], address - self._bases[index]
+
+    def __getitem__(self, address):
+        model, offset = self._decode(address)
+        return model[offset]
+
+    def __setitem__(self, address, value):
+        model, offset = self._decode(address)
+        model[offset] = value
+
+    def readinto(self, offset, buffer):
+        model, offset = self._decode(offset)
+        return block.readinto(model, offset, buffer)
+
+    def write(self, offset, data):
+        model, offset = self._decode(offset)
+        block.write(model, offset, data)
+
+    @property
+    def irq(self):
+        """Interrupt requests of the models, by base address."""
+        return {base: model.irq for base, model in zip(self._bases, self._models)}
+
+    def advance(self, cycles):
+        """Let `cycles` clock cycles elapse for every model."""
+        for model in self._models:
+            model.advance(cycles)
+        self.cycles += cycles
+
+    idle = advance
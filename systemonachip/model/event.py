@@ -0,0 +1,66 @@
+__all__ = ["InterruptSourceModel"]
+
+
+class InterruptSourceModel:
+    """Transaction-level model of :class:`..peripheral.event.InterruptSource`.
+
+    Peripheral models report the strobes of their event sources with :meth:`set_level`, or
+    :meth:`trigger` when they already know that a notification was raised at some point in the
+    cycles they advanced over.
+
+    Parameters
+    ----------
+    modes : list of ``"level"``, ``"rise"``, ``"fall"``
+        Trigger mode of each event source, in order.
+
+    Attributes
+    ----------
+    status : int
+        Level of the strobe of each event source.
+    pending : int
+        Pending notifications. Writing 1 to a bit with :meth:`write_pending` clears it.
+    enable : int
+        Enabled event sources.
+    irq : bool
+        Interrupt request. Raised if any enabled event source has a pending notification.
+    """
+    def __init__(self, modes):
+        choices = ("level", "rise", "fall")
+        for mode in modes:
+            if mode not in choices:
+                raise ValueError("Invalid trigger mode {!r}; must be one of {}"
+                                 .format(mode, ", ".join(choices)))
+        self._modes  = list(modes)
+        self.status  = 0
+        self.pending = 0
+        self.enable  = 0
+
+    def set_level(self, index, level):
+        """Set the strobe of event source `index` to `level`, raising a notification if its
+        trigger mode calls for one."""
+        mask = 1 << index
+        previous = bool(self.status & mask)
+        mode = self._modes[index]
+        if (mode == "level" and level or
+                mode == "rise" and level and not previous or
+                mode == "fall" and not level and previous):
+            self.pending |= mask
+        self.status = self.status | mask if level else self.status & ~mask
+
+    def trigger(self, index):
+        """Raise a notification of event source `index`."""
+        self.pending |= 1 << index
+
+    def write_pending(self, value):
+        self.pending &= ~value
+        for index, mode in enumerate(self._modes):
+            # A level-triggered source notifies again as long as its strobe is high.
+            if mode == "level" and self.status & (1 << index):
+                self.pending |= 1 << index
+
+    def write_enable(self, value):
+        self.enable = value & ((1 << len(self._modes)) - 1)
+
+    @property
+    def irq(self):
+        return bool(self.pending & self.enable)
@@ -0,0 +1,73 @@
+__all__ = ["RandomAccessMemoryModel"]
+
+
+class RandomAccessMemoryModel:
+    """Transaction-level model of :class:`..peripheral.memory.RandomAccessMemory`.
+
+    A memory window over a :class:`bytearray`. Words are little endian, and block transfers with
+    :meth:`readinto` and :meth:`write` copy bytes directly.
+
+    Parameters
+    ----------
+    size : int
+        Memory size in bytes.
+    writable : bool
+        Memory is writable. Writes to a read-only memory are ignored, like by the RTL.
+    init : bytes-like or None
+        Initial contents.
+
+    Attributes
+    ----------
+    data : bytearray
+        Memory contents.
+    cycles : int
+        Number of clock cycles elapsed so far.
+    """
+    def __init__(self, *, size, writable=True, init=None):
+        if not isinstance(size, int) or size <= 0 or size & size-1:
+            raise ValueError("Size must be an integer power of two, not {!r}"
+                             .format(size))
+        self.data     = bytearray(size)
+        self.writable = writable
+        self.cycles   = 0
+        if init is not None:
+            init = bytes(init)
+            if len(init) > size:
+                raise ValueError("Initial contents of {} bytes do not fit in {} bytes"
+                                 .format(len(init), size))
+            self.data[:len(init)] = init
+
+    @property
+    def irq(self):
+        return False
+
+    def _check(self, offset, size):
+        if offset < 0 or offset + size > len(self.data):
+            raise IndexError("Address {!r} is outside of the {} byte memory"
+                             .format(offset, len(self.data)))
+
+    def __getitem__(self, address):
+        self._check(address, 4)
+        return int.from_bytes(self.data[address:address + 4], "little")
+
+    def __setitem__(self, address, value):
+        self._check(address, 4)
+        if self.writable:
+            self.data[address:address + 4] = (value & 0xffffffff).to_bytes(4, "little")
+
+    def readinto(self, offset, buffer):
+        view = memoryview(buffer).cast("B")
+        self._check(offset, len(view))
+        view[:] = self.data[offset:offset + len(view)]
+        return len(view)
+
+    def write(self, offset, data):
+        view = memoryview(data).cast("B")
+        self._check(offset, len(view))
+        if self.writable:
+            self.data[offset:offset + len(view)] = view
+
+    def advance(self, cycles):
+        self.cycles += cycles
+
+    idle = advance
@@ -0,0 +1,202 @@
+from collections import deque
+
+from nmigen.utils import bits_for
+
+from ..event import Event
+from ..peripheral import Peripheral
+from ..register import AggregateEventEnable, AggregateEventStatus, Bit, VariableWidth
+from .base import PeripheralModel
+from .event import InterruptSourceModel
+
+
+__all__ = ["AsyncSerialRegisters", "AsyncSerialModel"]
+
+
+class AsyncSerialRegisters(Peripheral):
+    """Register descriptors of :class:`..peripheral.serial.AsyncSerial`, for driving an
+    :class:`AsyncSerialModel`.
+
+    This is a stand-in: ``AsyncSerial`` still builds its registers with the old CSR bank and
+    cannot be instantiated in driver mode, so its register map is described here by hand. It
+    follows the order of the CSR bank, one word per register, and then the registers of the
+    interrupt source, which the peripheral bridge maps at the next ``0x20`` byte boundary.
+
+    Error flags of ``rx_err`` are, from bit 0: overflow, frame error and parity error.
+    ``event_levels`` holds the level of the strobe of every event source. Writing 1 to a bit of
+    ``event_status`` clears the matching pending event.
+    """
+    divisor      = VariableWidth(0x00, variable="_divisor_bits")
+    rx_data      = VariableWidth(0x04, variable="_data_bits", access="r")
+    rx_rdy       = Bit(0x08, 0, access="r")
+    rx_err       = VariableWidth(0x0c, variable="_err_bits", access="r")
+    tx_data      = VariableWidth(0x10, variable="_data_bits", access="w")
+    tx_rdy       = Bit(0x14, 0, access="r")
+    event_levels = VariableWidth(0x20, variable="_event_bits", access="r")
+    event_status = AggregateEventStatus(0x24)
+    event_enable = AggregateEventEnable(0x28)
+
+    rx_ready = Event(0x24, 0, mode="level")
+    """Receiver FIFO is non-empty."""
+    rx_error = Event(0x24, 1, mode="rise")
+    """Receiver error."""
+    tx_empty = Event(0x24, 2, mode="rise")
+    """Transmitter FIFO is empty."""
+
+    def __init__(self, memory_window, *, divisor_bits=32, data_bits=8, shadow=False):
+        super().__init__(memory_window, shadow=shadow)
+        self._divisor_bits = divisor_bits
+        self._data_bits    = data_bits
+        self._err_bits     = 3
+        self._event_bits   = 3
+
+
+class AsyncSerialModel(PeripheralModel):
+    """Transaction-level model of :class:`..peripheral.serial.AsyncSerial`.
+
+    Every frame takes ``divisor`` cycles per bit, for a start bit, the data bits, the parity bit
+    if any and a stop bit. :meth:`advance` completes the frames that end within the elapsed cycles
+    in one step each, whatever their length. Bytes sent by the transmitter are appended to
+    :attr:`transmitted`, and :meth:`receive` plays bytes on the receiver line.
+
+    Parameters
+    ----------
+    divisor : int
+        Clock divisor reset value.
+    divisor_bits : int
+        Optional. Clock divisor width. If omitted, ``bits_for(divisor)`` is used instead.
+    data_bits : int
+        Data width.
+    parity : ``"none"``, ``"mark"``, ``"space"``, ``"even"``, ``"odd"``
+        Parity mode.
+    rx_depth : int
+        Depth of the receiver FIFO.
+    tx_depth : int
+        Depth of the transmitter FIFO.
+
+    Attributes
+    ----------
+    transmitted : bytearray
+        Bytes sent by the transmitter so far.
+    """
+    peripheral = AsyncSerialRegisters
+
+    def __init__(self, *, divisor, divisor_bits=None, data_bits=8, parity="none",
+                 rx_depth=16, tx_depth=16):
+        choices = ("none", "mark", "space", "even", "odd")
+        if parity not in choices:
+            raise ValueError("Invalid parity {!r}; must be one of {}"
+                             .format(parity, ", ".join(choices)))
+        super().__init__()
+        self._divisor_mask = (1 << (divisor_bits or bits_for(divisor))) - 1
+        self._divisor   = divisor
+        self._data_mask = (1 << data_bits) - 1
+        self._bits      = 1 + data_bits + (parity != "none") + 1
+
+        self._rx_depth  = rx_depth
+        self._rx_fifo   = deque()
+        self._rx_line   = deque() # (end cycle, data) of the frames played on the line.
+        self._rx_err    = 0
+
+        self._tx_depth  = tx_depth
+        self._tx_fifo   = deque()
+        self._tx_frame  = None    # (end cycle, data) of the frame being sent.
+
+        self.transmitted = bytearray()
+
+        self.events = InterruptSourceModel(["level", "rise", "rise"])
+        self.events.status = 0b100
+
+    @property
+    def irq(self):
+        return self.events.irq
+
+    @property
+    def frame_cycles(self):
+        """Number of cycles taken by one frame."""
+        return self._divisor * self._bits
+
+    def receive(self, data):
+        """Play the bytes of `data` on the receiver line, back to back, after any bytes already
+        being received."""
+        end = self._rx_line[-1][0] if self._rx_line else self.cycles
+        for byte in bytes(data):
+            end += self.frame_cycles
+            self._rx_line.append((end, byte))
+
+    def read_divisor(self):
+        return self._divisor
+
+    def write_divisor(self, value):
+        self._divisor = value & self._divisor_mask
+
+    def read_rx_data(self):
+        if not self._rx_fifo:
+            return 0
+        data = self._rx_fifo.popleft()
+        self.events.set_level(0, bool(self._rx_fifo))
+        return data
+
+    def read_rx_rdy(self):
+        return bool(self._rx_fifo)
+
+    def read_rx_err(self):
+        return self._rx_err
+
+    def write_tx_data(self, value):
+        if len(self._tx_fifo) < self._tx_depth:
+            self._tx_fifo.append(value & self._data_mask)
+            self.events.set_level(2, False)
+            if self._tx_frame is None:
+                self._start_frame(self.cycles)
+
+    def read_tx_rdy(self):
+        return len(self._tx_fifo) < self._tx_depth
+
+    def read_event_levels(self):
+        return self.events.status
+
+    def read_event_enable(self):
+        return self.events.enable
+
+    def write_event_enable(self, value):
+        self.events.write_enable(value)
+
+    def read_event_status(self):
+        return self.events.pending
+
+    def write_event_status(self, value):
+        self.events.write_pending(value)
+
+    def read_rx_ready(self):
+        return bool(self.events.pending & 0b001)
+
+    def read_rx_error(self):
+        return bool(self.events.pending & 0b010)
+
+    def read_tx_empty(self):
+        return bool(self.events.pending & 0b100)
+
+    def _start_frame(self, start):
+        self._tx_frame = (start + self.frame_cycles, self._tx_fifo.popleft())
+        self.events.set_level(2, not self._tx_fifo)
+
+    def _advance(self, cycles):
+        end = self.cycles + cycles
+
+        while self._tx_frame is not None and self._tx_frame[0] <= end:
+            frame_end, data = self._tx_frame
+            self.transmitted.append(data)
+            self._tx_frame = None
+            if self._tx_fifo:
+                self._start_frame(frame_end)
+
+        while self._rx_line and self._rx_line[0][0] <= end:
+            _, data = self._rx_line.popleft()
+            if len(self._rx_fifo) < self._rx_depth:
+                self._rx_fifo.append(data & self._data_mask)
+                self._rx_err = 0
+                self.events.set_level(1, False)
+            else:
+                self._rx_err = 0b001
+                self.events.set_level(1, True)
+        self.events.set_level(0, bool(self._rx_fifo))
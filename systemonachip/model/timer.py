@@ -0,0 +1,101 @@
+from ..peripheral.timer import Timer
+from .base import PeripheralModel
+from .event import InterruptSourceModel
+
+
+__all__ = ["TimerModel"]
+
+
+class TimerModel(PeripheralModel):
+    """Transaction-level model of :class:`..peripheral.timer.Timer`.
+
+    While enabled, the counter decrements on every cycle, and is reloaded on the cycle after it
+    reaches 0, which raises the ``zero`` event. :meth:`advance` works out the counter value and
+    whether the event was raised from the number of elapsed cycles, without counting them.
+    Writing 0 to a bit of ``event_status`` clears the matching pending event.
+
+    Parameters
+    ----------
+    width : int
+        Counter width.
+    """
+    peripheral = Timer
+
+    def __init__(self, *, width):
+        if not isinstance(width, int) or width < 0:
+            raise ValueError("Counter width must be a non-negative integer, not {!r}"
+                             .format(width))
+        if width > 32:
+            raise ValueError("Counter width cannot be greater than 32 (was: {})"
+                             .format(width))
+        super().__init__()
+        self._width  = width
+        self._mask   = (1 << width) - 1
+        self._reload = 0
+        self._value  = 0
+        self._enable = False
+        self._zero   = False # Strobe of the zero event during the last cycle.
+        self.events  = InterruptSourceModel(["rise"])
+
+    @property
+    def irq(self):
+        return self.events.irq
+
+    def read_creator_id(self):
+        return Timer.creator_id._value
+
+    def read_creation_id(self):
+        return Timer.creation_id._value
+
+    def read_reload_(self):
+        return self._reload
+
+    def write_reload_(self, value):
+        self._reload = value & self._mask
+
+    def read_enable(self):
+        return self._enable
+
+    def write_enable(self, value):
+        self._enable = bool(value)
+
+    def read_value(self):
+        return self._value
+
+    def write_value(self, value):
+        self._value = value & self._mask
+
+    def read_event_enable(self):
+        return self.events.enable
+
+    def write_event_enable(self, value):
+        self.events.write_enable(value)
+
+    def read_event_status(self):
+        return self.events.pending
+
+    def write_event_status(self, value):
+        self.events.write_pending(~value)
+
+    def read_width(self):
+        return self._width
+
+    def read_zero(self):
+        return bool(self.events.pending & 1)
+
+    def _advance(self, cycles):
+        value, reload_ = self._value, self._reload
+        if not self._enable:
+            self._zero = False
+        elif cycles <= value:
+            self._value = value - cycles
+            self._zero  = False
+        else:
+            # The counter is 0 on cycle `value`, then every `reload_ + 1` cycles.
+            hits = 1 + (cycles - 1 - value) // (reload_ + 1)
+            rise = value > 0 or not self._zero
+            if rise or reload_ > 0 and hits > 1:
+                self.events.trigger(0)
+            self._value = reload_ - (cycles - 1 - value) % (reload_ + 1)
+            self._zero  = self._value == reload_
+        self.events.status = int(self._zero)
@@ -1,3 +1,7 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
 from nmigen import *
 from nmigen import tracer
 from nmigen.utils import log2_int
@@ -6,21 +10,243 @@ from nmigen_soc import csr, wishbone
 from nmigen_soc.memory import MemoryMap
 from nmigen_soc.csr.wishbone import WishboneCSRBridge
 
-from ..register import AutoRegister
+from ..register import Register, Transaction
+from ..window import AccessTrace, TracingWindow
 from ..event import *
 
 
 __all__ = ["Peripheral"]
 
 
+# Bounds of the adaptive backoff between polls of :meth:`Peripheral.wait_until`: seconds to sleep
+# on a real memory window, or clock cycles to leave a simulated one idle for.
+_BACKOFF_SECONDS = (1e-5, 1e-2)
+_BACKOFF_CYCLES  = (16, 4096)
+
+
 class Peripheral:
     """
+    Parameters
+    ----------
+    memory_window : :class:`Record` or indexable
+        Bus to elaborate the peripheral on, or memory window to drive it through.
+    shadow : bool
+        Keep a shadow cache of registers that do not need to be read on every access. See
+        :class:`..register.Register` for the cache policies. Driver mode only.
+
+    Every subclass gets a ``_layout`` table when it is created: a tuple of
+    :class:`..register.base.RegisterField` for its register and event descriptors, ordered by
+    address and bit position. ``_fields`` maps descriptor names to the same entries.
     """
-    def __init__(self, memory_window):
+    _layout = ()
+    _fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = {}
+        for class_ in reversed(cls.__mro__):
+            for name, v in vars(class_).items():
+                if isinstance(v, Register):
+                    fields[name] = v._field()
+                elif name in fields:
+                    del fields[name]
+        cls._layout = tuple(sorted(fields.values(), key=lambda f: (f.address, f.position)))
+        cls._fields = {field.name: field for field in cls._layout}
+
+    def __init__(self, memory_window, *, shadow=False):
         self._memory_window = memory_window
+        self._shadow = {} if shadow else None
+        self._tracer = None
+        self._write_locks = {}
+        self._write_loop  = None
         if isinstance(self._memory_window, Record):
             self._bus = self._memory_window
 
+    def _cacheable_registers(self, names):
+        if names:
+            return [self._fields[name].register for name in names]
+        return [field.register for field in self._layout if field.register._cache != "volatile"]
+
+    def invalidate(self, *names):
+        """Drop the shadowed values of the named registers, or of every register if none are given.
+        """
+        if self._shadow is None:
+            return
+        if not names:
+            self._shadow.clear()
+        for register in self._cacheable_registers(names):
+            self._shadow.pop(register._name, None)
+
+    def refresh(self, *names):
+        """Read the named registers, or every cacheable register if none are given, back into the
+        shadow cache.
+        """
+        if self._shadow is None:
+            raise RuntimeError("Peripheral {!r} does not have a shadow cache".format(self))
+        for register in self._cacheable_registers(names):
+            self._shadow.pop(register._name, None)
+            register._read(self)
+
+    async def aread(self, name):
+        """Read register `name` through an asynchronous memory window.
+
+        See :class:`..window.AsyncWindow` for the protocol. The shadow cache is used like for
+        synchronous accesses, and concurrent calls may be in flight at once, for example with
+        :func:`asyncio.gather`.
+        """
+        register = self._fields[name].register
+        return register._decode(await register._aread(self))
+
+    def _write_lock(self, address):
+        # Locks belong to the event loop they are used in.
+        loop = asyncio.get_running_loop()
+        if loop is not self._write_loop:
+            self._write_locks = {}
+            self._write_loop  = loop
+        return self._write_locks.setdefault(address, asyncio.Lock())
+
+    async def awrite(self, name, value):
+        """Write `value` to register `name` through an asynchronous memory window.
+
+        Registers that share their word with others, such as single bits, are read first.
+        Concurrent writes to the same address are made one after the other, so that none of them
+        is lost between the read and the write of another.
+        """
+        register = self._fields[name].register
+        if register._access == "r":
+            raise AttributeError("Register {!r} is read-only".format(name))
+        async with self._write_lock(register._address):
+            word = await register._aread(self) if register._partial else None
+            await register._awrite(self, register._encode(word, value))
+
+    def _window_hook(self, name):
+        """Find method `name` of the memory window, or of a window it wraps."""
+        window = self._memory_window
+        while window is not None:
+            hook = getattr(window, name, None)
+            if hook is not None:
+                return hook
+            window = getattr(window, "_memory_window", None)
+        return None
+
+    def wait_until(self, register, predicate, *, timeout=None):
+        """Poll `register` until `predicate` is true for its value, and return that value.
+
+        `register` is a register name or descriptor, such as ``Timer.zero``. Reads bypass the
+        shadow cache. Between polls, the peripheral backs off exponentially, so a long wait costs
+        a few reads per second rather than a CPU core. Memory windows can shorten the wait with
+        optional hooks, looked up through wrapping windows such as transactions and traces:
+
+        * ``idle(cycles)``: a simulated window advances the simulation by `cycles` clock cycles
+          without accessing the bus. Backoff is then counted in cycles and no time is slept, so the
+          simulation moves in large strides instead of one bus access per cycle.
+        * ``wait_irq(timeout)``: a window that can see interrupts blocks until one is raised or
+          `timeout` seconds have elapsed, and is used instead of sleeping.
+
+        Raises
+        ------
+        :exc:`TimeoutError`
+            If `timeout` seconds elapse first.
+        """
+        if isinstance(self._memory_window, Record):
+            raise RuntimeError("Cannot wait for a register when elaborating")
+        if isinstance(register, Register):
+            register = register._name
+        register = self._fields[register].register
+
+        idle     = self._window_hook("idle")
+        wait_irq = self._window_hook("wait_irq")
+        minimum, maximum = _BACKOFF_CYCLES if idle is not None else _BACKOFF_SECONDS
+        delay    = minimum
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.invalidate(register._name)
+            value = register._decode(register._read(self))
+            if predicate(value):
+                return value
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Register {!r} did not reach the expected value within {} "
+                                       "seconds".format(register._name, timeout))
+            if idle is not None:
+                idle(delay)
+            elif wait_irq is not None:
+                wait_irq(delay if deadline is None else min(delay, remaining))
+            else:
+                time.sleep(delay if deadline is None else min(delay, remaining))
+            delay = min(delay * 2, maximum)
+
+    def wait_for(self, event, *, timeout=None):
+        """Wait until `event` is pending. See :meth:`wait_until`."""
+        self.wait_until(event, bool, timeout=timeout)
+
+    def snapshot(self):
+        """Read every register in one block and decode them into a NumPy structured record.
+
+        See :func:`.snapshot.snapshot_all`, which samples a whole fleet of peripherals at once.
+        """
+        from .snapshot import snapshot_all
+        return snapshot_all([self])[0]
+
+    @contextmanager
+    def trace(self, tracer=None):
+        """Report the register and memory window accesses made within the block to `tracer`.
+
+        By default a new :class:`..window.AccessTrace` is used. The tracer is yielded, so its
+        statistics can be dumped with ``report()`` once the block exits. Within a transaction, the
+        accesses of the transaction to the memory window are traced, so writes are seen if it is
+        committed before the block exits. Only register accesses are traced through asynchronous
+        memory windows.
+        """
+        if isinstance(self._memory_window, Record):
+            raise RuntimeError("Cannot trace register accesses when elaborating")
+        if tracer is None:
+            tracer = AccessTrace(name=type(self).__name__)
+        if hasattr(tracer, "name_addresses"):
+            tracer.name_addresses(self._layout)
+
+        # Trace below a transaction, so that it still gathers the register writes.
+        owner = self._memory_window
+        if not isinstance(owner, Transaction):
+            owner = self
+        window = owner._memory_window
+        if not asyncio.iscoroutinefunction(getattr(window, "read", None)):
+            owner._memory_window = TracingWindow(window, tracer)
+        self._tracer = tracer
+        try:
+            yield tracer
+        finally:
+            owner._memory_window = window
+            self._tracer = None
+
+    @contextmanager
+    def transaction(self):
+        """Gather the register writes made within the block and send them when it exits.
+
+        Bits that share a register are merged, so each touched address gets one word-wide write. An
+        address is only read first when some of its bits were left untouched. Reads within the
+        block see the pending values. Nested transactions join the outermost one, and pending
+        writes are dropped (and the shadow cache invalidated) if the block raises.
+        """
+        if isinstance(self._memory_window, Record):
+            raise RuntimeError("Cannot start a transaction when elaborating")
+        if isinstance(self._memory_window, Transaction):
+            yield self
+            return
+
+        transaction = Transaction(self._memory_window)
+        self._memory_window = transaction
+        try:
+            yield self
+        except BaseException:
+            self.invalidate()
+            raise
+        finally:
+            self._memory_window = transaction._memory_window
+        transaction.commit()
+
     # def window(self, *, addr_width, data_width, granularity=None, features=frozenset(),
     #            alignment=0, addr=None, sparse=None):
     #     """Request a window to a subordinate bus.
@@ -42,31 +268,17 @@ class Peripheral:
     def elaborate(self, platform):
         m = Module()
 
-        if hasattr(self, "_events"):
-            print("events")
-            for key in self._events:
-                print(key, self._events[key])
-            print()
-
-        for name in dir(self):
-            class_ = self.__class__
-            if hasattr(class_, name):
-                v = getattr(self.__class__, name)
-                if isinstance(v, AutoRegister):
-                    print(name, v)
-                if isinstance(v, Event):
-                    print("event", name, v)
-
         if hasattr(self, "_csr"):
-            csr_mux = csr.Multiplexer(addr_width=8, data_width=8, alignment=0)
+            # The CSR bus is either byte wide, or as wide as the words of a word mode
+            # WishboneCSRBridge, in which case it is addressed by word.
+            data_width = self._bus.data_width
+            csr_mux = csr.Multiplexer(addr_width=8, data_width=data_width, alignment=0)
             csr_mux._bus = self._bus
 
-            print("csrs")
-            for key in self._csr:
-                addr, bit = key
-                csr_mux.add(self._csr[key], addr=addr, alignment=0, extend=False)
-                print(key, self._csr[key])
-            print()
+            for field in self._layout:
+                if field.name in self._csr:
+                    csr_mux.add(self._csr[field.name], addr=field.address // (data_width // 8),
+                                alignment=0, extend=False)
 
             m.submodules["csr_multiplexer"] = csr_mux
             # TODO: Only create this bridge if we were passed in a wishbone bus.
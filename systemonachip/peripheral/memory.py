@@ -12,6 +12,10 @@ __all__ = ["RandomAccessMemory"]
 class RandomAccessMemory(Elaboratable):
     """SRAM storage peripheral.
 
+    The bus either supports classic incrementing and wrapping bursts (``cti`` and ``bte``), or
+    pipelined mode (``stall``). In pipelined mode the memory never stalls, and acknowledges every
+    request on the next cycle, so a request can be issued on every cycle.
+
     Parameters
     ----------
     size : int
@@ -47,8 +51,9 @@ class RandomAccessMemory(Elaboratable):
                             name=self.name)
 
         if isinstance(memory_window, wishbone.Interface):
-            if not hasattr(memory_window, "bte"):
-                raise ValueError("Incoming wishbone.Interface must support burst")
+            if not hasattr(memory_window, "bte") and not hasattr(memory_window, "stall"):
+                raise ValueError("Incoming wishbone.Interface must support burst or "
+                                 "pipelined mode")
             self.bus = memory_window
             self.bus.memory_map.add_resource(self._mem, size=size)
 
@@ -67,6 +72,22 @@ class RandomAccessMemory(Elaboratable):
     def elaborate(self, platform):
         m = Module()
 
+        m.submodules.mem_rp = mem_rp = self._mem.read_port()
+        m.d.comb += self.bus.dat_r.eq(mem_rp.data)
+
+        if self.writable:
+            m.submodules.mem_wp = mem_wp = self._mem.write_port(granularity=self.granularity)
+            m.d.comb += mem_wp.addr.eq(self.bus.adr)
+            m.d.comb += mem_wp.data.eq(self.bus.dat_w)
+            with m.If(self.bus.cyc & self.bus.stb & self.bus.we):
+                m.d.comb += mem_wp.en.eq(self.bus.sel)
+
+        if hasattr(self.bus, "stall"):
+            m.d.comb += self.bus.stall.eq(0)
+            m.d.comb += mem_rp.addr.eq(self.bus.adr)
+            m.d.sync += self.bus.ack.eq(self.bus.cyc & self.bus.stb)
+            return m
+
         incr = Signal.like(self.bus.adr)
 
         with m.Switch(self.bus.bte):
@@ -82,24 +103,17 @@ class RandomAccessMemory(Elaboratable):
                 m.d.comb += incr[:4].eq(self.bus.adr[:4] + 1)
                 m.d.comb += incr[4:].eq(self.bus.adr[4:])
 
-        m.submodules.mem_rp = mem_rp = self._mem.read_port()
-        m.d.comb += self.bus.dat_r.eq(mem_rp.data)
-
         with m.If(self.bus.ack):
             m.d.sync += self.bus.ack.eq(0)
 
         with m.If(self.bus.cyc & self.bus.stb):
-            m.d.sync += self.bus.ack.eq(1)
+            # Keep acknowledging the beats of an incrementing burst, but drop the acknowledgement
+            # after a single transfer or the end of a burst, so the next cycle starts afresh.
+            with m.If(~self.bus.ack | (self.bus.cti == wishbone.CycleType.INCR_BURST)):
+                m.d.sync += self.bus.ack.eq(1)
             with m.If((self.bus.cti == wishbone.CycleType.INCR_BURST) & self.bus.ack):
                 m.d.comb += mem_rp.addr.eq(incr)
             with m.Else():
                 m.d.comb += mem_rp.addr.eq(self.bus.adr)
 
-        if self.writable:
-            m.submodules.mem_wp = mem_wp = self._mem.write_port(granularity=self.granularity)
-            m.d.comb += mem_wp.addr.eq(mem_rp.addr)
-            m.d.comb += mem_wp.data.eq(self.bus.dat_w)
-            with m.If(self.bus.cyc & self.bus.stb & self.bus.we):
-                m.d.comb += mem_wp.en.eq(self.bus.sel)
-
         return m
@@ -0,0 +1,121 @@
+from nmigen import *
+
+from nmigen_soc import csr, wishbone
+from nmigen_soc.wishbone import CycleType
+
+from . import Peripheral
+
+from ..register import *
+
+
+__all__ = ["BusMonitor"]
+
+
+class BusMonitor(Peripheral, Elaboratable):
+    """Bus performance counter peripheral.
+
+    Counts the activity of one Wishbone bus it taps without driving it. To count per initiator
+    or per target, use one monitor per bus: the initiator buses added to an
+    :class:`..bus.Arbiter`, the bins of a :class:`..bus.Decoder`, or the bus of a
+    :class:`..bus.bridge.WishboneCSRBridge`.
+
+    Counters only count while the monitor is enabled, and wrap around."""
+
+    creator_id = StaticHalfWord(0x0, 0x1248)
+    """Creator id for Scott Shawcroft: 0x1248"""
+
+    creation_id = StaticHalfWord(0x2, 0x0001)
+    """Creation id: 0x0001"""
+
+    cycles = VariableWidth(0x4, access="r")
+    """Clock cycles elapsed."""
+
+    transactions = VariableWidth(0x8, access="r")
+    """Transfers completed, by an acknowledgement, an error or a retry."""
+
+    busy_cycles = VariableWidth(0xc, access="r")
+    """Clock cycles with a bus cycle in progress (``cyc``)."""
+
+    wait_states = VariableWidth(0x10, access="r")
+    """Clock cycles with a transfer requested (``stb``) but not completed."""
+
+    burst_beats = VariableWidth(0x14, access="r")
+    """Transfers completed as part of a burst (``cti`` other than classic)."""
+
+    errors = VariableWidth(0x18, access="r")
+    """Transfers completed by an error (``err``)."""
+
+    enable = Bit(0x1c, 0x0, cache="write-through")
+    """Counter enable."""
+
+    clear = Bit(0x20, 0x0, access="w")
+    """Write 1 to reset every counter to 0."""
+
+    width = Config(0x24, "_width")
+    """Configured width of the counters. Read-only"""
+
+    def __init__(self, memory_window, *, tap=None, width=32, shadow=False):
+        """Parameters
+        ----------
+        tap : :class:`nmigen_soc.wishbone.Interface`
+            Bus to count the activity of. Only used when elaborating.
+        width : int
+            Counter width.
+        shadow : bool
+            Cache registers that only the host changes. See :class:`Peripheral`.
+        """
+        super().__init__(memory_window, shadow=shadow)
+
+        if isinstance(memory_window, Record):
+            if not isinstance(memory_window, csr.Interface):
+                raise ValueError("BusMonitor must connect to csr.Interface")
+            if not isinstance(tap, wishbone.Interface):
+                raise TypeError("Tapped bus must be an instance of wishbone.Interface, not {!r}"
+                                .format(tap))
+            if not isinstance(width, int) or width <= 0:
+                raise ValueError("Counter width must be a positive integer, not {!r}"
+                                 .format(width))
+            if width > 32:
+                raise ValueError("Counter width cannot be greater than 32 (was: {})"
+                                 .format(width))
+            self._width = width
+            self._tap   = tap
+
+    def elaborate(self, platform):
+        m = Module()
+
+        tap = self._tap
+        done = tap.ack
+        for name in ("err", "rty"):
+            if hasattr(tap, name):
+                done |= getattr(tap, name)
+        request = tap.cyc & tap.stb
+        if hasattr(tap, "stall"):
+            # In pipelined mode, a request is accepted when not stalled, and completed later.
+            waiting = request & tap.stall
+        else:
+            waiting = request & ~done
+        burst = done & (tap.cti != CycleType.CLASSIC) if hasattr(tap, "cti") else C(0)
+        error = done & tap.err if hasattr(tap, "err") else C(0)
+
+        counters = [
+            (self.cycles,       C(1)),
+            (self.transactions, done),
+            (self.busy_cycles,  tap.cyc),
+            (self.wait_states,  waiting),
+            (self.burst_beats,  burst),
+            (self.errors,       error),
+        ]
+        with m.If(self.clear.w_stb & self.clear.w_data):
+            for counter, _ in counters:
+                m.d.sync += counter.r_data.eq(0)
+        with m.Elif(self.enable.r_data):
+            for counter, increment in counters:
+                with m.If(increment):
+                    m.d.sync += counter.r_data.eq(counter.r_data + 1)
+
+        with m.If(self.enable.w_stb):
+            m.d.sync += self.enable.r_data.eq(self.enable.w_data)
+
+        m.submodules.peripheral = super().elaborate(platform)
+        return m
@@ -0,0 +1,114 @@
+"""Vectorized register snapshots of peripherals. Requires NumPy, which is installed with the
+``snapshot`` extra of this package."""
+
+import numpy
+
+from ..window import block
+
+
+__all__ = ["snapshot_dtype", "snapshot_all"]
+
+
+def _accesses(cls):
+    """Address and size in bytes of the accesses reading every register of `cls`: 32-bit words,
+    or 16-bit and 8-bit accesses at addresses that are not word aligned."""
+    accesses = []
+    for address in sorted({field.address for field in cls._layout}):
+        size = 4 if address % 4 == 0 else 2 if address % 2 == 0 else 1
+        accesses.append((address, size))
+    return accesses
+
+
+def _has_block(window):
+    if hasattr(window, "readinto"):
+        return True
+    try:
+        memoryview(window)
+    except TypeError:
+        return False
+    return True
+
+
+def _read_block(peripheral, accesses, words):
+    """Read the span of `accesses` in one block, and decode them with the byte order of the
+    memory window."""
+    start = accesses[0][0] & ~3
+    end   = max(address + size for address, size in accesses) + 3 & ~3
+    raw   = bytearray(end - start)
+    block.readinto(peripheral._memory_window, start, raw)
+    byteorder = peripheral._window_hook("byteorder") or "little"
+    for column, (address, size) in enumerate(accesses):
+        offset = address - start
+        words[column] = int.from_bytes(raw[offset:offset + size], byteorder)
+
+
+def _read_words(peripheral, accesses, words):
+    """Read every address of `accesses` through the register word protocol of the memory
+    window."""
+    window = peripheral._memory_window
+    for column, (address, _) in enumerate(accesses):
+        words[column] = window[address] & 0xffffffff
+
+
+def snapshot_dtype(cls):
+    """NumPy structured dtype of the snapshots of peripheral class `cls`.
+
+    There is one field per register descriptor, named after it: ``bool`` for single bits,
+    ``uint16`` for 16-bit registers and ``uint32`` otherwise."""
+    fields = []
+    for field in cls._layout:
+        if field.width == 1:
+            fields.append((field.name, numpy.bool_))
+        elif isinstance(field.width, int) and field.width <= 16:
+            fields.append((field.name, numpy.uint16))
+        else:
+            fields.append((field.name, numpy.uint32))
+    return numpy.dtype(fields)
+
+
+def snapshot_all(peripherals):
+    """Read every register of `peripherals` and decode them into a structured array.
+
+    All peripherals must be driver-mode instances of the same class. When the memory window of a
+    peripheral supports block transfers (see :mod:`..window.block`), the register span of the
+    peripheral, from its lowest to its highest register, is read in one block, and registers are
+    decoded with the byte order of the window, its ``byteorder`` attribute if it has one and
+    little endian otherwise. Other memory windows are read one register address at a time.
+    Fields are then decoded for the whole fleet at once. Variable width registers are masked to
+    the peripheral's width when it knows it.
+
+    Returns
+    -------
+    A :class:`numpy.ndarray` of :func:`snapshot_dtype` with one row per peripheral.
+    """
+    peripherals = list(peripherals)
+    if not peripherals:
+        raise ValueError("Cannot snapshot an empty list of peripherals")
+    cls = type(peripherals[0])
+    for peripheral in peripherals:
+        if type(peripheral) is not cls:
+            raise TypeError("Peripherals must all be instances of {}, not {!r}"
+                            .format(cls.__name__, peripheral))
+    if not cls._layout:
+        raise ValueError("Peripheral class {} has no registers".format(cls.__name__))
+
+    accesses = _accesses(cls)
+    columns  = {address: column for column, (address, _) in enumerate(accesses)}
+    words    = numpy.zeros((len(peripherals), len(accesses)), dtype=numpy.uint32)
+    for row, peripheral in zip(words, peripherals):
+        if _has_block(peripheral._memory_window):
+            _read_block(peripheral, accesses, row)
+        else:
+            _read_words(peripheral, accesses, row)
+
+    result = numpy.zeros(len(peripherals), dtype=snapshot_dtype(cls))
+    for field in cls._layout:
+        value = words[:, columns[field.address]] >> numpy.uint32(field.position)
+        if isinstance(field.width, int):
+            value &= numpy.uint32((1 << field.width) - 1 if field.width < 32 else 0xffffffff)
+        elif isinstance(field.width, str):
+            widths = [getattr(peripheral, field.width, 32) for peripheral in peripherals]
+            value &= numpy.array([(1 << w) - 1 if w < 32 else 0xffffffff for w in widths],
+                                 dtype=numpy.uint32)
+        result[field.name] = value
+    return result
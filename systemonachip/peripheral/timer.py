@@ -20,12 +20,12 @@ class Timer(Peripheral, Elaboratable):
     creation_id = StaticHalfWord(0x2, 0x0000)
     """Creation id: 0x0000"""
 
-    reload_ = VariableWidth(0x4)
+    reload_ = VariableWidth(0x4, cache="write-through")
     """Reload value of counter. When `ctr` reaches 0, it is automatically reloaded with this value.
        If the written value is larger than the timer width, only the bits within the timer's range
        will be kept."""
     
-    enable = Bit(0x8, 0x0)
+    enable = Bit(0x8, 0x0, cache="write-through")
     """Counter enable."""
     
     value = VariableWidth(0xc)
@@ -46,11 +46,13 @@ class Timer(Peripheral, Elaboratable):
     aggregate_event = AggregateEvent()
     """High signal when any individual event is active and enabled."""
 
-    def __init__(self, memory_window, *, width=None):
+    def __init__(self, memory_window, *, width=None, shadow=False):
         """Parameters
         ----------
         width : int
             Counter width.
+        shadow : bool
+            Cache registers that only the host changes. See :class:`Peripheral`.
 
         Attributes
         ----------
@@ -59,7 +61,7 @@ class Timer(Peripheral, Elaboratable):
         irq : :class:`IRQLine`
             Interrupt request.
         """
-        super().__init__(memory_window)
+        super().__init__(memory_window, shadow=shadow)
 
         if isinstance(memory_window, Record):
             if not isinstance(memory_window, csr.Interface):
@@ -104,78 +106,29 @@ class Timer(Peripheral, Elaboratable):
         return m
 
 if __name__ == "__main__":
-    from nmigen.back.pysim import Simulator
     from nmigen.back import verilog
+    from ..sim import CSRSimulatorBus, create_simulator
     bus = csr.Interface(addr_width=14,
                         data_width=8,
                         name="csr")
     t = Timer(bus, width=4)
 
-    class SimulatorBus:
-        def __init__(self, sim, bus):
-            self._sim = sim
-            self._bus = bus
-            self._read_address = None
-            self._read_data = None
-            self._write_address = None
-            self._write_data = None
-
-        def actions(self):
-            while True:
-                if self._read_address is not None:
-                    yield self._bus.addr.eq(self._read_address)
-                    yield self._bus.r_stb.eq(1)
-                    yield
-                    yield self._bus.r_stb.eq(0)
-                    yield
-                    self._read_data = yield self._bus.r_data
-                    self._read_address = None
-                elif self._write_address is not None and self._write_data is not None:
-                    yield bus.addr.eq(self._write_address)
-                    yield bus.w_data.eq(self._write_data)
-                    yield bus.w_stb.eq(1)
-                    yield
-                    yield bus.w_stb.eq(0)
-                    yield
-                    yield
-                    self._write_address = None
-                    self._write_data = None
-                else:
-                    yield
-
-        def __getitem__(self, index):
-            #print("get", index, sim, bus)
-            self._read_address = index
-            while self._read_data is None:
-                self._sim.advance()
-            data = self._read_data
-            self._read_data = None
-            return data
-
-        def __setitem__(self, index, value):
-            print("set", index, sim, bus)
-            self._write_address = index
-            self._write_data = value
-            while self._write_data is not None:
-                self._sim.advance()
-
-    sim = Simulator(t)
-    sbus = SimulatorBus(sim, bus)
+    sim = create_simulator(t)
     sim.add_clock(1e-6)
-    sim.add_sync_process(sbus.actions)
+    sbus = CSRSimulatorBus(sim, bus)
 
     timer0 = Timer(sbus)
     with sim.write_vcd("timer.vcd"):
-        print(timer0.width) # Should be 2
-        timer0.reload_ = 0xf
-        timer0.value = 0xe
+        print(timer0.width) # Should be 4
+        with timer0.transaction():
+            timer0.reload_ = 0xf
+            timer0.value = 0xe
         print(timer0.enable) # Should be False
         timer0.enable = True
-        for _ in range(50):
-            sim.advance()
+        sbus.idle(50)
         print(timer0.enable)
         print(timer0.value)
-        # wait 5 cycles
+        timer0.wait_for(Timer.zero, timeout=1.)
         print(timer0.zero)
         print(timer0.value)
 
@@ -3,3 +3,4 @@ from .readwrite import *
 from .config import *
 from .variable import *
 from .event import *
+from .transaction import *
@@ -1,12 +1,174 @@
+import time
+from collections import namedtuple
+
+
+CACHE_POLICIES = ("static", "write-through", "volatile")
+
+
+RegisterField = namedtuple("RegisterField", ["name", "register", "address", "position", "width",
+                                             "access"])
+RegisterField.__doc__ = """Layout of one register descriptor of a peripheral class.
+
+   `width` is either a number of bits, the name of the instance variable holding it, or ``None``
+   for one bit per event of the peripheral. `access` is ``"r"``, ``"w"`` or ``"rw"``."""
+
+
 class Register:
     """Core register used for configuration and status info. 32bit registers may take multiple bus
        cycles to read to save footprint.
 
-       By default, registers must be read during elaboration to exist."""
-    
+       By default, registers must be read during elaboration to exist.
+
+       In driver mode, a peripheral with a shadow cache remembers the value of every register whose
+       `cache` policy allows it:
+
+       * ``"static"`` registers never change, so they are read once.
+       * ``"write-through"`` registers are only changed by the host, so writes update the cache
+         with the bits the hardware keeps, when the register's width is known.
+       * ``"volatile"`` registers are read on every access.
+
+       Values are cached per register, and writing a register drops the cached values of the other
+       registers at its address."""
+
+    _address  = None
+    _position = 0
+    _width    = 32
+    _access   = "rw"
+    _cache    = "volatile"
+    _partial  = False
+
     def __set_name__(self, owner, name):
         self._name = name
 
+    def _field(self):
+        return RegisterField(self._name, self, self._address, self._position, self._width,
+                             self._access)
+
+    def _set_cache(self, cache):
+        if cache not in CACHE_POLICIES:
+            raise ValueError("Invalid cache policy {!r}; must be one of {}"
+                             .format(cache, ", ".join(CACHE_POLICIES)))
+        self._cache = cache
+
+    def _decode(self, word):
+        """Value of this register within the `word` read at its address."""
+        return word
+
+    def _encode(self, word, value):
+        """Replace this register's bits of `word` with `value`. `word` is only read when
+           `_partial` is true; otherwise it may be ``None``."""
+        return value
+
+    def _width_source(self, obj):
+        """Width of this register of `obj` in bits, or the register to read it from.
+
+           A driver-mode peripheral may not know the value of a width variable, but have a register
+           exposing it. Returns ``(width, None)``, ``(None, register)``, or ``(None, None)`` if the
+           width is not known."""
+        width = self._width
+        if isinstance(width, str):
+            variable = width
+            width = getattr(obj, variable, None)
+            if width is None:
+                for field in obj._layout:
+                    if getattr(field.register, "_variable", None) == variable:
+                        return None, field.register
+        return (width if isinstance(width, int) else None), None
+
+    def _bit_width(self, obj):
+        width, register = self._width_source(obj)
+        if register is not None:
+            width = register._decode(register._read(obj))
+        return width
+
+    async def _abit_width(self, obj):
+        width, register = self._width_source(obj)
+        if register is not None:
+            width = register._decode(await register._aread(obj))
+        return width
+
+    def _cached(self, obj):
+        shadow = obj._shadow
+        return shadow is not None and self._cache != "volatile" and self._name in shadow
+
+    def _fill(self, obj, value):
+        if obj._shadow is not None and self._cache != "volatile":
+            obj._shadow[self._name] = value
+
+    def _masks_writes(self, obj):
+        return obj._shadow is not None and self._cache == "write-through" and not self._partial
+
+    def _written(self, obj, value, width=None):
+        """Update the shadow cache of `obj` after `value` was written. A write-through register
+           caches the bits within its `width`, which are the only ones the hardware keeps, and
+           is not cached if its width is not known. Registers sharing their word cache all of it,
+           since it is the base of their next read-modify-write."""
+        shadow = obj._shadow
+        if shadow is None:
+            return
+        # Writes may change the bits of the other registers at the same address.
+        for field in obj._layout:
+            if field.address == self._address:
+                shadow.pop(field.name, None)
+        if self._cache != "write-through":
+            return
+        if self._partial:
+            shadow[self._name] = value
+        elif width is not None:
+            shadow[self._name] = value & ((1 << width) - 1) << self._position
+
+    def _read(self, obj):
+        """Read the register of `obj` in driver mode, from its shadow cache when possible."""
+        tracer = obj._tracer
+        if self._cached(obj):
+            if tracer is not None:
+                tracer.register_access(self._name, "hit")
+            return obj._shadow[self._name]
+        if tracer is not None:
+            start = time.perf_counter()
+        value = obj._memory_window[self._address]
+        if tracer is not None:
+            tracer.register_access(self._name, "read", time.perf_counter() - start)
+        self._fill(obj, value)
+        return value
+
+    def _write(self, obj, value):
+        """Write the register of `obj` in driver mode and keep its shadow cache coherent."""
+        tracer = obj._tracer
+        if tracer is not None:
+            start = time.perf_counter()
+        obj._memory_window[self._address] = value
+        if tracer is not None:
+            tracer.register_access(self._name, "write", time.perf_counter() - start)
+        width = self._bit_width(obj) if self._masks_writes(obj) else None
+        self._written(obj, value, width)
+
+    async def _aread(self, obj):
+        """Like :meth:`_read`, through the awaitable ``read`` of an asynchronous memory window."""
+        tracer = obj._tracer
+        if self._cached(obj):
+            if tracer is not None:
+                tracer.register_access(self._name, "hit")
+            return obj._shadow[self._name]
+        if tracer is not None:
+            start = time.perf_counter()
+        value = await obj._memory_window.read(self._address)
+        if tracer is not None:
+            tracer.register_access(self._name, "read", time.perf_counter() - start)
+        self._fill(obj, value)
+        return value
+
+    async def _awrite(self, obj, value):
+        """Like :meth:`_write`, through the awaitable ``write`` of an asynchronous memory window."""
+        tracer = obj._tracer
+        if tracer is not None:
+            start = time.perf_counter()
+        await obj._memory_window.write(self._address, value)
+        if tracer is not None:
+            tracer.register_access(self._name, "write", time.perf_counter() - start)
+        width = await self._abit_width(obj) if self._masks_writes(obj) else None
+        self._written(obj, value, width)
+
 
 class AutoRegister(Register):
     """Register that will be auto-created and doesn't need to be read during elaboration."""
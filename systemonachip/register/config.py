@@ -1,5 +1,22 @@
 """Static variable dependent on instance state."""
 
-class Config:
-	def __init__(self, address, variable):
-		pass
+from nmigen import Record
+
+from .base import Register
+
+class Config(Register):
+    _access = "r"
+
+    def __init__(self, address, variable, *, cache="static"):
+        """Read-only register holding the value of instance `variable` at elaboration time."""
+        self._address = address
+        self._variable = variable
+        self._set_cache(cache)
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+
+        if isinstance(obj._memory_window, Record):
+            return getattr(obj, self._variable)
+        return self._read(obj)
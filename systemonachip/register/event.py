@@ -1,11 +1,29 @@
 """Event related registers"""
 
+from nmigen import Record
+
 from .base import AutoRegister
 
-class AggregateEventEnable(AutoRegister):
-	def __init__(self, address):
-		pass
+class _AggregateEventRegister(AutoRegister):
+	_width = None
 
-class AggregateEventStatus(AutoRegister):
 	def __init__(self, address):
-		pass
+		self._address = address
+
+	def __get__(self, obj, type=None):
+		if obj is None or isinstance(obj._memory_window, Record):
+			return self
+		return self._read(obj)
+
+	def __set__(self, obj, value):
+		if isinstance(obj._memory_window, Record):
+			raise RuntimeError("Cannot set value when elaborating")
+		self._write(obj, value)
+
+class AggregateEventEnable(_AggregateEventRegister):
+	"""One enable bit per event of the peripheral."""
+	pass
+
+class AggregateEventStatus(_AggregateEventRegister):
+	"""One pending bit per event of the peripheral."""
+	pass
@@ -2,35 +2,61 @@ from nmigen import Record
 from nmigen_soc import csr
 
 from .base import Register
+from .transaction import Transaction
 
 class Word(Register):
     def __init__(self, address, *, reset=0x00000000):
         pass
 
 class Bit(Register):
-    def __init__(self, address, position, *, reset=False):
+    _width   = 1
+    _partial = True
+
+    def __init__(self, address, position, *, reset=False, access="rw", cache="volatile"):
+        """Single bit at `position` within the register at `address`. `access` is ``"r"``,
+           ``"w"`` or ``"rw"``."""
+        if access not in ("r", "w", "rw"):
+            raise ValueError("Access mode must be one of \"r\", \"w\", or \"rw\", not {!r}"
+                             .format(access))
         self._address = address
         self._position = position
+        self._access = access
+        self._set_cache(cache)
 
     def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+
         if not isinstance(obj._memory_window, Record):
-            return (obj._memory_window[self._address + self._position // 8] & (1 << (self._position % 8))) != 0
+            return self._decode(self._read(obj))
 
-        key = (self._address, self._position)
         if not hasattr(obj, "_csr"):
             obj._csr = {}
-        elif key in obj._csr:
-            return obj._csr[key]
+        elif self._name in obj._csr:
+            return obj._csr[self._name]
 
-        print("create bit", self._name)
-        elem = csr.Element(1, "rw", name=self._name)
-        obj._csr[key] = elem
+        elem = csr.Element(1, self._access, name=self._name)
+        obj._csr[self._name] = elem
         return elem
 
 
-    def __set__(self, obj, type=None):
-        if not isinstance(obj._memory_window, Record):
-            obj._memory_window[self._address + self._position // 8] |= (1 << (self._position % 8))
+    def __set__(self, obj, value):
+        window = obj._memory_window
+        if isinstance(window, Record):
+            raise RuntimeError("Cannot set value when elaborating")
+
+        mask = 1 << self._position
+        if isinstance(window, Transaction) and not self._cached(obj):
+            window.update(self._address, mask, mask if value else 0)
+            if obj._tracer is not None:
+                obj._tracer.register_access(self._name, "write")
             return
 
-        raise RuntimeError("Cannot set value when elaborating")
+        self._write(obj, self._encode(self._read(obj), value))
+
+    def _decode(self, word):
+        return (word & (1 << self._position)) != 0
+
+    def _encode(self, word, value):
+        mask = 1 << self._position
+        return word | mask if value else word & ~mask
@@ -1,4 +1,24 @@
+from nmigen import Record
 
-class StaticHalfWord:
-	def __init__(self, address, value):
-		pass
+from .base import Register
+
+class StaticHalfWord(Register):
+    _width  = 16
+    _access = "r"
+
+    def __init__(self, address, value, *, cache="static"):
+        """Constant 16-bit value at `address`."""
+        self._address = address
+        self._value = value
+        self._set_cache(cache)
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+
+        if isinstance(obj._memory_window, Record):
+            return self._value
+        return self._decode(self._read(obj))
+
+    def _decode(self, word):
+        return word & 0xffff
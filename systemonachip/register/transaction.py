@@ -0,0 +1,57 @@
+"""Coalesced driver-mode register writes"""
+
+__all__ = ["Transaction"]
+
+
+class Transaction:
+    """Memory window that gathers register writes and sends them when committed.
+
+       Writes to the same address are merged so that every touched address is written exactly once.
+       An address whose bits were only partially set is read once before being written back."""
+
+    def __init__(self, memory_window):
+        self._memory_window = memory_window
+        # Address -> [mask, value]. A mask of -1 means the whole register is known.
+        self._pending = {}
+
+    def __getitem__(self, address):
+        if address not in self._pending:
+            return self._memory_window[address]
+        mask, value = self._pending[address]
+        if mask == -1:
+            return value
+        return (self._memory_window[address] & ~mask) | value
+
+    def __setitem__(self, address, value):
+        self._pending[address] = [-1, value]
+
+    def update(self, address, mask, value):
+        """Set the bits selected by ``mask`` at ``address`` to the matching bits of ``value``."""
+        pending = self._pending.setdefault(address, [0, 0])
+        pending[0] |= mask
+        pending[1] = (pending[1] & ~mask) | (value & mask)
+
+    def commit(self):
+        """Write every pending address to the underlying window, in the order first touched.
+
+        Windows that provide ``read_many(addresses)`` and ``write_many(writes)`` receive all the
+        reads, then all the writes, in one call each."""
+        window = self._memory_window
+        partial = [address for address, (mask, _) in self._pending.items() if mask != -1]
+        if partial and hasattr(window, "read_many"):
+            current = dict(zip(partial, window.read_many(partial)))
+        else:
+            current = {address: window[address] for address in partial}
+
+        writes = []
+        for address, (mask, value) in self._pending.items():
+            if mask != -1:
+                value |= current[address] & ~mask
+            writes.append((address, value))
+        self._pending.clear()
+
+        if hasattr(window, "write_many"):
+            window.write_many(writes)
+        else:
+            for address, value in writes:
+                window[address] = value
@@ -3,35 +3,39 @@ from nmigen_soc import csr
 
 from nmigen import Record
 
-class VariableWidth:
-    def __init__(self, address, *, variable="_width"):
+from .base import Register
+
+class VariableWidth(Register):
+    def __init__(self, address, *, variable="_width", access="rw", cache="volatile"):
         """Variable width register that depends on instance state in the given `variable`. `variable`
-           must start with `_` so it doesn't conflict with the register."""
+           must start with `_` so it doesn't conflict with the register. `access` is ``"r"``,
+           ``"w"`` or ``"rw"``."""
+        if access not in ("r", "w", "rw"):
+            raise ValueError("Access mode must be one of \"r\", \"w\", or \"rw\", not {!r}"
+                             .format(access))
         self._address = address
-        self._width_variable = variable
-
-    def __set_name__(self, owner, name):
-        self._name = name
+        self._width = variable
+        self._access = access
+        self._set_cache(cache)
 
     def __get__(self, obj, type=None):
         if obj == None:
             return self
 
         if isinstance(obj._memory_window, Record):
-            key = (self._address, None)
             if not hasattr(obj, "_csr"):
                 obj._csr = {}
-            elif key in obj._csr:
-                return obj._csr[key]
+            elif self._name in obj._csr:
+                return obj._csr[self._name]
 
-            elem = csr.Element(getattr(obj, self._width_variable), "rw", name=self._name)
-            obj._csr[key] = elem
+            elem = csr.Element(getattr(obj, self._width), self._access, name=self._name)
+            obj._csr[self._name] = elem
             return elem
-        return obj._memory_window[self._address]
+        return self._read(obj)
 
     def __set__(self, obj, value):
         if not isinstance(obj._memory_window, Record):
-            obj._memory_window[self._address] = value
+            self._write(obj, value)
             return
 
-        raise RuntimeError("Cannot set value when elaborating")
\ No newline at end of file
+        raise RuntimeError("Cannot set value when elaborating")
@@ -0,0 +1,5 @@
+from .backend import *
+from .bus import *
+from .burst import *
+from .checkpoint import *
+from .waveform import *
@@ -0,0 +1,6 @@
+def walk(fragment, path="top"):
+    """Iterate over ``(path, fragment)`` for `fragment` and all its subfragments, where `path` is
+    the dot-separated hierarchical name of the fragment."""
+    yield path, fragment
+    for index, (subfragment, name) in enumerate(fragment.subfragments):
+        yield from walk(subfragment, "{}.{}".format(path, name or "U${}".format(index)))
@@ -0,0 +1,127 @@
+"""Choice of simulator backend.
+
+nMigen's Python simulator, pysim, runs everywhere but is slow for long simulations. Its compiled
+simulator, cxxsim, translates the design to C++ with Yosys' CXXRTL and compiles it, which takes
+time up front but then runs an order of magnitude faster. Both have the same interface, so the
+simulator buses and test helpers of this library run unchanged on either.
+
+:func:`create_simulator` uses pysim unless another backend is requested, either by its `backend`
+argument or by the ``SYSTEMONACHIP_SIMULATOR`` environment variable:
+
+``"pysim"``
+    Python simulator.
+``"cxxsim"``
+    Compiled simulator. Requires a version of nMigen that provides it and a C++ compiler, which is
+    ``$CXX`` or else ``c++``.
+``"auto"``
+    Compiled simulator if it is available, Python simulator otherwise.
+
+Simulators made by :func:`create_simulator` count the clock cycles they simulate, which
+:func:`simulated_cycles` reports."""
+
+import functools
+import os
+import shutil
+
+
+__all__ = ["simulator_backend", "create_simulator", "simulated_cycles"]
+
+
+_BACKENDS = ("auto", "pysim", "cxxsim")
+
+
+def _pysim():
+    try:
+        from nmigen.sim.pysim import Simulator
+    except ImportError:
+        from nmigen.back.pysim import Simulator
+    return Simulator
+
+
+def _passive():
+    try:
+        from nmigen.sim import Passive
+    except ImportError:
+        from nmigen.back.pysim import Passive
+    return Passive
+
+
+def _cxxsim():
+    try:
+        from nmigen.sim.cxxsim import Simulator
+    except ImportError:
+        return None
+    if shutil.which(os.environ.get("CXX") or "c++") is None:
+        return None
+    return Simulator
+
+
+def simulator_backend(backend=None):
+    """Name of the backend :func:`create_simulator` uses for `backend`, ``"pysim"`` or
+    ``"cxxsim"``.
+
+    Raises
+    ------
+    :exc:`ValueError`
+        If the backend is unknown.
+    :exc:`RuntimeError`
+        If the compiled simulator is requested but not available.
+    """
+    if backend is None:
+        backend = os.environ.get("SYSTEMONACHIP_SIMULATOR") or "pysim"
+    if backend not in _BACKENDS:
+        raise ValueError("Simulator backend must be one of {}, not {!r}"
+                         .format(", ".join(_BACKENDS), backend))
+    if backend == "auto":
+        return "cxxsim" if _cxxsim() is not None else "pysim"
+    if backend == "cxxsim" and _cxxsim() is None:
+        raise RuntimeError("Simulator backend 'cxxsim' requires a version of nMigen providing "
+                           "nmigen.sim.cxxsim and a C++ compiler")
+    return backend
+
+
+_cycles = 0
+
+
+def simulated_cycles():
+    """Number of clock cycles simulated so far in this process by the simulators of
+    :func:`create_simulator`, summed over all their clock domains."""
+    return _cycles
+
+
+def _count_cycles():
+    global _cycles
+    yield _passive()()
+    while True:
+        yield
+        _cycles += 1
+
+
+@functools.lru_cache(maxsize=None)
+def _counting(simulator):
+    class CountingSimulator(simulator):
+        def add_clock(self, period, *, domain="sync", if_exists=False, **kwargs):
+            super().add_clock(period, domain=domain, if_exists=if_exists, **kwargs)
+            # A missing domain is only skipped silently, so its cycles cannot be counted.
+            if not if_exists:
+                self.add_sync_process(_count_cycles, domain=domain)
+    return CountingSimulator
+
+
+def create_simulator(fragment, *, backend=None):
+    """Simulator of `fragment`, using the backend chosen by :func:`simulator_backend`.
+
+    Every clock added with ``add_clock`` also counts the cycles of its domain into
+    :func:`simulated_cycles`, unless it is added with ``if_exists=True``.
+
+    Parameters
+    ----------
+    fragment : Elaboratable or Fragment
+        Design to simulate.
+    backend : ``"auto"``, ``"pysim"``, ``"cxxsim"`` or None
+        Simulator backend. If ``None``, the ``SYSTEMONACHIP_SIMULATOR`` environment variable
+        chooses it, and pysim is used if it is unset.
+    """
+    if simulator_backend(backend) == "cxxsim":
+        return _counting(_cxxsim())(fragment)
+    return _counting(_pysim())(fragment)
@@ -0,0 +1,133 @@
+"""Wishbone burst transfers for simulator processes.
+
+These are generator functions for ``yield from`` within a synchronous simulator process, like the
+single transfers of a test bench. They drive registered feedback burst cycles (``cti`` and
+``bte``), and count clock cycles so that the throughput of a memory peripheral can be measured."""
+
+from nmigen_soc.wishbone import CycleType, BurstTypeExt
+
+
+__all__ = ["BurstResult", "wb_burst_read", "wb_burst_write"]
+
+
+_BURST_TYPES = {
+    0:  BurstTypeExt.LINEAR,
+    4:  BurstTypeExt.WRAP_4,
+    8:  BurstTypeExt.WRAP_8,
+    16: BurstTypeExt.WRAP_16,
+}
+
+
+class BurstResult:
+    """Outcome of a Wishbone burst.
+
+    Attributes
+    ----------
+    data : list(int)
+        Data read by each beat, in order. Empty for a write burst.
+    beats : int
+        Number of beats transferred.
+    cycles : int
+        Number of clock cycles from the start of the bus cycle to its last acknowledgement.
+    """
+    def __init__(self, data, beats, cycles):
+        self.data   = data
+        self.beats  = beats
+        self.cycles = cycles
+
+    @property
+    def cycles_per_beat(self):
+        return self.cycles / self.beats
+
+    def __repr__(self):
+        return "BurstResult(beats={}, cycles={})".format(self.beats, self.cycles)
+
+
+def _next_address(addr, wrap):
+    if wrap == 0:
+        return addr + 1
+    return (addr & ~(wrap - 1)) | ((addr + 1) & (wrap - 1))
+
+
+def _burst(bus, addr, count, data, *, wrap, sel, timeout):
+    if wrap not in _BURST_TYPES:
+        raise ValueError("Burst wrap must be one of 0, 4, 8, 16, not {!r}".format(wrap))
+    if not isinstance(count, int) or count <= 0:
+        raise ValueError("Beat count must be a positive integer, not {!r}".format(count))
+    if sel is None:
+        sel = (1 << len(bus.sel)) - 1
+    write = data is not None
+
+    yield bus.cyc.eq(1)
+    yield bus.stb.eq(1)
+    yield bus.we.eq(write)
+    yield bus.sel.eq(sel)
+    yield bus.adr.eq(addr)
+    yield bus.bte.eq(_BURST_TYPES[wrap])
+    yield bus.cti.eq(CycleType.END_OF_BURST if count == 1 else CycleType.INCR_BURST)
+    if write:
+        yield bus.dat_w.eq(data[0])
+
+    read_data = []
+    cycles    = 0
+    waited    = 0
+    beat      = 0
+    while beat < count:
+        yield
+        cycles += 1
+        if not (yield bus.ack):
+            if waited >= timeout:
+                raise RuntimeError("Wishbone transaction timed out")
+            waited += 1
+            continue
+
+        waited = 0
+        if not write:
+            read_data.append((yield bus.dat_r))
+        beat += 1
+        if beat < count:
+            addr = _next_address(addr, wrap)
+            yield bus.adr.eq(addr)
+            yield bus.cti.eq(CycleType.END_OF_BURST if beat == count - 1
+                             else CycleType.INCR_BURST)
+            if write:
+                yield bus.dat_w.eq(data[beat])
+
+    yield bus.cyc.eq(0)
+    yield bus.stb.eq(0)
+    yield bus.we.eq(0)
+    yield bus.cti.eq(CycleType.CLASSIC)
+    return BurstResult(read_data, count, cycles)
+
+
+def wb_burst_read(bus, addr, count, *, wrap=0, sel=None, timeout=32):
+    """Read `count` beats with an incrementing burst starting at word address `addr`.
+
+    Parameters
+    ----------
+    bus : :class:`nmigen_soc.wishbone.Interface`
+        Bus to drive. It must have the ``cti`` and ``bte`` signals.
+    wrap : 0, 4, 8 or 16
+        Burst length after which the address wraps around, or 0 for a linear burst.
+    sel : int or None
+        Byte select of every beat. By default, every granule is selected.
+    timeout : int
+        Number of cycles to wait for each acknowledgement before raising :exc:`RuntimeError`.
+
+    Returns
+    -------
+    A :class:`BurstResult` holding the data read.
+    """
+    return (yield from _burst(bus, addr, count, None, wrap=wrap, sel=sel, timeout=timeout))
+
+
+def wb_burst_write(bus, addr, data, *, wrap=0, sel=None, timeout=32):
+    """Write the values of `data`, one per beat, with an incrementing burst starting at word
+    address `addr`. See :func:`wb_burst_read` for the parameters.
+
+    Returns
+    -------
+    A :class:`BurstResult`.
+    """
+    data = list(data)
+    return (yield from _burst(bus, addr, len(data), data, wrap=wrap, sel=sel, timeout=timeout))
@@ -0,0 +1,335 @@
+"""Memory windows that drive a bus of a simulated design.
+
+A peripheral driven through one of these windows runs its driver code against the RTL. Accesses
+are queued and then issued back to back by a process of the simulator, which is only advanced
+when results are needed. Queueing many accesses before resolving them, with :meth:`read_many`,
+:meth:`write_many` or a :meth:`..peripheral.Peripheral.transaction`, avoids returning to the
+driver after each one.
+
+Like every memory window, indexing reads or writes the 32-bit register word at a byte address.
+Each word is split into as many bus cycles as the bus data width requires."""
+
+from collections import deque
+
+from nmigen_soc import csr, wishbone
+
+
+__all__ = ["QueuedRead", "CSRSimulatorBus", "WishboneSimulatorBus"]
+
+
+class QueuedRead:
+    """Read queued on a simulator bus.
+
+    Attributes
+    ----------
+    done : bool
+        The read has completed.
+    value : int
+        Value of the word read. Only available once the read is done; see
+        :meth:`CSRSimulatorBus.flush`.
+    """
+    def __init__(self, beats):
+        self._beats = beats
+        self._value = 0
+
+    @property
+    def done(self):
+        return self._beats == 0
+
+    @property
+    def value(self):
+        if not self.done:
+            raise RuntimeError("Read has not completed yet; flush the bus first")
+        return self._value & 0xffffffff
+
+    def _resolve(self, data, shift):
+        self._value |= data << shift if shift >= 0 else data >> -shift
+        self._beats -= 1
+
+
+class _SimulatorBus:
+    # Queue entries are ``(kind, bus_address, sel, operand, read)`` tuples. The operand is the
+    # data of a write, the shift of a read beat (see `_beats`), or the number of cycles of an idle
+    # period.
+    def __init__(self, sim, bus, *, data_width, granularity, domain):
+        self._sim        = sim
+        self._bus        = bus
+        self._data_width = data_width
+        self._granule    = granularity // 8
+        self._queue      = deque()
+        self._in_flight  = 0
+
+        self.cycles = 0
+
+        sim.add_sync_process(self._process, domain=domain)
+
+    def _beats(self, address):
+        """Split the word at byte `address` into ``(bus_address, sel, shift)`` beats. `shift` is
+        the bit position of the beat within the word, and `sel` selects the granules within the
+        word."""
+        size = self._data_width // 8
+        for index in range(address // size, (address + 3) // size + 1):
+            shift = (index * size - address) * 8
+            start = max(address, index * size) - index * size
+            end   = min(address + 4, (index + 1) * size) - index * size
+            sel   = 0
+            for granule in range(start // self._granule, (end - 1) // self._granule + 1):
+                sel |= 1 << granule
+            yield index, sel, shift
+
+    def queue_read(self, address):
+        """Queue a read of the word at byte `address`, and return its :class:`QueuedRead`."""
+        beats = list(self._beats(address))
+        read  = QueuedRead(len(beats))
+        for bus_address, sel, shift in beats:
+            self._queue.append(("read", bus_address, sel, shift, read))
+        return read
+
+    def queue_write(self, address, value):
+        """Queue a write of `value` to the word at byte `address`."""
+        mask = (1 << self._data_width) - 1
+        for bus_address, sel, shift in self._beats(address):
+            data = value >> shift if shift >= 0 else value << -shift
+            self._queue.append(("write", bus_address, sel, data & mask, None))
+
+    def flush(self):
+        """Advance the simulation until every queued access has completed."""
+        while self._queue or self._in_flight:
+            self._sim.advance()
+
+    def read_many(self, addresses):
+        """Read the words at `addresses` back to back, and return their values in the same order.
+        """
+        reads = [self.queue_read(address) for address in addresses]
+        self.flush()
+        return [read.value for read in reads]
+
+    def write_many(self, writes):
+        """Write a list of ``(address, value)`` pairs back to back, in order."""
+        for address, value in writes:
+            self.queue_write(address, value)
+        self.flush()
+
+    def idle(self, cycles):
+        """Let the simulation run for `cycles` clock cycles without accessing the bus.
+
+        Used by :meth:`..peripheral.Peripheral.wait_until` to wait in large strides."""
+        self._queue.append(("idle", None, None, cycles, None))
+        self.flush()
+
+    def __getitem__(self, address):
+        return self.read_many([address])[0]
+
+    def __setitem__(self, address, value):
+        self.write_many([(address, value)])
+
+
+class CSRSimulatorBus(_SimulatorBus):
+    """Memory window driving a CSR bus in simulation.
+
+    A CSR read returns its data on the cycle after its strobe, so reads are pipelined: a bus cycle
+    is issued on every clock cycle, and a word of a 8-bit bus takes 4 cycles to access. A read
+    that follows a write waits for the write to reach the CSR element first.
+
+    Parameters
+    ----------
+    sim : Simulator
+        Simulator of the design, of any backend; see :func:`create_simulator`. The bus process
+        is added to it.
+    bus : :class:`nmigen_soc.csr.Interface`
+        CSR bus to drive.
+    domain : str
+        Clock domain of the bus.
+
+    Attributes
+    ----------
+    cycles : int
+        Number of clock cycles elapsed so far.
+    """
+    # Clock cycles between a write strobe and the CSR element holding the written value.
+    _WRITE_LATENCY = 2
+
+    def __init__(self, sim, bus, *, domain="sync"):
+        if not isinstance(bus, csr.Interface):
+            raise TypeError("Bus must be an instance of csr.Interface, not {!r}".format(bus))
+        super().__init__(sim, bus, data_width=bus.data_width, granularity=bus.data_width,
+                         domain=domain)
+
+    def queue_write(self, address, value):
+        if address % (self._data_width // 8):
+            raise ValueError("Address {:#x} is not aligned to the {}-bit CSR bus"
+                             .format(address, self._data_width))
+        super().queue_write(address, value)
+
+    def _process(self):
+        bus     = self._bus
+        pending = None
+        settle  = 0
+        while True:
+            access = None
+            if self._queue and (self._queue[0][0] != "read" or settle == 0):
+                access = self._queue.popleft()
+                self._in_flight += 1
+
+            if access is None or access[0] == "idle":
+                yield bus.r_stb.eq(0)
+                yield bus.w_stb.eq(0)
+            else:
+                kind, bus_address, _, operand, _ = access
+                yield bus.addr.eq(bus_address)
+                yield bus.r_stb.eq(kind == "read")
+                yield bus.w_stb.eq(kind == "write")
+                if kind == "write":
+                    yield bus.w_data.eq(operand)
+            yield
+            self.cycles += 1
+            settle = max(settle - 1, 0)
+
+            if pending is not None:
+                _, _, _, shift, read = pending
+                read._resolve((yield bus.r_data), shift)
+                self._in_flight -= 1
+                pending = None
+            if access is not None:
+                kind, _, _, operand, _ = access
+                if kind == "read":
+                    pending = access
+                    continue
+                self._in_flight -= 1
+                if kind == "write":
+                    settle = self._WRITE_LATENCY
+                elif operand > 1:
+                    self._queue.appendleft(("idle", None, None, operand - 1, None))
+
+
+class WishboneSimulatorBus(_SimulatorBus):
+    """Memory window driving a Wishbone bus in simulation.
+
+    Bus cycles are classic single transfers. Consecutive accesses keep ``cyc`` asserted and start
+    on the cycle after the previous one was acknowledged.
+
+    If the bus has a ``stall`` signal, it is driven in pipelined mode instead: a request is issued
+    on every cycle, and held while the bus stalls, without waiting for the acknowledgements of
+    the previous requests, which complete them in order.
+
+    Parameters
+    ----------
+    sim : Simulator
+        Simulator of the design, of any backend; see :func:`create_simulator`. The bus process
+        is added to it.
+    bus : :class:`nmigen_soc.wishbone.Interface`
+        Wishbone bus to drive.
+    domain : str
+        Clock domain of the bus.
+    timeout : int
+        Number of cycles to wait for an acknowledgement before raising :exc:`RuntimeError`.
+
+    Attributes
+    ----------
+    cycles : int
+        Number of clock cycles elapsed so far.
+    """
+    def __init__(self, sim, bus, *, domain="sync", timeout=32):
+        if not isinstance(bus, wishbone.Interface):
+            raise TypeError("Bus must be an instance of wishbone.Interface, not {!r}".format(bus))
+        super().__init__(sim, bus, data_width=bus.data_width, granularity=bus.granularity,
+                         domain=domain)
+        self._timeout = timeout
+
+    def _process(self):
+        if hasattr(self._bus, "stall"):
+            yield from self._pipelined_process()
+            return
+        bus = self._bus
+        while True:
+            if not self._queue or self._queue[0][0] == "idle":
+                cycles = 0
+                if self._queue:
+                    cycles = self._queue.popleft()[3]
+                    self._in_flight += 1
+                yield bus.cyc.eq(0)
+                yield bus.stb.eq(0)
+                yield bus.we.eq(0)
+                yield
+                self.cycles += 1
+                if cycles:
+                    self._in_flight -= 1
+                    if cycles > 1:
+                        self._queue.appendleft(("idle", None, None, cycles - 1, None))
+                continue
+
+            kind, bus_address, sel, operand, read = self._queue.popleft()
+            self._in_flight += 1
+            yield bus.cyc.eq(1)
+            yield bus.stb.eq(1)
+            yield bus.adr.eq(bus_address)
+            yield bus.sel.eq(sel)
+            yield bus.we.eq(kind == "write")
+            if kind == "write":
+                yield bus.dat_w.eq(operand)
+
+            waited = 0
+            while True:
+                yield
+                self.cycles += 1
+                if (yield bus.ack):
+                    break
+                if waited >= self._timeout:
+                    raise RuntimeError("Wishbone transaction timed out")
+                waited += 1
+
+            if kind == "read":
+                read._resolve((yield bus.dat_r), operand)
+            self._in_flight -= 1
+
+    def _pipelined_process(self):
+        bus     = self._bus
+        request = None
+        pending = deque()
+        waited  = 0
+        while True:
+            if request is None and not pending and (not self._queue or
+                                                    self._queue[0][0] == "idle"):
+                cycles = 0
+                if self._queue:
+                    cycles = self._queue.popleft()[3]
+                    self._in_flight += 1
+                yield bus.cyc.eq(0)
+                yield bus.stb.eq(0)
+                yield bus.we.eq(0)
+                yield
+                self.cycles += 1
+                if cycles:
+                    self._in_flight -= 1
+                    if cycles > 1:
+                        self._queue.appendleft(("idle", None, None, cycles - 1, None))
+                continue
+
+            if request is None and self._queue and self._queue[0][0] != "idle":
+                request = self._queue.popleft()
+                self._in_flight += 1
+                kind, bus_address, sel, operand, _ = request
+                yield bus.adr.eq(bus_address)
+                yield bus.sel.eq(sel)
+                yield bus.we.eq(kind == "write")
+                if kind == "write":
+                    yield bus.dat_w.eq(operand)
+            yield bus.cyc.eq(1)
+            yield bus.stb.eq(request is not None)
+            yield
+            self.cycles += 1
+
+            # A request may be acknowledged on the cycle it is accepted.
+            if request is not None and not (yield bus.stall):
+                pending.append(request)
+                request = None
+            if (yield bus.ack):
+                kind, _, _, operand, read = pending.popleft()
+                if kind == "read":
+                    read._resolve((yield bus.dat_r), operand)
+                self._in_flight -= 1
+                waited = 0
+            elif waited >= self._timeout:
+                raise RuntimeError("Wishbone transaction timed out")
+            else:
+                waited += 1
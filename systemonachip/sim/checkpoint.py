@@ -0,0 +1,137 @@
+"""Checkpoints of the state of a simulated design.
+
+The state of a synchronous design is the value of every signal driven from a clock domain, plus
+the contents of every memory. Other signals are combinational and follow from the state.
+
+Checkpoints name each signal and memory by its path in the design hierarchy, so a checkpoint
+taken from one instance of a design can be restored into another instance of the same design, in
+another simulator. A warmed-up state can thus be reached once, and every test case started from
+it::
+
+    fragment = Fragment.get(Basic(), platform=None)
+    sim = create_simulator(fragment)
+    ...
+    def warm_up():
+        ... # Boot.
+        checkpoint = yield from Checkpoint.save(fragment)
+
+    fragment = Fragment.get(Basic(), platform=None)
+    sim = create_simulator(fragment)
+    def restore():
+        yield from checkpoint.restore(fragment)
+    sim.add_process(restore)
+    ... # Test case.
+
+The design must be elaborated once into a fragment which is given both to the simulator and to
+the checkpoint, as elaborating it again creates new internal signals."""
+
+import json
+
+from nmigen.hdl.ir import Fragment, Instance
+
+from ._fragment import walk
+
+
+__all__ = ["Checkpoint"]
+
+
+def _state(fragment):
+    """Map the hierarchical names of the state signals and memories of `fragment` to them."""
+    signals  = {}
+    memories = {}
+
+    def add(names, name, obj):
+        key = name
+        index = 1
+        while key in names:
+            key = "{}${}".format(name, index)
+            index += 1
+        names[key] = obj
+
+    for path, subfragment in walk(fragment):
+        if isinstance(subfragment, Instance):
+            memory = subfragment.parameters.get("MEMID")
+            if memory is not None and not any(m is memory for m in memories.values()):
+                add(memories, "{}.{}".format(path.rpartition(".")[0], memory.name or "$memory"),
+                    memory)
+            continue
+        for domain, domain_signals in subfragment.drivers.items():
+            if domain is None:
+                continue
+            for signal in domain_signals:
+                add(signals, "{}.{}".format(path, signal.name or "$signal"), signal)
+    return signals, memories
+
+
+class Checkpoint:
+    """Saved state of a simulated design.
+
+    Parameters
+    ----------
+    signals : dict(str, int)
+        Values of the state signals, by hierarchical name.
+    memories : dict(str, list(int))
+        Contents of the memories, by hierarchical name.
+    """
+    def __init__(self, signals, memories):
+        self.signals  = dict(signals)
+        self.memories = {name: list(data) for name, data in memories.items()}
+
+    @classmethod
+    def save(cls, fragment):
+        """Read the state of `fragment` from within a simulator process.
+
+        This is a generator: use ``checkpoint = yield from Checkpoint.save(fragment)``.
+        """
+        if not isinstance(fragment, Fragment):
+            raise TypeError("Checkpoints must be taken of an elaborated Fragment, not {!r}"
+                            .format(fragment))
+        signals, memories = _state(fragment)
+        signal_values = {}
+        for name, signal in signals.items():
+            signal_values[name] = yield signal
+        memory_values = {}
+        for name, memory in memories.items():
+            data = []
+            for index in range(memory.depth):
+                data.append((yield memory[index]))
+            memory_values[name] = data
+        return cls(signal_values, memory_values)
+
+    def restore(self, fragment):
+        """Write the state back into `fragment` from within a simulator process.
+
+        This is a generator: use ``yield from checkpoint.restore(fragment)`` in a process added
+        with ``add_process``, which runs before the first clock edge. Synchronous processes only
+        start on that edge, whose updates would override the restored values.
+
+        Raises
+        ------
+        :exc:`ValueError`
+            If `fragment` does not have the same state signals and memories as the design the
+            checkpoint was taken of.
+        """
+        if not isinstance(fragment, Fragment):
+            raise TypeError("Checkpoints must be restored into an elaborated Fragment, not {!r}"
+                            .format(fragment))
+        signals, memories = _state(fragment)
+        if signals.keys() != self.signals.keys() or memories.keys() != self.memories.keys():
+            differing = (self.signals.keys() ^ signals.keys()) | \
+                        (self.memories.keys() ^ memories.keys())
+            raise ValueError("Checkpoint does not match the design; differing state: {}"
+                             .format(", ".join(sorted(differing))))
+        for name, signal in signals.items():
+            yield signal.eq(self.signals[name])
+        for name, memory in memories.items():
+            for index, value in enumerate(self.memories[name]):
+                yield memory[index].eq(value)
+
+    def dump(self, file):
+        """Write the checkpoint to a text `file` as JSON."""
+        json.dump({"signals": self.signals, "memories": self.memories}, file)
+
+    @classmethod
+    def load(cls, file):
+        """Read a checkpoint written by :meth:`dump` from a text `file`."""
+        data = json.load(file)
+        return cls(data["signals"], data["memories"])
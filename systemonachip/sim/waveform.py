@@ -0,0 +1,282 @@
+"""Filtered waveform capture of simulated designs.
+
+Unlike the ``vcd_file`` argument of the simulator, which records every signal of the design for
+the whole simulation, :class:`WaveformCapture` records only the signals whose hierarchical names
+match a filter, only within a window of clock cycles, and streams them to a file as it goes, which
+is compressed if its name ends in ``.gz``::
+
+    fragment = Fragment.get(Basic(), platform=None)
+    sim = create_simulator(fragment)
+    ...
+    with WaveformCapture(fragment, "boot.vcd.gz", signals=["top.timer.*", "*.irq"],
+                         start=1000) as capture:
+        capture.add_to(sim)
+        sim.run()
+
+Signals are sampled once per clock cycle, like from any other synchronous process; changes in
+between clock edges are not recorded.
+
+Test simulations leave capture off unless it is requested with environment variables; see
+:func:`capture_from_environment`."""
+
+import fnmatch
+import gzip
+import os
+import re
+
+from nmigen import *
+from nmigen.hdl.ast import SignalSet
+from nmigen.hdl.ir import Fragment, Instance
+from nmigen.back.pysim import Passive
+
+from ._fragment import walk
+
+
+__all__ = ["WaveformCapture", "capture_from_environment"]
+
+
+def _signals(fragment):
+    """Map the hierarchical names of the signals of `fragment` to them. Each signal is named after
+    the fragment driving it, or else the first fragment using it."""
+    paths = []
+    owned = SignalSet()
+    for path, subfragment in walk(fragment):
+        if isinstance(subfragment, Instance):
+            continue
+        driven = SignalSet(subfragment.ports.keys())
+        for domain, signal in subfragment.iter_drivers():
+            driven.add(signal)
+        paths.append((path, driven))
+        owned |= driven
+    for path, subfragment in walk(fragment):
+        if isinstance(subfragment, Instance):
+            continue
+        used = SignalSet()
+        for statement in subfragment.statements:
+            try:
+                used |= statement._lhs_signals()
+                used |= statement._rhs_signals()
+            except NotImplementedError:
+                pass # Uses clock or reset signals, which only exist in the simulator.
+        used -= owned
+        paths.append((path, used))
+        owned |= used
+
+    signals = {}
+    for path, path_signals in paths:
+        for signal in sorted(path_signals, key=lambda signal: signal.duid):
+            name = "{}.{}".format(path, signal.name or "$signal")
+            key = name
+            index = 1
+            while key in signals:
+                key = "{}${}".format(name, index)
+                index += 1
+            signals[key] = signal
+    return signals
+
+
+def _identifier(index):
+    chars = ""
+    while True:
+        index, digit = divmod(index, 94)
+        chars += chr(33 + digit)
+        if index == 0:
+            return chars
+        index -= 1
+
+
+class WaveformCapture:
+    """Capture of the waveforms of a simulated design into a VCD file.
+
+    Add the capture to the simulator with :meth:`add_to`, and close it once the simulation has
+    run, or use it as a context manager.
+
+    Parameters
+    ----------
+    fragment : Fragment
+        Elaborated design, which must be the one given to the simulator.
+    file : str
+        Name of the VCD file. The file is compressed with gzip if its name ends in ``.gz``.
+    signals : list of str
+        Glob patterns matched against the hierarchical names of the signals, such as
+        ``"top.timer.*"`` for every signal of the ``timer`` submodule. Only the signals matching
+        any of them are captured.
+    start : int
+        Clock cycle at which capture starts.
+    stop : int or None
+        Clock cycle at which capture stops. If ``None``, capture lasts until the end of the
+        simulation.
+    trigger : Value or str or None
+        Optional. Capture starts on the first cycle from ``start`` on where `trigger` is
+        non-zero. If a string, the trigger is any of the signals whose hierarchical names match
+        it being non-zero.
+    domain : str
+        Clock domain of the capture, whose cycles are counted and sampled.
+    period : float
+        Clock period of the domain, in seconds, used for the time stamps of the file.
+    """
+    def __init__(self, fragment, file, *, signals=("*",), start=0, stop=None, trigger=None,
+                 domain="sync", period=1e-6):
+        if not isinstance(fragment, Fragment):
+            raise TypeError("Waveforms must be captured of an elaborated Fragment, not {!r}"
+                            .format(fragment))
+        if not isinstance(start, int) or start < 0:
+            raise ValueError("Start cycle must be a non-negative integer, not {!r}"
+                             .format(start))
+        if stop is not None and (not isinstance(stop, int) or stop < start):
+            raise ValueError("Stop cycle must be an integer greater than or equal to the start "
+                             "cycle, not {!r}".format(stop))
+        if isinstance(signals, str):
+            signals = [signals]
+
+        all_signals = _signals(fragment)
+        self.signals = {name: signal for name, signal in sorted(all_signals.items())
+                        if any(fnmatch.fnmatchcase(name, pattern) for pattern in signals)}
+        if isinstance(trigger, str):
+            matches = [signal for name, signal in all_signals.items()
+                       if fnmatch.fnmatchcase(name, trigger)]
+            if not matches:
+                raise ValueError("Trigger {!r} does not match any signal".format(trigger))
+            trigger = Cat(signal.bool() for signal in matches).any()
+        elif trigger is not None:
+            trigger = Value.cast(trigger)
+
+        self.file    = file
+        self.start   = start
+        self.stop    = stop
+        self.trigger = trigger
+        self.domain  = domain
+        self.period  = period
+        self.cycles  = 0
+
+        self._stream = None
+        self._values = None
+        self._time   = None # Cycle of the last time stamp written.
+        self._ticks  = max(1, round(period * 1e12))
+
+    def add_to(self, simulator):
+        """Add :meth:`process` to `simulator` as a synchronous process of the capture domain."""
+        simulator.add_sync_process(self.process, domain=self.domain)
+
+    def process(self):
+        """Sampling process, to be added with ``add_sync_process`` in the capture domain."""
+        yield Passive()
+        triggered = self.trigger is None
+        while self.stop is None or self.cycles < self.stop:
+            if self.cycles >= self.start:
+                if not triggered:
+                    triggered = bool((yield self.trigger))
+                if triggered:
+                    values = []
+                    for signal in self.signals.values():
+                        values.append((yield signal))
+                    self._sample(values)
+            yield
+            self.cycles += 1
+        self.close()
+
+    def _open(self):
+        if self.file.endswith(".gz"):
+            self._stream = gzip.open(self.file, "wt")
+        else:
+            self._stream = open(self.file, "w")
+        write = self._stream.write
+        write("$timescale 1 ps $end\n")
+        scope = []
+        for index, (name, signal) in enumerate(self.signals.items()):
+            path = name.split(".")
+            common = 0
+            while common < min(len(scope), len(path) - 1) and scope[common] == path[common]:
+                common += 1
+            for _ in scope[common:]:
+                write("$upscope $end\n")
+            for module in path[common:-1]:
+                write("$scope module {} $end\n".format(module))
+            scope = path[:-1]
+            write("$var wire {} {} {} $end\n".format(len(signal), _identifier(index), path[-1]))
+        for _ in scope:
+            write("$upscope $end\n")
+        write("$enddefinitions $end\n")
+
+    def _sample(self, values):
+        if self._stream is None:
+            self._open()
+        changes = []
+        for index, (signal, value) in enumerate(zip(self.signals.values(), values)):
+            if self._values is not None and self._values[index] == value:
+                continue
+            if len(signal) == 1:
+                changes.append("{}{}\n".format(value & 1, _identifier(index)))
+            else:
+                changes.append("b{:b} {}\n".format(value & ((1 << len(signal)) - 1),
+                                                   _identifier(index)))
+        if changes or self._values is None:
+            self._stream.write("#{}\n".format(self.cycles * self._ticks))
+            self._stream.write("".join(changes))
+            self._time = self.cycles
+        self._values = values
+
+    def close(self):
+        """Finish the file. Capturing stops there."""
+        if self._stream is not None:
+            if self.cycles > self._time:
+                self._stream.write("#{}\n".format(self.cycles * self._ticks))
+            self._stream.close()
+            self._stream = None
+        self.stop = self.cycles
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def capture_from_environment(fragment, name, *, domain="sync", period=1e-6):
+    """Waveform capture of a test simulation, as requested by environment variables.
+
+    ``SYSTEMONACHIP_WAVEFORMS``
+        Comma-separated glob patterns of the signals to capture. Capture is off if it is unset or
+        empty.
+    ``SYSTEMONACHIP_WAVEFORM_DIR``
+        Directory of the captured files. Defaults to the current directory.
+    ``SYSTEMONACHIP_WAVEFORM_CYCLES``
+        Window of captured cycles, as ``start:stop``, where either bound may be omitted.
+    ``SYSTEMONACHIP_WAVEFORM_TRIGGER``
+        Glob pattern of trigger signals; see :class:`WaveformCapture`.
+
+    Parameters
+    ----------
+    fragment : Fragment
+        Elaborated design, which must be the one given to the simulator.
+    name : str
+        Name of the simulation, such as the test ID. The captured file is ``<name>.vcd.gz``,
+        with characters other than letters, digits, ``.``, ``_`` and ``-`` replaced.
+
+    Returns
+    -------
+    :class:`WaveformCapture` or ``None`` if capture is off.
+    """
+    patterns = [pattern.strip()
+                for pattern in os.environ.get("SYSTEMONACHIP_WAVEFORMS", "").split(",")
+                if pattern.strip()]
+    if not patterns:
+        return None
+
+    cycles = os.environ.get("SYSTEMONACHIP_WAVEFORM_CYCLES", ":")
+    start, sep, stop = cycles.partition(":")
+    try:
+        start = int(start) if start else 0
+        stop  = int(stop)  if stop  else None
+    except ValueError:
+        sep = ""
+    if not sep:
+        raise ValueError("SYSTEMONACHIP_WAVEFORM_CYCLES must be of the form 'start:stop', "
+                         "not {!r}".format(cycles))
+
+    directory = os.environ.get("SYSTEMONACHIP_WAVEFORM_DIR") or "."
+    os.makedirs(directory, exist_ok=True)
+    file = os.path.join(directory, re.sub(r"[^A-Za-z0-9._-]", "_", name) + ".vcd.gz")
+    return WaveformCapture(fragment, file, signals=patterns, start=start, stop=stop,
+                           trigger=os.environ.get("SYSTEMONACHIP_WAVEFORM_TRIGGER") or None,
+                           domain=domain, period=period)
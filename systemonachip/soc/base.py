@@ -71,7 +71,6 @@ class ConfigBuilder:
         autogenerated = "Automatically generated by LambdaSoC {}. Do not edit.".format(0)
 
         def periph_addr(periph):
-            print("p", periph)
             assert isinstance(periph, Peripheral)
             periph_map = periph.bus.memory_map
             for window, (start, end, ratio) in soc.memory_map.windows():
@@ -95,7 +94,6 @@ class ConfigBuilder:
             return "\n".join(commands)
 
         def render(source, origin):
-            print(source)
             try:
                 source = textwrap.dedent(source).strip()
                 compiled = jinja2.Template(source, trim_blocks=True, lstrip_blocks=True)
@@ -0,0 +1,218 @@
+"""Parallel test runner.
+
+Runs the test modules of this package in a pool of worker processes, one test case class at a
+time per worker, and writes a JSON report of the outcome, wall time and simulated cycles of every
+test::
+
+    python -m systemonachip.test -j 8 --report report.json
+
+Every test runs in its own artifact directory, ``<artifacts>/<test id>``, which is its working
+directory and where waveforms are captured if requested (see
+:func:`..sim.waveform.capture_from_environment`). Directories left empty are removed.
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import traceback
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from ..sim.backend import simulated_cycles
+
+
+__all__ = ["run", "main"]
+
+
+def _modules():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return ["{}.{}".format(__package__, name[:-3]) for name in sorted(os.listdir(directory))
+            if name.startswith("test_") and name.endswith(".py")]
+
+
+def _iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+
+
+def _shards(modules, patterns):
+    """Group the IDs of the tests of `modules` matching any of `patterns` by test case class."""
+    loader = unittest.TestLoader()
+    shards = collections.OrderedDict()
+    for module in modules:
+        for test in _iter_tests(loader.loadTestsFromName(module)):
+            if patterns and not any(re.search(pattern, test.id()) for pattern in patterns):
+                continue
+            key = (module, type(test).__qualname__)
+            shards.setdefault(key, []).append(test.id())
+    return list(shards.items())
+
+
+class _ReportResult(unittest.TestResult):
+    def __init__(self, artifacts):
+        super().__init__()
+        self._artifacts = artifacts
+        self._cwd       = os.getcwd()
+        self.records    = []
+
+    def startTest(self, test):
+        super().startTest(test)
+        directory = os.path.join(self._artifacts, re.sub(r"[^A-Za-z0-9._-]", "_", test.id()))
+        os.makedirs(directory, exist_ok=True)
+        os.chdir(directory)
+        os.environ["SYSTEMONACHIP_WAVEFORM_DIR"] = directory
+        self._record = {
+            "id":        test.id(),
+            "outcome":   "success",
+            "message":   None,
+            "artifacts": directory,
+        }
+        self._cycles = simulated_cycles()
+        self._start  = time.perf_counter()
+
+    def stopTest(self, test):
+        self._record["wall_time"] = time.perf_counter() - self._start
+        self._record["cycles"]    = simulated_cycles() - self._cycles
+        os.chdir(self._cwd)
+        if not os.listdir(self._record["artifacts"]):
+            os.rmdir(self._record["artifacts"])
+            self._record["artifacts"] = None
+        self.records.append(self._record)
+        super().stopTest(test)
+
+    def _outcome(self, outcome, message):
+        self._record["outcome"] = outcome
+        self._record["message"] = message
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._outcome("error", self._exc_info_to_string(err, test))
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._outcome("failure", self._exc_info_to_string(err, test))
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._outcome("skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._outcome("expected failure", None)
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._outcome("unexpected success", None)
+
+
+def _run_shard(module, ids, artifacts):
+    """Run the tests `ids` of `module` in a worker process, and return their records."""
+    wanted = set(ids)
+    try:
+        suite = unittest.TestLoader().loadTestsFromName(module)
+        tests = [test for test in _iter_tests(suite) if test.id() in wanted]
+    except Exception:
+        return [{"id": id_, "outcome": "error", "message": traceback.format_exc(),
+                 "artifacts": None, "wall_time": 0.0, "cycles": 0} for id_ in ids]
+    result = _ReportResult(artifacts)
+    unittest.TestSuite(tests).run(result)
+    return result.records
+
+
+def run(modules=None, *, patterns=(), jobs=None, artifacts="test-artifacts"):
+    """Run the tests of `modules` in `jobs` worker processes.
+
+    Parameters
+    ----------
+    modules : list of str or None
+        Names of the test modules. If ``None``, every ``test_*`` module of this package.
+    patterns : list of str
+        Regular expressions. If any are given, only the tests whose IDs match any of them are run.
+    jobs : int or None
+        Number of worker processes. If ``None``, the number of processors.
+    artifacts : str
+        Directory holding the artifact directories of the tests. It is emptied first.
+
+    Returns
+    -------
+    dict
+        Report with the total ``wall_time``, the number of ``jobs``, and the records of the
+        ``tests``, slowest first. Every record holds the ``id``, ``outcome``, failure
+        ``message``, ``artifacts`` directory, ``wall_time`` and simulated ``cycles`` of a test.
+    """
+    if jobs is not None and (not isinstance(jobs, int) or jobs <= 0):
+        raise ValueError("Number of jobs must be a positive integer, not {!r}"
+                         .format(jobs))
+    if modules is None:
+        modules = _modules()
+    artifacts = os.path.abspath(artifacts)
+    shutil.rmtree(artifacts, ignore_errors=True)
+    os.makedirs(artifacts)
+
+    start = time.perf_counter()
+    shards = _shards(modules, patterns)
+    records = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_run_shard, module, ids, artifacts)
+                   for (module, _), ids in shards]
+        for future in futures:
+            records.extend(future.result())
+    return {
+        "wall_time": time.perf_counter() - start,
+        "jobs":      jobs or os.cpu_count(),
+        "tests":     sorted(records, key=lambda record: record["wall_time"], reverse=True),
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m {}".format(__package__),
+        description="Run the tests in parallel, and report their wall time and simulated cycles.")
+    parser.add_argument("modules", metavar="MODULE", nargs="*",
+        help="test module to run (default: all)")
+    parser.add_argument("-j", "--jobs", metavar="N", type=int, default=None,
+        help="number of worker processes (default: number of processors)")
+    parser.add_argument("-k", metavar="PATTERN", dest="patterns", action="append", default=[],
+        help="only run tests whose IDs match the regular expression PATTERN")
+    parser.add_argument("--artifacts", metavar="DIR", default="test-artifacts",
+        help="directory of the per-test artifact directories (default: %(default)s)")
+    parser.add_argument("--report", metavar="FILE", type=argparse.FileType("w"),
+        help="write the JSON report to FILE")
+    parser.add_argument("--slowest", metavar="N", type=int, default=10,
+        help="list the N slowest tests (default: %(default)s)")
+    args = parser.parse_args(args)
+
+    report = run(args.modules or None, patterns=args.patterns, jobs=args.jobs,
+                 artifacts=args.artifacts)
+    if args.report is not None:
+        json.dump(report, args.report, indent=2)
+
+    tests = report["tests"]
+    for record in sorted(tests, key=lambda record: record["id"]):
+        if record["outcome"] in ("error", "failure"):
+            print("{}: {}\n{}".format(record["outcome"].upper(), record["id"], record["message"]),
+                  file=sys.stderr)
+    if args.slowest > 0:
+        print("Slowest tests:", file=sys.stderr)
+        for record in tests[:args.slowest]:
+            print("  {:8.3f} s {:>10} cycles  {}".format(record["wall_time"], record["cycles"],
+                                                        record["id"]),
+                  file=sys.stderr)
+    outcomes = collections.Counter(record["outcome"] for record in tests)
+    print("Ran {} tests in {:.3f} s with {} jobs: {}".format(
+              len(tests), report["wall_time"], report["jobs"],
+              ", ".join("{} {}".format(count, outcome)
+                        for outcome, count in sorted(outcomes.items()))),
+          file=sys.stderr)
+    return 0 if outcomes["error"] + outcomes["failure"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from nmigen.hdl.ir import Fragment
+from nmigen.back.pysim import *
+
+from ..sim.backend import create_simulator
+from ..sim.waveform import capture_from_environment
+
+
+def simulation_test(dut, process, *, name, clock=True):
+    """Simulate `dut` with the test bench `process`, capturing waveforms into a file named after
+    the test `name` if requested by the environment."""
+    fragment = Fragment.get(dut, platform=None)
+    sim = create_simulator(fragment)
+    capture = None
+    if clock:
+        sim.add_clock(1e-6)
+        sim.add_sync_process(process)
+        capture = capture_from_environment(fragment, name, period=1e-6)
+    else:
+        sim.add_process(process)
+    if capture is None:
+        sim.run()
+    else:
+        with capture:
+            capture.add_to(sim)
+            sim.run()
@@ -1,3 +1,6 @@
+from ..sim.burst import BurstResult, wb_burst_read, wb_burst_write
+
+
 def wb_read(bus, addr, sel, timeout=32):
     yield bus.cyc.eq(1)
     yield bus.stb.eq(1)
@@ -0,0 +1,121 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from nmigen import *
+from nmigen_soc import wishbone
+from nmigen_soc.memory import MemoryMap
+
+from ..bus.arbiter import Arbiter
+from ..peripheral.memory import RandomAccessMemory
+from ..sim import *
+
+
+def _bus():
+    return wishbone.Interface(addr_width=6, data_width=32, granularity=8,
+                              features={"cti", "bte"})
+
+
+class SharedMemory(Elaboratable):
+    def __init__(self, *, budgets=(None, None), **kwargs):
+        self.arbiter = Arbiter(addr_width=6, data_width=32, granularity=8,
+                               features={"cti", "bte"}, **kwargs)
+        self.intrs   = [_bus() for _ in budgets]
+        for intr_bus, budget in zip(self.intrs, budgets):
+            self.arbiter.add(intr_bus, budget=budget)
+        ram_bus = _bus()
+        ram_bus.memory_map = MemoryMap(addr_width=8, data_width=8)
+        self.ram = RandomAccessMemory(ram_bus, size=256, name="ram")
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.arbiter = self.arbiter
+        m.submodules.ram     = self.ram
+        m.d.comb += self.arbiter.bus.connect(self.ram.bus)
+        return m
+
+
+class ArbiterTestCase(unittest.TestCase):
+    def simulate(self, dut):
+        self.sim = create_simulator(dut)
+        self.sim.add_clock(1e-6)
+        return [WishboneSimulatorBus(self.sim, intr_bus) for intr_bus in dut.intrs]
+
+    def contend(self, dut, count=8):
+        """Queue `count` reads on both initiators, and return how many reads of the second one
+        are done when the first one is."""
+        first, second = self.simulate(dut)
+        first.write_many([(4 * index, index) for index in range(count)])
+        reads = [second.queue_read(4 * index) for index in range(count)]
+        self.assertEqual(first.read_many([4 * index for index in range(count)]),
+                         list(range(count)))
+        done = sum(read.done for read in reads)
+        second.flush()
+        self.assertEqual([read.value for read in reads], list(range(count)))
+        return done
+
+    def test_round_robin(self):
+        # The initiators take turns.
+        self.assertGreaterEqual(self.contend(SharedMemory(scheduler="round-robin")), 7)
+
+    def test_priority(self):
+        # The first initiator is served first.
+        self.assertLessEqual(self.contend(SharedMemory(scheduler="priority")), 1)
+
+    def test_budget(self):
+        # Once the first initiator used its budget, the second one is served first.
+        dut = SharedMemory(scheduler="priority", window=16, budgets=(2, None))
+        self.assertGreaterEqual(self.contend(dut), 6)
+
+    def test_burst_lock(self):
+        dut = SharedMemory(scheduler="round-robin")
+        sim = create_simulator(dut)
+        sim.add_clock(1e-6)
+        second = WishboneSimulatorBus(sim, dut.intrs[1])
+        reads = [second.queue_read(4 * index) for index in range(8)]
+        results = []
+        def process():
+            results.append((yield from wb_burst_read(dut.intrs[0], 0, 8)))
+        sim.add_sync_process(process)
+        second.flush()
+        while not results:
+            sim.advance()
+        self.assertEqual([read.value for read in reads], [0] * 8)
+        # The burst may wait for a transfer of the other initiator to end, but is not
+        # interrupted once it started.
+        self.assertLessEqual(results[0].cycles, 8 + 3)
+
+    def test_wrong_scheduler(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Scheduler must be one of round-robin, priority, not 'fifo'"):
+            Arbiter(addr_width=6, data_width=32, scheduler="fifo")
+
+    def test_wrong_window(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Window must be a positive integer, not 0"):
+            Arbiter(addr_width=6, data_width=32, window=0)
+
+    def test_wrong_features(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Arbiter does not support pipelined mode"):
+            Arbiter(addr_width=6, data_width=32, features={"stall"})
+
+    def test_add_wrong_bus(self):
+        arbiter = Arbiter(addr_width=6, data_width=32)
+        with self.assertRaisesRegex(TypeError,
+                r"Initiator bus must be an instance of wishbone.Interface, not 'foo'"):
+            arbiter.add("foo")
+        with self.assertRaisesRegex(ValueError,
+                r"Initiator bus has data width 16, which is not the same as arbiter data "
+                r"width 32"):
+            arbiter.add(wishbone.Interface(addr_width=6, data_width=16))
+
+    def test_add_wrong_budget(self):
+        arbiter = Arbiter(addr_width=6, data_width=32)
+        with self.assertRaisesRegex(ValueError,
+                r"Arbiter must have a window for initiators to have a budget"):
+            arbiter.add(wishbone.Interface(addr_width=6, data_width=32), budget=1)
+        arbiter = Arbiter(addr_width=6, data_width=32, window=4)
+        with self.assertRaisesRegex(ValueError,
+                r"Budget must be a positive integer no greater than the window 4, not 5"):
+            arbiter.add(wishbone.Interface(addr_width=6, data_width=32), budget=5)
@@ -0,0 +1,136 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from nmigen import *
+from nmigen.utils import log2_int
+
+from nmigen_soc import csr, wishbone
+from nmigen_soc.memory import MemoryMap
+
+from ..bus.bridge import WishboneCSRBridge
+from ..sim import *
+
+
+class BridgedRegisters(Elaboratable):
+    def __init__(self, data_width, *, csr_data_width=8, pipelined=False):
+        addr_width = 4 - log2_int(data_width // 8)
+        self.bus = wishbone.Interface(addr_width=addr_width, data_width=data_width,
+                                      granularity=8, features={"stall"} if pipelined else ())
+        self.bus.memory_map = MemoryMap(addr_width=addr_width, data_width=data_width)
+        self.bridge = WishboneCSRBridge(self.bus, data_width=csr_data_width)
+        self._mux   = csr.Multiplexer(addr_width=self.bridge.csr_bus.addr_width,
+                                      data_width=csr_data_width)
+        self._width = max(32, csr_data_width)
+        self._regs  = [csr.Element(self._width, "rw") for _ in range(128 // self._width)]
+        for reg in self._regs:
+            self._mux.add(reg)
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.bridge = self.bridge
+        m.submodules.mux    = self._mux
+        csr_bus = self.bridge.csr_bus
+        m.d.comb += [
+            self._mux.bus.addr.eq(csr_bus.addr),
+            self._mux.bus.r_stb.eq(csr_bus.r_stb),
+            self._mux.bus.w_stb.eq(csr_bus.w_stb),
+            self._mux.bus.w_data.eq(csr_bus.w_data),
+            csr_bus.r_data.eq(self._mux.bus.r_data),
+        ]
+        for reg in self._regs:
+            value = Signal(self._width)
+            with m.If(reg.w_stb):
+                m.d.sync += value.eq(reg.w_data)
+            m.d.comb += reg.r_data.eq(value)
+        return m
+
+
+class WishboneCSRBridgeTestCase(unittest.TestCase):
+    def test_csr_bus(self):
+        bridge = BridgedRegisters(32).bridge
+        self.assertEqual(bridge.csr_bus.data_width, 8)
+        self.assertEqual(bridge.csr_bus.addr_width, 4)
+
+    def test_csr_bus_word(self):
+        bridge = BridgedRegisters(32, csr_data_width=32).bridge
+        self.assertEqual(bridge.csr_bus.data_width, 32)
+        self.assertEqual(bridge.csr_bus.addr_width, 2)
+
+    def test_back_to_back(self):
+        for data_width in (8, 16, 32, 64):
+            dut = BridgedRegisters(data_width)
+            sim = create_simulator(dut)
+            sim.add_clock(1e-6)
+            bus = WishboneSimulatorBus(sim, dut.bus)
+            writes = [(0x0, 0x12345678), (0x4, 0x9abcdef0), (0x8, 0x0badf00d), (0xc, 0x1)]
+            bus.write_many(writes)
+            self.assertEqual(bus.read_many([0x0, 0x4, 0x8, 0xc]),
+                             [value for _, value in writes], data_width)
+
+    def test_back_to_back_word(self):
+        for data_width in (32, 64):
+            dut = BridgedRegisters(data_width, csr_data_width=data_width)
+            sim = create_simulator(dut)
+            sim.add_clock(1e-6)
+            bus = WishboneSimulatorBus(sim, dut.bus)
+            writes = [(0x0, 0x12345678), (0x4, 0x9abcdef0), (0x8, 0x0badf00d), (0xc, 0x1)]
+            bus.write_many(writes)
+            self.assertEqual(bus.read_many([0x0, 0x4, 0x8, 0xc]),
+                             [value for _, value in writes], data_width)
+
+    def test_word_latency(self):
+        # Full word accesses take one CSR bus cycle; on a 64-bit bus, 32-bit writes only select
+        # half of a word and are merged into it with a read-modify-write.
+        for data_width, write_cycles in ((32, 2), (64, 3)):
+            dut = BridgedRegisters(data_width, csr_data_width=data_width)
+            sim = create_simulator(dut)
+            sim.add_clock(1e-6)
+            bus = WishboneSimulatorBus(sim, dut.bus)
+            def cycles(count):
+                start = bus.cycles
+                bus.write_many([(0x0, 0x12345678)] * count)
+                write = bus.cycles - start
+                start = bus.cycles
+                bus.read_many([0x0] * count)
+                return write, bus.cycles - start
+            # Flushing the bus takes a cycle, which cancels out in the difference once the
+            # accesses are preceded by the same kind of access.
+            cycles(1)
+            (write_4, read_4), (write_8, read_8) = cycles(4), cycles(8)
+            self.assertEqual(write_8 - write_4, 4 * write_cycles, data_width)
+            self.assertEqual(read_8  - read_4,  4 * 2, data_width)
+            self.assertEqual(bus[0x0], 0x12345678, data_width)
+
+    def test_pipelined(self):
+        for data_width, csr_data_width in ((32, 8), (32, 32), (64, 64)):
+            dut = BridgedRegisters(data_width, csr_data_width=csr_data_width, pipelined=True)
+            sim = create_simulator(dut)
+            sim.add_clock(1e-6)
+            bus = WishboneSimulatorBus(sim, dut.bus)
+            writes = [(0x0, 0x12345678), (0x4, 0x9abcdef0), (0x8, 0x0badf00d), (0xc, 0x1)]
+            bus.write_many(writes)
+            self.assertEqual(bus.read_many([0x0, 0x4, 0x8, 0xc, 0x0]),
+                             [value for _, value in writes] + [0x12345678], data_width)
+            # A read right after a write waits for the write to reach its register.
+            bus.queue_write(0x4, 0x5a5a5a5a)
+            read = bus.queue_read(0x4)
+            bus.flush()
+            self.assertEqual(read.value, 0x5a5a5a5a, data_width)
+
+    def test_pipelined_word_throughput(self):
+        dut = BridgedRegisters(32, csr_data_width=32, pipelined=True)
+        sim = create_simulator(dut)
+        sim.add_clock(1e-6)
+        bus = WishboneSimulatorBus(sim, dut.bus)
+        start = bus.cycles
+        bus.read_many([0x0, 0x4, 0x8, 0xc] * 4)
+        # One read per cycle, plus the latency of the last acknowledgement.
+        self.assertLessEqual(bus.cycles - start, 16 + 2)
+
+    def test_wrong_data_width(self):
+        bus = wishbone.Interface(addr_width=2, data_width=32, granularity=8)
+        with self.assertRaisesRegex(ValueError,
+                r"CSR bus data width must be either the Wishbone bus granularity 8 or data "
+                r"width 32, not 16"):
+            WishboneCSRBridge(bus, data_width=16)
@@ -0,0 +1,101 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from nmigen import *
+from nmigen.hdl.ir import Fragment
+from nmigen_soc import wishbone
+
+from ..bus.crossbar import Crossbar
+from ..peripheral.memory import RandomAccessMemory
+from ..sim import *
+
+
+def _bus():
+    return wishbone.Interface(addr_width=8, data_width=32, granularity=8,
+                              features={"cti", "bte"})
+
+
+class CrossbarMemories(Elaboratable):
+    def __init__(self):
+        self.crossbar = Crossbar(addr_width=8, data_width=32, granularity=8, window_size=0x40,
+                                 features={"cti", "bte"})
+        self.intrs    = [_bus(), _bus()]
+        for intr_bus in self.intrs:
+            self.crossbar.add(intr_bus)
+        self.rams     = [RandomAccessMemory(self.crossbar[index], size=64, name="ram")
+                         for index in range(2)]
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.crossbar = self.crossbar
+        m.submodules.ram0     = self.rams[0]
+        m.submodules.ram1     = self.rams[1]
+        return m
+
+
+class CrossbarTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dut = CrossbarMemories()
+        sim = create_simulator(self.dut)
+        sim.add_clock(1e-6)
+        self.buses = [WishboneSimulatorBus(sim, intr_bus) for intr_bus in self.dut.intrs]
+
+    def access(self, regions):
+        """Write then read 8 words of `regions[index]` from every initiator at once, and return
+        the number of cycles it took."""
+        start = self.buses[1].cycles
+        for bus, region in zip(self.buses, regions):
+            for index in range(8):
+                bus.queue_write(0x100 * region + 4 * index, 0x100 * region + index)
+        reads = [[bus.queue_read(0x100 * region + 4 * index) for index in range(8)]
+                 for bus, region in zip(self.buses, regions)]
+        for bus in self.buses:
+            bus.flush()
+        for region, region_reads in zip(regions, reads):
+            self.assertEqual([read.value for read in region_reads],
+                             [0x100 * region + index for index in range(8)])
+        return self.buses[1].cycles - start
+
+    def test_regions(self):
+        self.assertEqual(len(self.dut.crossbar), 4)
+        self.assertEqual([index for index, _ in self.dut.crossbar.items()], [0, 1])
+        self.assertIs(self.dut.crossbar[1], self.dut.rams[1].bus)
+
+    def test_parallel(self):
+        # Initiators accessing different regions proceed at once, and take as long as initiators
+        # sharing a region take for half of the accesses.
+        parallel = self.access([0, 1])
+        shared   = self.access([0, 0])
+        self.assertLess(parallel, shared * 3 // 4)
+
+    def test_wrong_window_size(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Window size must be an integer power of two, not 3"):
+            Crossbar(addr_width=8, data_width=32, window_size=3)
+        with self.assertRaisesRegex(ValueError,
+                r"Window size must be at most 0x100, the size of the address space, not 0x200"):
+            Crossbar(addr_width=8, data_width=32, window_size=0x200)
+
+    def test_wrong_order(self):
+        crossbar = Crossbar(addr_width=8, data_width=32, window_size=0x40)
+        with self.assertRaisesRegex(ValueError,
+                r"Initiators must be added before regions are instantiated"):
+            crossbar[0]
+        crossbar.add(wishbone.Interface(addr_width=8, data_width=32))
+        crossbar[0]
+        with self.assertRaisesRegex(ValueError,
+                r"Initiators must be added before regions are instantiated"):
+            crossbar.add(wishbone.Interface(addr_width=8, data_width=32))
+        Fragment.get(crossbar, platform=None)
+
+    def test_wrong_index(self):
+        with self.assertRaisesRegex(IndexError, r"Invalid region"):
+            self.dut.crossbar[4]
+
+    def test_wrong_initiator(self):
+        crossbar = Crossbar(addr_width=8, data_width=32, window_size=0x40)
+        with self.assertRaisesRegex(ValueError,
+                r"Initiator bus has addr width 6, which is not the same as crossbar addr "
+                r"width 8"):
+            crossbar.add(wishbone.Interface(addr_width=6, data_width=32))
@@ -0,0 +1,89 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from nmigen import *
+from nmigen_soc import wishbone
+from nmigen_soc.memory import MemoryMap
+
+from ..bus.decoder import Decoder
+from ..peripheral.memory import RandomAccessMemory
+from ..sim import *
+
+
+class PipelinedMemories(Elaboratable):
+    def __init__(self):
+        self.bus     = wishbone.Interface(addr_width=30, data_width=32, features={"stall"})
+        self.decoder = Decoder(self.bus, 0x100, cycle_type=False, burst_type=False,
+                               pipelined=True)
+        # Bins have the granularity of the decoder, which is its data width.
+        self.rams    = [RandomAccessMemory(self.decoder[index], size=64, granularity=32,
+                                           name="ram")
+                        for index in range(2)]
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.decoder = self.decoder
+        m.submodules.ram0    = self.rams[0]
+        m.submodules.ram1    = self.rams[1]
+        return m
+
+
+class DecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = wishbone.Interface(addr_width=30, data_width=32, granularity=8)
+        self.dut = Decoder(self.bus, 0x1000)
+
+    def test_bins(self):
+        self.assertEqual(len(self.dut), 1 << 20)
+        self.assertEqual(list(self.dut.items()), [])
+
+    def test_getitem(self):
+        window = self.dut[0x10]
+        self.assertIsInstance(window, wishbone.Interface)
+        self.assertIs(self.dut[0x10], window)
+        self.assertEqual(window.addr_width, 12)
+
+    def test_items(self):
+        windows = {index: self.dut[index] for index in (0x30, 0x10, 0x20)}
+        self.assertEqual(list(self.dut.items()), sorted(windows.items()))
+
+    def test_bin_at(self):
+        window = self.dut[0x10]
+        self.assertEqual(self.dut.bin_at(0x10000), (0x10, window))
+        self.assertEqual(self.dut.bin_at(0x10fff), (0x10, window))
+        self.assertIsNone(self.dut.bin_at(0x11000))
+
+    def test_wrong_index(self):
+        with self.assertRaisesRegex(IndexError, r"Invalid bin"):
+            self.dut[1 << 20]
+        with self.assertRaisesRegex(IndexError, r"Invalid bin"):
+            self.dut[-1]
+        with self.assertRaisesRegex(TypeError, r"Bin index must be an integer, not 'a'"):
+            self.dut["a"]
+
+
+class PipelinedDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dut = PipelinedMemories()
+        sim = create_simulator(self.dut)
+        sim.add_clock(1e-6)
+        self.bus = WishboneSimulatorBus(sim, self.dut.decoder.bus)
+
+    def test_features(self):
+        self.assertTrue(hasattr(self.dut.decoder.bus, "stall"))
+        self.assertTrue(hasattr(self.dut.decoder[0], "stall"))
+
+    def test_back_to_back(self):
+        # Bins are 0x100 words apart, which is 0x400 bytes.
+        addresses = [0x400 * bin_ + 0x4 * index for bin_ in range(2) for index in range(16)]
+        self.bus.write_many([(address, address) for address in addresses])
+        start = self.bus.cycles
+        self.assertEqual(self.bus.read_many(addresses), addresses)
+        # One request per cycle, except when switching bins.
+        self.assertLessEqual(self.bus.cycles - start, 32 + 4)
+
+    def test_switch_bins(self):
+        # Switching bins waits for the outstanding requests, so data comes back in order.
+        self.bus.write_many([(0x0, 0x11111111), (0x400, 0x22222222)])
+        self.assertEqual(self.bus.read_many([0x0, 0x400] * 4), [0x11111111, 0x22222222] * 4)
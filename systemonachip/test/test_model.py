@@ -0,0 +1,217 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from ..peripheral.timer import Timer
+from ..model import *
+
+
+class ReferenceTimer:
+    """Cycle by cycle behaviour of the timer RTL."""
+    def __init__(self, value, reload_):
+        self.value   = value
+        self.reload_ = reload_
+        self.pending = False
+
+    def tick(self):
+        if self.value == 0:
+            self.pending = True
+            self.value = self.reload_
+        else:
+            self.value -= 1
+
+
+class TimerModelTestCase(unittest.TestCase):
+    def test_registers(self):
+        timer = Timer(TimerModel(width=16))
+        self.assertEqual(timer.creator_id, 0x1248)
+        self.assertEqual(timer.creation_id, 0x0000)
+        self.assertEqual(timer.width, 16)
+        timer.reload_ = 0x12345
+        self.assertEqual(timer.reload_, 0x2345)
+        self.assertFalse(timer.enable)
+        timer.enable = True
+        self.assertTrue(timer.enable)
+
+    def test_reference(self):
+        for value, reload_ in [(0, 0), (0, 3), (5, 0), (5, 3), (17, 9)]:
+            for cycles in range(40):
+                model = TimerModel(width=8)
+                model.write_value(value)
+                model.write_reload_(reload_)
+                model.write_enable(True)
+                model.advance(cycles)
+                reference = ReferenceTimer(value, reload_)
+                for _ in range(cycles):
+                    reference.tick()
+                self.assertEqual(model.read_value(), reference.value, (value, reload_, cycles))
+                self.assertEqual(model.read_zero(), reference.pending, (value, reload_, cycles))
+
+    def test_strides(self):
+        model = TimerModel(width=32)
+        model.write_value(1000)
+        model.write_reload_(1000)
+        model.write_enable(True)
+        for _ in range(7):
+            model.advance(143)
+        self.assertEqual(model.read_value(), 1000)
+        self.assertTrue(model.read_zero())
+
+    def test_disabled(self):
+        model = TimerModel(width=8)
+        model.write_value(10)
+        model.advance(100)
+        self.assertEqual(model.read_value(), 10)
+        self.assertFalse(model.read_zero())
+
+    def test_event(self):
+        model = TimerModel(width=8)
+        timer = Timer(model)
+        timer.event_enable = 0x1
+        timer.value = 3
+        timer.enable = True
+        self.assertFalse(model.irq)
+        timer.wait_for(Timer.zero)
+        self.assertTrue(model.irq)
+        self.assertLess(model.cycles, 64)
+        timer.event_status = 0x0
+        self.assertFalse(timer.zero)
+        self.assertFalse(model.irq)
+
+    def test_wrong_width(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Counter width cannot be greater than 32 \(was: 33\)"):
+            TimerModel(width=33)
+
+
+class PeripheralModelTestCase(unittest.TestCase):
+    def test_missing_handler(self):
+        with self.assertRaisesRegex(TypeError,
+                r"Model PartialTimerModel must implement write_value for register 'value' of "
+                r"Timer"):
+            namespace = {"peripheral": Timer}
+            for name in ["creator_id", "creation_id", "reload_", "enable", "value",
+                         "event_enable", "event_status", "width", "zero"]:
+                namespace["read_" + name] = lambda self: 0
+            for name in ["reload_", "enable", "event_enable", "event_status"]:
+                namespace["write_" + name] = lambda self, value: None
+            type("PartialTimerModel", (PeripheralModel,), namespace)
+
+    def test_advance_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Number of cycles must be a non-negative integer, not -1"):
+            TimerModel(width=8).advance(-1)
+
+
+class RandomAccessMemoryModelTestCase(unittest.TestCase):
+    def test_read_write(self):
+        ram = RandomAccessMemoryModel(size=16, init=b"\x01\x02\x03\x04")
+        self.assertEqual(ram[0x0], 0x04030201)
+        ram[0x4] = 0xdeadbeef
+        self.assertEqual(ram.data[4:8], b"\xef\xbe\xad\xde")
+        buffer = bytearray(8)
+        ram.readinto(0x0, buffer)
+        self.assertEqual(buffer, b"\x01\x02\x03\x04\xef\xbe\xad\xde")
+
+    def test_read_only(self):
+        ram = RandomAccessMemoryModel(size=16, writable=False)
+        ram[0x0] = 0x1
+        ram.write(0x4, b"\x01")
+        self.assertEqual(ram.data, bytearray(16))
+
+    def test_out_of_range(self):
+        ram = RandomAccessMemoryModel(size=16)
+        with self.assertRaisesRegex(IndexError,
+                r"Address 14 is outside of the 16 byte memory"):
+            ram[14]
+
+    def test_wrong_size(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Size must be an integer power of two, not 3"):
+            RandomAccessMemoryModel(size=3)
+
+
+class AsyncSerialModelTestCase(unittest.TestCase):
+    def test_transmit(self):
+        model = AsyncSerialModel(divisor=10, tx_depth=4)
+        serial = AsyncSerialRegisters(model)
+        self.assertEqual(model.frame_cycles, 100)
+        for byte in b"hello":
+            serial.tx_data = byte
+        self.assertFalse(serial.tx_rdy)
+        model.advance(250)
+        self.assertEqual(model.transmitted, b"he")
+        self.assertTrue(serial.tx_rdy)
+        # The FIFO emptied when the first byte was sent, and empties again with the last one.
+        self.assertTrue(serial.tx_empty)
+        serial.event_status = 0b100
+        serial.wait_for("tx_empty")
+        self.assertTrue(model.transmitted.startswith(b"hell"))
+        model.advance(200)
+        self.assertEqual(model.transmitted, b"hello")
+
+    def test_receive(self):
+        model = AsyncSerialModel(divisor=10, rx_depth=2)
+        serial = AsyncSerialRegisters(model)
+        serial.event_enable = 0b011
+        model.receive(b"abc")
+        self.assertFalse(serial.rx_rdy)
+        model.advance(100)
+        self.assertTrue(serial.rx_rdy)
+        self.assertTrue(model.irq)
+        model.advance(200)
+        self.assertEqual(serial.rx_err, 0b001)
+        self.assertTrue(serial.rx_error)
+        self.assertEqual(serial.rx_data, ord("a"))
+        self.assertEqual(serial.rx_data, ord("b"))
+        self.assertFalse(serial.rx_rdy)
+        serial.event_status = 0b011
+        self.assertFalse(model.irq)
+
+    def test_layout(self):
+        # Register map of AsyncSerial behind its peripheral bridge; see test_periph_serial.
+        self.assertEqual([(f.name, f.address, f.position, f.access)
+                          for f in AsyncSerialRegisters._layout], [
+            ("divisor",      0x00, 0, "rw"),
+            ("rx_data",      0x04, 0, "r"),
+            ("rx_rdy",       0x08, 0, "r"),
+            ("rx_err",       0x0c, 0, "r"),
+            ("tx_data",      0x10, 0, "w"),
+            ("tx_rdy",       0x14, 0, "r"),
+            ("event_levels", 0x20, 0, "r"),
+            ("event_status", 0x24, 0, "rw"),
+            ("rx_ready",     0x24, 0, "r"),
+            ("rx_error",     0x24, 1, "r"),
+            ("tx_empty",     0x24, 2, "r"),
+            ("event_enable", 0x28, 0, "rw"),
+        ])
+
+    def test_event_levels(self):
+        model = AsyncSerialModel(divisor=10)
+        serial = AsyncSerialRegisters(model)
+        self.assertEqual(serial.event_levels, 0b100)
+        model.receive(b"a")
+        model.advance(100)
+        self.assertEqual(serial.event_levels, 0b101)
+        self.assertEqual(model[0x24], 0b001)
+
+    def test_wrong_parity(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Invalid parity 'foo'; must be one of none, mark, space, even, odd"):
+            AsyncSerialModel(divisor=10, parity="foo")
+
+
+class ModelBusTestCase(unittest.TestCase):
+    def test_decode(self):
+        timer = TimerModel(width=8)
+        ram = RandomAccessMemoryModel(size=16)
+        bus = ModelBus({0x0000: ram, 0x1000: timer})
+        bus[0x4] = 0x1234
+        self.assertEqual(ram[0x4], 0x1234)
+        self.assertEqual(bus[0x1000], 0x1248)
+        bus[0x100c] = 5
+        bus[0x1008] = 1
+        bus.advance(3)
+        self.assertEqual(timer.cycles, 3)
+        self.assertEqual(bus[0x100c], 2)
+        self.assertEqual(bus.irq, {0x0000: False, 0x1000: False})
@@ -4,17 +4,11 @@ import unittest
 from nmigen import *
 from nmigen.back.pysim import *
 
+from ._simulation import simulation_test
 from ._wishbone import *
 from ..periph.base import Peripheral, CSRBank, PeripheralBridge
 
 
-def simulation_test(dut, process):
-    with Simulator(dut, vcd_file=open("test.vcd", "w")) as sim:
-        sim.add_clock(1e-6)
-        sim.add_sync_process(process)
-        sim.run()
-
-
 class PeripheralTestCase(unittest.TestCase):
     def test_name(self):
         class Wrapper(Peripheral):
@@ -161,7 +155,7 @@ class PeripheralSimulationTestCase(unittest.TestCase):
             yield Delay(1e-7)
             self.assertEqual((yield dut.win_1.cyc), 1)
 
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
 
     def test_events(self):
         class DummyPeripheral(Peripheral, Elaboratable):
@@ -226,4 +220,4 @@ class PeripheralSimulationTestCase(unittest.TestCase):
             yield
             self.assertEqual((yield dut.irq), 0)
 
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
@@ -0,0 +1,624 @@
+# nmigen: UnusedElaboratable=no
+
+import asyncio
+import io
+import struct
+import unittest
+
+from ..peripheral import Peripheral
+from ..peripheral.timer import Timer
+from ..register import Bit, VariableWidth
+from ..window import AccessStatistics, AsyncWindow
+
+
+class CountingWindow:
+    """Word-addressed memory window that records every access."""
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.reads  = []
+        self.writes = []
+
+    def __getitem__(self, address):
+        self.reads.append(address)
+        return self.values.get(address, 0)
+
+    def __setitem__(self, address, value):
+        self.writes.append((address, value))
+        self.values[address] = value
+
+
+class TransactionTestCase(unittest.TestCase):
+    def test_bit(self):
+        window = CountingWindow({0x8: 0b10})
+        timer = Timer(window)
+        timer.enable = True
+        self.assertEqual(window.values[0x8], 0b11)
+        self.assertTrue(timer.enable)
+        timer.enable = False
+        self.assertEqual(window.values[0x8], 0b10)
+        self.assertFalse(timer.enable)
+
+    def test_coalesce(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with timer.transaction():
+            timer.reload_ = 0xf
+            timer.value = 0xe
+            timer.enable = True
+            timer.enable = False
+            timer.enable = True
+            self.assertEqual(window.writes, [])
+        self.assertEqual(window.writes, [(0x4, 0xf), (0xc, 0xe), (0x8, 0x1)])
+        self.assertEqual(window.reads, [0x8])
+
+    def test_full_write_skips_read(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with timer.transaction():
+            timer.value = 0x3
+            self.assertEqual(timer.value, 0x3)
+            self.assertEqual(window.reads, [])
+
+    def test_read_sees_pending(self):
+        window = CountingWindow({0x8: 0b10})
+        timer = Timer(window)
+        with timer.transaction():
+            timer.enable = True
+            self.assertTrue(timer.enable)
+        self.assertEqual(window.values[0x8], 0b11)
+
+    def test_nested(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with timer.transaction():
+            timer.value = 0x1
+            with timer.transaction():
+                timer.reload_ = 0x2
+            self.assertEqual(window.writes, [])
+        self.assertEqual(window.writes, [(0xc, 0x1), (0x4, 0x2)])
+
+    def test_exception_drops_writes(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with self.assertRaises(ValueError):
+            with timer.transaction():
+                timer.value = 0x1
+                raise ValueError
+        self.assertEqual(window.writes, [])
+        timer.value = 0x2
+        self.assertEqual(window.writes, [(0xc, 0x2)])
+
+
+class ShadowCacheTestCase(unittest.TestCase):
+    def test_disabled(self):
+        window = CountingWindow({0x18: 4})
+        timer = Timer(window)
+        self.assertEqual(timer.width, 4)
+        self.assertEqual(timer.width, 4)
+        self.assertEqual(window.reads, [0x18, 0x18])
+
+    def test_static(self):
+        window = CountingWindow({0x0: 0x1248, 0x18: 4})
+        timer = Timer(window, shadow=True)
+        self.assertEqual(timer.creator_id, 0x1248)
+        self.assertEqual(timer.width, 4)
+        self.assertEqual(timer.width, 4)
+        self.assertEqual(timer.creator_id, 0x1248)
+        self.assertEqual(window.reads, [0x0, 0x18])
+
+    def test_write_through(self):
+        window = CountingWindow({0x8: 0b10, 0x18: 4})
+        timer = Timer(window, shadow=True)
+        timer.reload_ = 0x7
+        self.assertEqual(timer.reload_, 0x7)
+        timer.enable = True
+        timer.enable = False
+        self.assertFalse(timer.enable)
+        self.assertEqual(window.reads, [0x18, 0x8])
+        self.assertEqual(window.writes, [(0x4, 0x7), (0x8, 0b11), (0x8, 0b10)])
+
+    def test_write_through_width(self):
+        window = CountingWindow({0x18: 4})
+        timer = Timer(window, shadow=True)
+        timer.reload_ = 0x17
+        self.assertEqual(timer.reload_, 0x7)
+        self.assertEqual(window.reads, [0x18])
+
+    def test_write_through_unknown_width(self):
+        class Periph(Peripheral):
+            reg = VariableWidth(0x0, cache="write-through")
+
+        window = CountingWindow()
+        periph = Periph(window, shadow=True)
+        periph.reg = 0x17
+        window.values[0x0] = 0x7
+        self.assertEqual(periph.reg, 0x7)
+        self.assertEqual(window.reads, [0x0])
+
+    def test_shared_address(self):
+        class Periph(Peripheral):
+            flag = Bit(0x0, 0, cache="write-through")
+            word = VariableWidth(0x0, cache="write-through")
+
+            def __init__(self, memory_window):
+                super().__init__(memory_window, shadow=True)
+                self._width = 8
+
+        window = CountingWindow()
+        periph = Periph(window)
+        periph.flag = True
+        self.assertTrue(periph.flag)
+        periph.word = 0x1fe
+        self.assertEqual(periph.word, 0xfe)
+        self.assertFalse(periph.flag)
+        self.assertEqual(window.reads, [0x0, 0x0])
+
+    def test_volatile(self):
+        window = CountingWindow({0xc: 3})
+        timer = Timer(window, shadow=True)
+        timer.value = 5
+        self.assertEqual(timer.value, 5)
+        self.assertEqual(timer.value, 5)
+        self.assertEqual(window.reads, [0xc, 0xc])
+
+    def test_invalidate(self):
+        window = CountingWindow({0x18: 4})
+        timer = Timer(window, shadow=True)
+        self.assertEqual(timer.width, 4)
+        window.values[0x18] = 8
+        self.assertEqual(timer.width, 4)
+        timer.invalidate("width")
+        self.assertEqual(timer.width, 8)
+        window.values[0x18] = 16
+        timer.invalidate()
+        self.assertEqual(timer.width, 16)
+
+    def test_refresh(self):
+        window = CountingWindow({0x0: 0x1248, 0x4: 0x3, 0x8: 0x1, 0x18: 4})
+        timer = Timer(window, shadow=True)
+        timer.refresh()
+        self.assertEqual(sorted(window.reads), [0x0, 0x2, 0x4, 0x8, 0x18])
+        window.reads.clear()
+        self.assertEqual(timer.reload_, 0x3)
+        self.assertTrue(timer.enable)
+        self.assertEqual(window.reads, [])
+        window.values[0x4] = 0x5
+        timer.refresh("reload_")
+        self.assertEqual(timer.reload_, 0x5)
+
+    def test_refresh_without_shadow(self):
+        timer = Timer(CountingWindow())
+        with self.assertRaisesRegex(RuntimeError,
+                r"Peripheral <.*> does not have a shadow cache"):
+            timer.refresh()
+
+    def test_transaction_raise_invalidates(self):
+        window = CountingWindow()
+        timer = Timer(window, shadow=True)
+        timer.reload_ = 0x1
+        with self.assertRaises(ValueError):
+            with timer.transaction():
+                timer.reload_ = 0x2
+                raise ValueError
+        self.assertEqual(timer.reload_, 0x1)
+
+    def test_cache_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Invalid cache policy 'foo'; must be one of static, write-through, volatile"):
+            Bit(0x0, 0, cache="foo")
+
+
+class LayoutTestCase(unittest.TestCase):
+    def test_timer(self):
+        self.assertEqual([(f.name, f.address, f.position, f.width, f.access)
+                          for f in Timer._layout], [
+            ("creator_id",   0x00, 0, 16,       "r"),
+            ("creation_id",  0x02, 0, 16,       "r"),
+            ("reload_",      0x04, 0, "_width", "rw"),
+            ("enable",       0x08, 0, 1,        "rw"),
+            ("value",        0x0c, 0, "_width", "rw"),
+            ("event_enable", 0x10, 0, None,     "rw"),
+            ("event_status", 0x14, 0, None,     "rw"),
+            ("zero",         0x14, 0, 1,        "r"),
+            ("width",        0x18, 0, 32,       "r"),
+        ])
+        self.assertIs(Timer._fields["enable"].register, Timer.enable)
+
+    def test_subclass(self):
+        class Base(Peripheral):
+            b = Bit(0x4, 1)
+            a = Bit(0x4, 0)
+            c = VariableWidth(0x0)
+
+        class Derived(Base):
+            c = None
+            d = Bit(0x8, 0)
+
+        self.assertEqual([f.name for f in Base._layout], ["c", "a", "b"])
+        self.assertEqual([f.name for f in Derived._layout], ["a", "b", "d"])
+        self.assertEqual(Peripheral._layout, ())
+
+
+class TraceTestCase(unittest.TestCase):
+    def test_counts(self):
+        window = CountingWindow({0x18: 4})
+        timer = Timer(window, shadow=True)
+        with timer.trace() as trace:
+            timer.width
+            timer.width
+            timer.value = 3
+            timer.value
+            timer.enable = True
+        self.assertEqual(trace.name, "Timer")
+        self.assertEqual((trace.registers["width"].reads, trace.registers["width"].hits), (1, 1))
+        self.assertEqual(trace.registers["value"].writes, 1)
+        self.assertEqual(trace.registers["value"].reads, 1)
+        self.assertEqual(trace.registers["enable"].reads, 1)
+        self.assertEqual(trace.registers["enable"].writes, 1)
+        self.assertEqual(trace.addresses[0x8].reads, 1)
+        self.assertEqual(trace.addresses[0x8].writes, 1)
+        self.assertEqual(trace.addresses[0xc].reads, 1)
+        self.assertEqual(sum(trace.registers["value"].histogram.values()), 2)
+
+        timer.value
+        self.assertEqual(trace.registers["value"].reads, 1)
+        self.assertIs(timer._memory_window, window)
+
+    def test_transaction(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with timer.trace() as trace:
+            with timer.transaction():
+                timer.enable = True
+                timer.reload_ = 1
+        self.assertEqual(trace.registers["enable"].writes, 1)
+        self.assertEqual(trace.addresses[0x8].reads, 1)
+        self.assertEqual(trace.addresses[0x8].writes, 1)
+        self.assertEqual(trace.addresses[0x4].writes, 1)
+
+    def test_bytes(self):
+        timer = Timer(CountingWindow())
+        with timer.trace() as trace:
+            timer.creator_id
+            timer.enable = True
+            timer.value
+        self.assertEqual(trace.registers["creator_id"].bytes, 2)
+        self.assertEqual(trace.registers["enable"].bytes, 2)
+        self.assertEqual(trace.registers["value"].bytes, 4)
+        self.assertEqual(trace.addresses[0x8].bytes, 8)
+
+    def test_within_transaction(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with timer.transaction():
+            with timer.trace() as trace:
+                timer.enable = True
+                timer.enable = False
+                self.assertEqual(window.reads, [])
+            self.assertIsInstance(timer._memory_window._memory_window, CountingWindow)
+            with timer.trace() as trace:
+                timer.enable = True
+                with timer.transaction():
+                    timer.reload_ = 1
+        self.assertEqual(window.reads, [0x8])
+        self.assertEqual(window.writes, [(0x8, 0x1), (0x4, 0x1)])
+        self.assertEqual(trace.registers["enable"].writes, 1)
+        self.assertNotIn(0x8, trace.addresses)
+
+    def test_batch(self):
+        class BatchWindow(CountingWindow):
+            def __init__(self):
+                super().__init__()
+                self.batches = []
+            def read_many(self, addresses):
+                self.batches.append(("read", list(addresses)))
+                return [self.values.get(address, 0) for address in addresses]
+            def write_many(self, writes):
+                writes = list(writes)
+                self.batches.append(("write", writes))
+                self.values.update(writes)
+
+        window = BatchWindow()
+        timer = Timer(window)
+        with timer.trace() as trace:
+            with timer.transaction():
+                timer.enable = True
+                timer.reload_ = 0x3
+        self.assertEqual(window.batches, [("read", [0x8]), ("write", [(0x8, 0x1), (0x4, 0x3)])])
+        self.assertEqual(window.reads, [])
+        self.assertEqual(trace.addresses[0x8].reads, 1)
+        self.assertEqual(trace.addresses[0x8].writes, 1)
+        self.assertEqual(trace.addresses[0x4].bytes, 4)
+
+    def test_block(self):
+        timer = Timer(bytearray(0x20))
+        with timer.trace() as trace:
+            try:
+                timer.snapshot()
+            except ImportError:
+                self.skipTest("NumPy is not installed")
+        self.assertEqual(trace.addresses[0x0].bytes, 0x1c)
+
+    def test_report(self):
+        timer = Timer(CountingWindow())
+        with timer.trace() as trace:
+            timer.value
+        output = io.StringIO()
+        trace.report(output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "Timer")
+        self.assertEqual(lines[1].split(), ["reads", "writes", "hits", "bytes", "mean", "us"])
+        self.assertEqual(lines[2].split()[:5], ["value", "1", "0", "0", "4"])
+        self.assertEqual(lines[3].split()[:6], ["0x000c", "value", "1", "0", "0", "4"])
+
+    def test_custom_tracer(self):
+        class Tracer:
+            def __init__(self):
+                self.accesses = []
+            def register_access(self, name, kind, seconds=0.):
+                self.accesses.append((name, kind))
+            def window_access(self, address, kind, nbytes, seconds):
+                self.accesses.append((address, kind))
+
+        timer = Timer(CountingWindow())
+        with timer.trace(Tracer()) as tracer:
+            timer.value = 1
+        self.assertEqual(tracer.accesses, [(0xc, "write"), ("value", "write")])
+
+    def test_statistics_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Invalid access kind 'foo'; must be one of read, write, hit"):
+            AccessStatistics().add("foo", 0, 0.)
+
+
+class LatencyWindow:
+    """Asynchronous memory window with a fixed latency per access."""
+    def __init__(self, values=None, latency=0.01):
+        self.values    = dict(values or {})
+        self.latency   = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _access(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+
+    async def read(self, address):
+        await self._access()
+        return self.values.get(address, 0)
+
+    async def write(self, address, value):
+        await self._access()
+        self.values[address] = value
+
+
+class AsyncTestCase(unittest.TestCase):
+    def test_read_write(self):
+        window = LatencyWindow({0x0: 0x1248, 0x8: 0b10})
+        timer = Timer(window)
+        async def process():
+            self.assertEqual(await timer.aread("creator_id"), 0x1248)
+            await timer.awrite("value", 0xe)
+            await timer.awrite("enable", True)
+            self.assertTrue(await timer.aread("enable"))
+            self.assertEqual(await timer.aread("value"), 0xe)
+        asyncio.run(process())
+        self.assertEqual(window.values[0x8], 0b11)
+
+    def test_in_flight(self):
+        windows = [LatencyWindow({0xc: i}) for i in range(10)]
+        timers = [Timer(window) for window in windows]
+        async def process():
+            return await asyncio.gather(*(timer.aread("value") for timer in timers))
+        self.assertEqual(asyncio.run(process()), list(range(10)))
+        window = windows[0]
+        timer = timers[0]
+        async def process():
+            await asyncio.gather(timer.aread("value"), timer.aread("reload_"))
+        asyncio.run(process())
+        self.assertEqual(window.max_in_flight, 2)
+
+    def test_shadow(self):
+        window = LatencyWindow({0x18: 4})
+        timer = Timer(window, shadow=True)
+        async def process():
+            self.assertEqual(await timer.aread("width"), 4)
+            window.values[0x18] = 8
+            self.assertEqual(await timer.aread("width"), 4)
+        asyncio.run(process())
+
+    def test_concurrent_bits(self):
+        class Periph(Peripheral):
+            a = Bit(0x0, 0)
+            b = Bit(0x0, 1)
+
+        window = LatencyWindow()
+        periph = Periph(window)
+        async def process():
+            await asyncio.gather(periph.awrite("a", True), periph.awrite("b", True))
+        asyncio.run(process())
+        self.assertEqual(window.values[0x0], 0b11)
+        asyncio.run(process())
+        self.assertEqual(window.values[0x0], 0b11)
+
+    def test_trace(self):
+        window = LatencyWindow({0x18: 4}, latency=0)
+        timer = Timer(window, shadow=True)
+        async def process():
+            await timer.aread("width")
+            await timer.aread("width")
+            await timer.awrite("enable", True)
+        with timer.trace() as trace:
+            asyncio.run(process())
+        self.assertEqual((trace.registers["width"].reads, trace.registers["width"].hits), (1, 1))
+        self.assertEqual((trace.registers["enable"].reads, trace.registers["enable"].writes),
+                         (1, 1))
+        self.assertIs(timer._memory_window, window)
+
+    def test_read_only(self):
+        timer = Timer(LatencyWindow())
+        with self.assertRaisesRegex(AttributeError, r"Register 'width' is read-only"):
+            asyncio.run(timer.awrite("width", 1))
+
+    def test_adapter(self):
+        window = CountingWindow({0xc: 5})
+        async_window = AsyncWindow(window)
+        timer = Timer(async_window)
+        async def process():
+            self.assertEqual(await timer.aread("value"), 5)
+            await timer.awrite("enable", True)
+        asyncio.run(process())
+        async_window.close()
+        self.assertEqual(window.writes, [(0x8, 0x1)])
+
+    def test_adapter_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Maximum number of accesses in flight must be a positive integer, not 0"):
+            AsyncWindow(CountingWindow(), max_in_flight=0)
+
+
+class CountdownWindow(CountingWindow):
+    """Memory window whose timer counts down by one on every read, and sets the zero event when it
+    gets there."""
+    def __getitem__(self, address):
+        if self.values[0xc] > 0:
+            self.values[0xc] -= 1
+            if self.values[0xc] == 0:
+                self.values[0x14] = 0x1
+        return super().__getitem__(address)
+
+
+class IdleWindow(CountingWindow):
+    """Simulated memory window, counting clock cycles of idleness."""
+    def __init__(self, values=None, zero_at=0):
+        super().__init__(values)
+        self.cycles  = 0
+        self.zero_at = zero_at
+        self.strides = []
+
+    def idle(self, cycles):
+        self.strides.append(cycles)
+        self.cycles += cycles
+        if self.cycles >= self.zero_at:
+            self.values[0x14] = 0x1
+
+
+class IRQWindow(CountingWindow):
+    def __init__(self, values=None):
+        super().__init__(values)
+        self.waits = []
+
+    def wait_irq(self, timeout):
+        self.waits.append(timeout)
+        self.values[0x14] = 0x1
+
+
+class WaitTestCase(unittest.TestCase):
+    def test_wait_for(self):
+        window = CountdownWindow({0xc: 5})
+        timer = Timer(window)
+        self.assertEqual(timer.wait_until("value", lambda value: value < 3), 2)
+        timer.wait_for(Timer.zero)
+        self.assertEqual(window.values[0xc], 0)
+
+    def test_backoff(self):
+        window = CountingWindow()
+        timer = Timer(window)
+        with self.assertRaisesRegex(TimeoutError,
+                r"Register 'zero' did not reach the expected value within 0.2 seconds"):
+            timer.wait_for("zero", timeout=0.2)
+        self.assertLess(len(window.reads), 50)
+
+    def test_idle(self):
+        window = IdleWindow(zero_at=10000)
+        timer = Timer(window)
+        timer.wait_for(Timer.zero)
+        self.assertEqual(window.strides[:3], [16, 32, 64])
+        self.assertEqual(max(window.strides), 4096)
+        self.assertEqual(len(window.reads), len(window.strides) + 1)
+
+    def test_wait_irq(self):
+        window = IRQWindow()
+        timer = Timer(window)
+        with timer.trace():
+            timer.wait_for("zero", timeout=1.)
+        self.assertEqual(len(window.waits), 1)
+        self.assertLessEqual(window.waits[0], 1.)
+
+    def test_bypass_shadow(self):
+        window = CountingWindow({0x8: 0x0})
+        timer = Timer(window, shadow=True)
+        self.assertFalse(timer.enable)
+        window.values[0x8] = 0x1
+        self.assertTrue(timer.wait_until("enable", bool, timeout=1.))
+
+
+try:
+    import numpy
+    from ..peripheral.snapshot import snapshot_all
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class SnapshotTestCase(unittest.TestCase):
+    def timer_memory(self, reload_, enable, value, width):
+        return bytearray(struct.pack("<HHIIIIII", 0x1248, 0x0000, reload_, enable, value,
+                                     0x0, 0x1, width))
+
+    def test_snapshot(self):
+        timer = Timer(self.timer_memory(0xf, 0x1, 0x7, 32))
+        snapshot = timer.snapshot()
+        self.assertEqual(snapshot["creator_id"], 0x1248)
+        self.assertEqual(snapshot["creation_id"], 0x0000)
+        self.assertEqual(snapshot["reload_"], 0xf)
+        self.assertEqual(snapshot["enable"], True)
+        self.assertEqual(snapshot["value"], 0x7)
+        self.assertEqual(snapshot["zero"], True)
+        self.assertEqual(snapshot["width"], 32)
+
+    def test_snapshot_all(self):
+        timers = [Timer(self.timer_memory(i, i % 2, 0xffffffff - i, 32)) for i in range(5)]
+        snapshot = snapshot_all(timers)
+        self.assertEqual(snapshot.shape, (5,))
+        self.assertEqual(list(snapshot["reload_"]), [0, 1, 2, 3, 4])
+        self.assertEqual(list(snapshot["enable"]), [False, True, False, True, False])
+        self.assertEqual(list(snapshot["value"]), [0xffffffff - i for i in range(5)])
+        self.assertEqual(snapshot.dtype["enable"], numpy.bool_)
+        self.assertEqual(snapshot.dtype["creator_id"], numpy.uint16)
+
+    def test_snapshot_words(self):
+        window = CountingWindow({0x0: 0x1248, 0x4: 0xf, 0x8: 0x1, 0xc: 0x7, 0x14: 0x1,
+                                 0x18: 32})
+        snapshot = Timer(window).snapshot()
+        self.assertEqual(snapshot["creator_id"], 0x1248)
+        self.assertEqual(snapshot["reload_"], 0xf)
+        self.assertEqual(snapshot["enable"], True)
+        self.assertEqual(snapshot["value"], 0x7)
+        self.assertEqual(snapshot["zero"], True)
+        self.assertEqual(sorted(window.reads), [0x0, 0x2, 0x4, 0x8, 0xc, 0x10, 0x14, 0x18])
+
+    def test_snapshot_byteorder(self):
+        class BigEndianMemory(bytearray):
+            byteorder = "big"
+
+        memory = BigEndianMemory(struct.pack(">HHIIIIII", 0x1248, 0x0001, 0xf, 0x1, 0x7,
+                                             0x0, 0x1, 32))
+        snapshot = Timer(memory).snapshot()
+        self.assertEqual(snapshot["creation_id"], 0x0001)
+        self.assertEqual(snapshot["reload_"], 0xf)
+        self.assertEqual(snapshot["enable"], True)
+        self.assertEqual(snapshot["width"], 32)
+
+    def test_snapshot_all_mixed(self):
+        class Other(Peripheral):
+            a = Bit(0x0, 0)
+        with self.assertRaisesRegex(TypeError, r"Peripherals must all be instances of Timer"):
+            snapshot_all([Timer(bytearray(0x20)), Other(bytearray(0x4))])
+
+    def test_snapshot_all_empty(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Cannot snapshot an empty list of peripherals"):
+            snapshot_all([])
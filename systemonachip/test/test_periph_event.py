@@ -4,16 +4,10 @@ import unittest
 from nmigen import *
 from nmigen.back.pysim import *
 
+from ._simulation import simulation_test
 from ..periph.event import *
 
 
-def simulation_test(dut, process):
-    with Simulator(dut, vcd_file=open("test.vcd", "w")) as sim:
-        sim.add_clock(1e-6)
-        sim.add_sync_process(process)
-        sim.run()
-
-
 class EventSourceTestCase(unittest.TestCase):
     def test_simple(self):
         ev = EventSource()
@@ -135,4 +129,4 @@ class InterruptSourceTestCase(unittest.TestCase):
             yield
             self.assertEqual((yield dut.irq), 0)
 
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
@@ -5,6 +5,7 @@ import unittest
 from nmigen import *
 from nmigen.back.pysim import *
 
+from ._simulation import simulation_test
 from ..periph import IRQLine
 from ..periph.intc import *
 
@@ -103,6 +104,4 @@ class GenericInterruptControllerTestCase(unittest.TestCase):
             yield Delay(1e-6)
             self.assertEqual((yield dut.ip), 0b11)
 
-        with Simulator(dut, vcd_file=open("test.vcd", "w")) as sim:
-            sim.add_process(process)
-            sim.run()
+        simulation_test(dut, process, name=self.id(), clock=False)
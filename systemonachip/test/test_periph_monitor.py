@@ -0,0 +1,86 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from nmigen import *
+from nmigen_soc import csr, wishbone
+from nmigen_soc.memory import MemoryMap
+
+from ..peripheral.memory import RandomAccessMemory
+from ..peripheral.monitor import BusMonitor
+from ..sim import *
+
+
+class MonitoredMemory(Elaboratable):
+    def __init__(self):
+        self.bus = wishbone.Interface(addr_width=4, data_width=32, granularity=8,
+                                      features={"cti", "bte", "err"})
+        self.bus.memory_map = MemoryMap(addr_width=6, data_width=8)
+        self.ram = RandomAccessMemory(self.bus, size=64, name="ram")
+        self.csr_bus = csr.Interface(addr_width=8, data_width=8)
+        self.monitor = BusMonitor(self.csr_bus, tap=self.bus)
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.ram     = self.ram
+        m.submodules.monitor = self.monitor
+        return m
+
+
+class BusMonitorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dut = MonitoredMemory()
+        self.sim = create_simulator(self.dut)
+        self.sim.add_clock(1e-6)
+        self.monitor = BusMonitor(CSRSimulatorBus(self.sim, self.dut.csr_bus))
+
+    def test_counters(self):
+        bus = WishboneSimulatorBus(self.sim, self.dut.bus)
+        self.monitor.enable = True
+        bus.write_many([(0x0, 0x1), (0x4, 0x2)])
+        bus.read_many([0x0, 0x4])
+        self.monitor.enable = False
+        self.assertEqual(self.monitor.transactions, 4)
+        self.assertEqual(self.monitor.burst_beats, 0)
+        self.assertEqual(self.monitor.errors, 0)
+        # Every single transfer is acknowledged on the cycle after its request.
+        self.assertEqual(self.monitor.wait_states, 4)
+        self.assertGreaterEqual(self.monitor.busy_cycles, 8)
+        self.assertGreater(self.monitor.cycles, self.monitor.busy_cycles)
+
+    def test_bursts(self):
+        self.monitor.enable = True
+        results = []
+        def process():
+            results.append((yield from wb_burst_read(self.dut.bus, 0, 4)))
+        self.sim.add_sync_process(process)
+        while not results:
+            self.sim.advance()
+        self.monitor.enable = False
+        self.assertEqual(self.monitor.burst_beats, 4)
+
+    def test_disabled(self):
+        bus = WishboneSimulatorBus(self.sim, self.dut.bus)
+        bus.write_many([(0x0, 0x1)])
+        self.assertEqual(self.monitor.transactions, 0)
+        self.assertEqual(self.monitor.cycles, 0)
+
+    def test_clear(self):
+        bus = WishboneSimulatorBus(self.sim, self.dut.bus)
+        self.monitor.enable = True
+        bus.write_many([(0x0, 0x1)])
+        self.monitor.enable = False
+        self.assertEqual(self.monitor.transactions, 1)
+        self.monitor.clear = True
+        self.assertEqual(self.monitor.transactions, 0)
+        self.assertEqual(self.monitor.cycles, 0)
+
+    def test_wrong_tap(self):
+        with self.assertRaisesRegex(TypeError,
+                r"Tapped bus must be an instance of wishbone.Interface, not 'foo'"):
+            BusMonitor(csr.Interface(addr_width=8, data_width=8), tap="foo")
+
+    def test_wrong_width(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Counter width cannot be greater than 32 \(was: 33\)"):
+            BusMonitor(csr.Interface(addr_width=8, data_width=8), tap=self.dut.bus, width=33)
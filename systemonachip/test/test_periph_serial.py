@@ -4,6 +4,7 @@ from nmigen import *
 from nmigen.lib.io import pin_layout
 from nmigen.back.pysim import *
 
+from ._simulation import simulation_test
 from ._wishbone import *
 from ..periph.serial import AsyncSerialPeripheral
 
@@ -51,7 +52,4 @@ class AsyncSerialPeripheralTestCase(unittest.TestCase):
             self.assertEqual(rx_data, 0xab)
             yield
 
-        with Simulator(m, vcd_file=open("test.vcd", "w")) as sim:
-            sim.add_clock(1e-6)
-            sim.add_sync_process(process)
-            sim.run()
+        simulation_test(m, process, name=self.id())
@@ -5,17 +5,11 @@ import unittest
 from nmigen import *
 from nmigen.back.pysim import *
 
+from ._simulation import simulation_test
 from ._wishbone import *
 from ..periph.timer import TimerPeripheral
 
 
-def simulation_test(dut, process):
-    with Simulator(dut, vcd_file=open("test.vcd", "w")) as sim:
-        sim.add_clock(1e-6)
-        sim.add_sync_process(process)
-        sim.run()
-
-
 reload_addr     = 0x00 >> 2
 en_addr         = 0x04 >> 2
 ctr_addr        = 0x08 >> 2
@@ -49,7 +43,7 @@ class TimerPeripheralTestCase(unittest.TestCase):
                 yield
             ctr = yield from wb_read(dut.bus, addr=ctr_addr, sel=0xf)
             self.assertEqual(ctr, 0)
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
 
     def test_irq(self):
         dut = TimerPeripheral(width=4)
@@ -69,7 +63,7 @@ class TimerPeripheralTestCase(unittest.TestCase):
                     self.assertEqual(ctr, 0)
                 yield
             self.assertTrue(done)
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
 
     def test_reload(self):
         dut = TimerPeripheral(width=4)
@@ -91,4 +85,4 @@ class TimerPeripheralTestCase(unittest.TestCase):
             # not an accurate measure, since each call to wb_write() adds a few cycles,
             # but we can at least check that reloading the timer works.
             self.assertEqual(irqs, 2)
-        simulation_test(dut, process)
+        simulation_test(dut, process, name=self.id())
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from .__main__ import run
+
+
+class RunnerTestCase(unittest.TestCase):
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            artifacts = os.path.join(directory, "artifacts")
+            report = run(["systemonachip.test.test_model"], patterns=[r"ModelBus|RandomAccess"],
+                         jobs=2, artifacts=artifacts)
+            self.assertEqual(report["jobs"], 2)
+            ids = sorted(record["id"] for record in report["tests"])
+            self.assertEqual(ids, [
+                "systemonachip.test.test_model.ModelBusTestCase.test_decode",
+                "systemonachip.test.test_model.RandomAccessMemoryModelTestCase.test_out_of_range",
+                "systemonachip.test.test_model.RandomAccessMemoryModelTestCase.test_read_only",
+                "systemonachip.test.test_model.RandomAccessMemoryModelTestCase.test_read_write",
+                "systemonachip.test.test_model.RandomAccessMemoryModelTestCase.test_wrong_size",
+            ])
+            for record in report["tests"]:
+                self.assertEqual(record["outcome"], "success")
+                self.assertEqual(record["cycles"], 0)
+                self.assertIsNone(record["artifacts"])
+            wall_times = [record["wall_time"] for record in report["tests"]]
+            self.assertEqual(wall_times, sorted(wall_times, reverse=True))
+            self.assertEqual(os.listdir(artifacts), [])
+
+    def test_cycles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report = run(["systemonachip.test.test_sim"],
+                         patterns=[r"SimulatorBackendTestCase\.test_create$"],
+                         jobs=1, artifacts=os.path.join(directory, "artifacts"))
+            [record] = report["tests"]
+            self.assertEqual(record["id"],
+                "systemonachip.test.test_sim.SimulatorBackendTestCase.test_create")
+            self.assertEqual(record["outcome"], "success")
+            self.assertGreater(record["cycles"], 0)
+
+    def test_wrong_jobs(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Number of jobs must be a positive integer, not 0"):
+            run([], jobs=0)
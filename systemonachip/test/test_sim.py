@@ -0,0 +1,413 @@
+# nmigen: UnusedElaboratable=no
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from nmigen import *
+from nmigen.utils import log2_int
+from nmigen.hdl.ir import Fragment
+from nmigen.back.pysim import *
+
+from nmigen_soc import csr, wishbone
+from nmigen_soc.memory import MemoryMap
+
+from ..peripheral.memory import RandomAccessMemory
+from ..sim import *
+
+
+class CSRRegisters(Elaboratable):
+    def __init__(self):
+        self.reg   = csr.Element(32, "rw")
+        self.const = csr.Element(16, "r")
+        self._mux  = csr.Multiplexer(addr_width=8, data_width=8)
+        self._mux.add(self.reg,   addr=0x0)
+        self._mux.add(self.const, addr=0x4)
+        self.bus   = self._mux.bus
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.mux = self._mux
+        value = Signal(32)
+        with m.If(self.reg.w_stb):
+            m.d.sync += value.eq(self.reg.w_data)
+        m.d.comb += [
+            self.reg.r_data.eq(value),
+            self.const.r_data.eq(0xbeef),
+        ]
+        return m
+
+
+class WishboneMemory(Elaboratable):
+    def __init__(self):
+        self.bus  = wishbone.Interface(addr_width=4, data_width=32, granularity=8)
+        self._mem = Memory(width=32, depth=16)
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.rdport = rdport = self._mem.read_port()
+        m.submodules.wrport = wrport = self._mem.write_port(granularity=8)
+        m.d.comb += [
+            rdport.addr.eq(self.bus.adr),
+            wrport.addr.eq(self.bus.adr),
+            wrport.data.eq(self.bus.dat_w),
+            self.bus.dat_r.eq(rdport.data),
+        ]
+        with m.If(self.bus.cyc & self.bus.stb & self.bus.we & ~self.bus.ack):
+            m.d.comb += wrport.en.eq(self.bus.sel)
+        m.d.sync += self.bus.ack.eq(self.bus.cyc & self.bus.stb & ~self.bus.ack)
+        return m
+
+
+def simulator(dut):
+    sim = create_simulator(dut)
+    sim.add_clock(1e-6)
+    return sim
+
+
+class CSRSimulatorBusTestCase(unittest.TestCase):
+    def test_read_write(self):
+        dut = CSRRegisters()
+        bus = CSRSimulatorBus(simulator(dut), dut.bus)
+        self.assertEqual(bus[0x4], 0xbeef)
+        bus[0x0] = 0x12345678
+        self.assertEqual(bus[0x0], 0x12345678)
+
+    def test_back_to_back(self):
+        dut = CSRRegisters()
+        bus = CSRSimulatorBus(simulator(dut), dut.bus)
+        bus.write_many([(0x0, 0xcafe)])
+        start = bus.cycles
+        self.assertEqual(bus.read_many([0x0, 0x4] * 4), [0xcafe, 0xbeef] * 4)
+        # One cycle per byte, plus the latencies of the preceding write and of the last read.
+        self.assertLessEqual(bus.cycles - start, 8 * 4 + 3)
+
+    def test_queue(self):
+        dut = CSRRegisters()
+        bus = CSRSimulatorBus(simulator(dut), dut.bus)
+        bus.queue_write(0x0, 0x1)
+        read = bus.queue_read(0x0)
+        with self.assertRaisesRegex(RuntimeError,
+                r"Read has not completed yet; flush the bus first"):
+            read.value
+        bus.flush()
+        self.assertTrue(read.done)
+        self.assertEqual(read.value, 0x1)
+
+    def test_idle(self):
+        dut = CSRRegisters()
+        bus = CSRSimulatorBus(simulator(dut), dut.bus)
+        bus.idle(100)
+        self.assertEqual(bus.cycles, 100)
+
+    def test_wrong_bus(self):
+        with self.assertRaisesRegex(TypeError,
+                r"Bus must be an instance of csr.Interface, not 'foo'"):
+            CSRSimulatorBus(simulator(CSRRegisters()), "foo")
+
+
+class WishboneSimulatorBusTestCase(unittest.TestCase):
+    def test_read_write(self):
+        dut = WishboneMemory()
+        bus = WishboneSimulatorBus(simulator(dut), dut.bus)
+        bus.write_many([(0x0, 0x11223344), (0x4, 0x55667788)])
+        self.assertEqual(bus.read_many([0x0, 0x4]), [0x11223344, 0x55667788])
+
+    def test_unaligned(self):
+        dut = WishboneMemory()
+        bus = WishboneSimulatorBus(simulator(dut), dut.bus)
+        bus.write_many([(0x0, 0x11223344), (0x4, 0x55667788)])
+        self.assertEqual(bus[0x2], 0x77881122)
+        bus[0x2] = 0xaaaabbbb
+        self.assertEqual(bus.read_many([0x0, 0x4]), [0xbbbb3344, 0x5566aaaa])
+
+    def test_back_to_back(self):
+        dut = WishboneMemory()
+        bus = WishboneSimulatorBus(simulator(dut), dut.bus)
+        start = bus.cycles
+        bus.read_many(range(0x0, 0x40, 0x4))
+        self.assertLessEqual(bus.cycles - start, 16 * 2 + 1)
+
+    def test_timeout(self):
+        dut = WishboneMemory()
+        bus = wishbone.Interface(addr_width=4, data_width=32)
+        window = WishboneSimulatorBus(simulator(dut), bus, timeout=4)
+        with self.assertRaisesRegex(RuntimeError, r"Wishbone transaction timed out"):
+            window[0x0]
+
+    def test_pipelined(self):
+        bus = wishbone.Interface(addr_width=4, data_width=32, granularity=8, features={"stall"})
+        bus.memory_map = MemoryMap(addr_width=6, data_width=8)
+        dut = RandomAccessMemory(bus, size=64, name="ram")
+        window = WishboneSimulatorBus(simulator(dut), bus)
+        window.write_many([(address, address * 0x01010101) for address in range(0x0, 0x40, 0x4)])
+        start = window.cycles
+        self.assertEqual(window.read_many(range(0x0, 0x40, 0x4)),
+                         [address * 0x01010101 for address in range(0x0, 0x40, 0x4)])
+        # One request per cycle, plus the latency of the last acknowledgement.
+        self.assertLessEqual(window.cycles - start, 16 + 2)
+        window[0x2] = 0xaaaabbbb
+        self.assertEqual(window.read_many([0x0, 0x4]), [0xbbbb0000, 0x0404aaaa])
+
+    def test_wrong_bus(self):
+        with self.assertRaisesRegex(TypeError,
+                r"Bus must be an instance of wishbone.Interface, not 'foo'"):
+            WishboneSimulatorBus(simulator(WishboneMemory()), "foo")
+
+
+class BurstTestCase(unittest.TestCase):
+    def ram(self, size=16):
+        bus = wishbone.Interface(addr_width=log2_int(size), data_width=8,
+                                 features={"cti", "bte"})
+        bus.memory_map = MemoryMap(addr_width=log2_int(size), data_width=8)
+        return RandomAccessMemory(bus, size=size, data_width=8, name="ram")
+
+    def run_process(self, dut, process):
+        sim = simulator(dut)
+        sim.add_sync_process(process)
+        sim.run()
+
+    def test_read_wrap(self):
+        dut = self.ram()
+        dut.init = list(range(16))
+        def process():
+            for wrap in (4, 8, 16):
+                result = yield from wb_burst_read(dut.bus, 0x6, 2 * wrap, wrap=wrap)
+                base = 0x6 & ~(wrap - 1)
+                expected = [base + (0x6 + i) % wrap for i in range(wrap)]
+                self.assertEqual(result.data, 2 * expected)
+        self.run_process(dut, process)
+
+    def test_write_read(self):
+        dut = self.ram()
+        def process():
+            result = yield from wb_burst_write(dut.bus, 0x2, [0xa0 + i for i in range(6)])
+            self.assertEqual(result.beats, 6)
+            self.assertEqual(result.data, [])
+            result = yield from wb_burst_read(dut.bus, 0x0, 16)
+            self.assertEqual(result.data, [0, 0] + [0xa0 + i for i in range(6)] + [0] * 8)
+        self.run_process(dut, process)
+
+    def test_cycles_per_beat(self):
+        dut = self.ram()
+        def process():
+            result = yield from wb_burst_read(dut.bus, 0x0, 32, wrap=16)
+            self.assertEqual(result.cycles, 33)
+            self.assertLess(result.cycles_per_beat, 1.1)
+        self.run_process(dut, process)
+
+    def test_wrong_wrap(self):
+        dut = self.ram()
+        with self.assertRaisesRegex(ValueError,
+                r"Burst wrap must be one of 0, 4, 8, 16, not 2"):
+            list(wb_burst_read(dut.bus, 0x0, 4, wrap=2))
+
+
+class Counter(Elaboratable):
+    def __init__(self, extra=False):
+        self.count  = Signal(8, name="count")
+        self.memory = Memory(width=8, depth=4)
+        self.extra  = extra
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.wrport = wrport = self.memory.write_port()
+        m.d.sync += self.count.eq(self.count + 1)
+        m.d.comb += [
+            wrport.addr.eq(self.count[:2]),
+            wrport.data.eq(self.count),
+            wrport.en.eq(1),
+        ]
+        if self.extra:
+            extra = Signal(name="extra")
+            m.d.sync += extra.eq(~extra)
+        return m
+
+
+class CheckpointTestCase(unittest.TestCase):
+    def warm_up(self, cycles):
+        dut = Counter()
+        fragment = Fragment.get(dut, platform=None)
+        sim = simulator(fragment)
+        result = []
+        def process():
+            for _ in range(cycles):
+                yield
+            result.append((yield from Checkpoint.save(fragment)))
+        sim.add_sync_process(process)
+        sim.run()
+        return result[0]
+
+    def test_save(self):
+        checkpoint = self.warm_up(6)
+        self.assertEqual(list(checkpoint.signals.values()), [6])
+        self.assertEqual(list(checkpoint.memories.values()), [[4, 5, 2, 3]])
+
+    def test_restore(self):
+        checkpoint = self.warm_up(6)
+        for _ in range(2):
+            dut = Counter()
+            fragment = Fragment.get(dut, platform=None)
+            sim = simulator(fragment)
+            def restore():
+                yield from checkpoint.restore(fragment)
+            def process():
+                self.assertEqual((yield dut.count), 6)
+                self.assertEqual((yield dut.memory[1]), 5)
+                yield
+                self.assertEqual((yield dut.count), 7)
+                self.assertEqual((yield dut.memory[2]), 6)
+            sim.add_process(restore)
+            sim.add_sync_process(process)
+            sim.run()
+
+    def test_dump_load(self):
+        checkpoint = self.warm_up(3)
+        file = io.StringIO()
+        checkpoint.dump(file)
+        file.seek(0)
+        loaded = Checkpoint.load(file)
+        self.assertEqual(loaded.signals, checkpoint.signals)
+        self.assertEqual(loaded.memories, checkpoint.memories)
+
+    def test_mismatch(self):
+        checkpoint = self.warm_up(1)
+        fragment = Fragment.get(Counter(extra=True), platform=None)
+        with self.assertRaisesRegex(ValueError,
+                r"Checkpoint does not match the design; differing state: top\.extra"):
+            list(checkpoint.restore(fragment))
+
+    def test_wrong_fragment(self):
+        with self.assertRaisesRegex(TypeError,
+                r"Checkpoints must be taken of an elaborated Fragment, not 'foo'"):
+            list(Checkpoint.save("foo"))
+
+
+class WaveformCaptureTestCase(unittest.TestCase):
+    def capture(self, cycles, **kwargs):
+        dut = Counter()
+        fragment = Fragment.get(dut, platform=None)
+        sim = simulator(fragment)
+        def process():
+            for _ in range(cycles):
+                yield
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "test.vcd.gz")
+            with WaveformCapture(fragment, file, **kwargs) as capture:
+                sim.add_sync_process(process)
+                capture.add_to(sim)
+                sim.run()
+            with gzip.open(file, "rt") as f:
+                return f.read()
+
+    def test_window(self):
+        vcd = self.capture(10, signals=["top.count"], start=2, stop=5)
+        header, _, changes = vcd.partition("$enddefinitions $end\n")
+        self.assertIn("$scope module top $end\n$var wire 8 ! count $end\n$upscope $end\n",
+                      header)
+        self.assertEqual(changes.split(),
+                         ["#2000000", "b10", "!", "#3000000", "b11", "!",
+                          "#4000000", "b100", "!", "#5000000"])
+
+    def test_filter(self):
+        vcd = self.capture(2, signals=["*.count"])
+        self.assertEqual(vcd.count("$var "), 1)
+
+    def test_trigger(self):
+        vcd = self.capture(8, signals=["top.count"], trigger="top.count")
+        self.assertTrue(vcd.split("$enddefinitions $end\n")[1].startswith("#1000000\nb1 !\n"))
+
+    def test_domain(self):
+        m = Module()
+        m.domains.slow = ClockDomain("slow")
+        fast = Signal(8, name="fast")
+        slow = Signal(8, name="slow")
+        m.d.sync += fast.eq(fast + 1)
+        m.d.slow += slow.eq(slow + 1)
+        fragment = Fragment.get(m, platform=None)
+        sim = create_simulator(fragment)
+        sim.add_clock(1e-6)
+        sim.add_clock(4e-6, domain="slow")
+        def process():
+            for _ in range(16):
+                yield
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "test.vcd.gz")
+            with WaveformCapture(fragment, file, signals=["top.slow"], domain="slow",
+                                 period=4e-6) as capture:
+                sim.add_sync_process(process)
+                capture.add_to(sim)
+                sim.run()
+            with gzip.open(file, "rt") as f:
+                vcd = f.read()
+        # One sample per cycle of the slow domain, in which the counter changes every cycle.
+        self.assertLess(capture.cycles, 8)
+        self.assertEqual(vcd.split("$enddefinitions $end\n")[1],
+                         "".join("#{}\nb{:b} !\n".format(cycle * 4000000, cycle)
+                                 for cycle in range(capture.cycles + 1)))
+
+    def test_environment(self):
+        fragment = Fragment.get(Counter(), platform=None)
+        with mock.patch.dict(os.environ, {"SYSTEMONACHIP_WAVEFORMS": ""}):
+            self.assertIsNone(capture_from_environment(fragment, "test"))
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(os.environ, {
+                        "SYSTEMONACHIP_WAVEFORMS":       " top.count, ,",
+                        "SYSTEMONACHIP_WAVEFORM_DIR":    directory,
+                        "SYSTEMONACHIP_WAVEFORM_CYCLES": "10:",
+                    }):
+                capture = capture_from_environment(fragment, "test_sim.Test.test_foo[1]")
+            self.assertEqual(capture.file,
+                             os.path.join(directory, "test_sim.Test.test_foo_1_.vcd.gz"))
+            self.assertEqual(list(capture.signals), ["top.count"])
+            self.assertEqual((capture.start, capture.stop), (10, None))
+
+    def test_wrong_cycles(self):
+        fragment = Fragment.get(Counter(), platform=None)
+        with mock.patch.dict(os.environ, {"SYSTEMONACHIP_WAVEFORMS":       "*",
+                                          "SYSTEMONACHIP_WAVEFORM_CYCLES": "foo"}):
+            with self.assertRaisesRegex(ValueError,
+                    r"SYSTEMONACHIP_WAVEFORM_CYCLES must be of the form 'start:stop', not 'foo'"):
+                capture_from_environment(fragment, "test")
+
+    def test_wrong_stop(self):
+        fragment = Fragment.get(Counter(), platform=None)
+        with self.assertRaisesRegex(ValueError,
+                r"Stop cycle must be an integer greater than or equal to the start cycle, "
+                r"not 1"):
+            WaveformCapture(fragment, "test.vcd", start=2, stop=1)
+
+
+class SimulatorBackendTestCase(unittest.TestCase):
+    def test_default(self):
+        with mock.patch.dict(os.environ, {"SYSTEMONACHIP_SIMULATOR": ""}):
+            self.assertEqual(simulator_backend(), "pysim")
+        with mock.patch.dict(os.environ, {"SYSTEMONACHIP_SIMULATOR": "auto"}):
+            self.assertIn(simulator_backend(), ("pysim", "cxxsim"))
+
+    def test_create(self):
+        dut = Counter()
+        sim = create_simulator(dut, backend="pysim")
+        sim.add_clock(1e-6)
+        def process():
+            count = yield dut.count
+            yield
+            self.assertEqual((yield dut.count), count + 1)
+        sim.add_sync_process(process)
+        sim.run()
+
+    def test_cxxsim_unavailable(self):
+        with mock.patch.dict(os.environ, {"CXX": "/nonexistent/c++"}):
+            with self.assertRaisesRegex(RuntimeError,
+                    r"Simulator backend 'cxxsim' requires a version of nMigen providing "
+                    r"nmigen\.sim\.cxxsim and a C\+\+ compiler"):
+                simulator_backend("cxxsim")
+            self.assertEqual(simulator_backend("auto"), "pysim")
+
+    def test_wrong_backend(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Simulator backend must be one of auto, pysim, cxxsim, not 'foo'"):
+            simulator_backend("foo")
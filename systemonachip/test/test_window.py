@@ -0,0 +1,194 @@
+# nmigen: UnusedElaboratable=no
+
+import os
+import tempfile
+import unittest
+
+from ..bus.decoder import DecoderWindow
+from ..peripheral import Peripheral
+from ..peripheral.timer import Timer
+from ..register import Bit, VariableWidth
+from ..window import MmapWindow, block
+
+
+class MmapWindowTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, bytes(range(256)) * 32)
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load_store(self):
+        with MmapWindow(self.path, size=0x100) as window:
+            self.assertEqual(window.load(0x4, 8), 0x04)
+            self.assertEqual(window.load(0x4, 16), 0x0504)
+            self.assertEqual(window[0x4], 0x07060504)
+            window[0x8] = 0xdeadbeef
+            window.store(0xc, 0xab, 8)
+            self.assertEqual(window.load(0x8, 16), 0xbeef)
+            self.assertEqual(window[0xc], 0x0f0e0dab)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(0x10)[0x8:],
+                             bytes([0xef, 0xbe, 0xad, 0xde, 0xab, 0x0d, 0x0e, 0x0f]))
+
+    def test_offset(self):
+        with MmapWindow(self.path, size=0x10, offset=0x1010) as window:
+            self.assertEqual(window.load(0x0, 8), 0x10)
+            window.store(0xf, 0x55, 8)
+        with open(self.path, "rb") as f:
+            f.seek(0x101f)
+            self.assertEqual(f.read(1), b"\x55")
+
+    def test_fd(self):
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            with MmapWindow(fd, size=0x10, width=16) as window:
+                self.assertEqual(window[0x2], 0x0302)
+            os.fstat(fd)
+        finally:
+            os.close(fd)
+
+    def test_timer(self):
+        with MmapWindow(self.path, size=0x20) as window:
+            window[0x8] = 0
+            timer = Timer(window)
+            timer.reload_ = 0xf
+            timer.enable = True
+            self.assertEqual(window[0x4], 0xf)
+            self.assertEqual(window[0x8], 0x1)
+            self.assertTrue(timer.enable)
+
+    def test_unaligned(self):
+        with MmapWindow(self.path, size=0x10) as window:
+            self.assertEqual(window[0x2], 0x0302)
+            self.assertEqual(window[0x5], 0x05)
+            window[0x6] = 0xabcd
+            window[0x9] = 0xef
+            self.assertEqual(window[0x4], 0xabcd0504)
+            self.assertEqual(window[0x8], 0x0b0aef08)
+            with self.assertRaisesRegex(ValueError,
+                    r"Address 0x2 is not aligned to a 32-bit access"):
+                window.load(0x2, 32)
+
+    def test_half_words(self):
+        class Periph(Peripheral):
+            status = Bit(0x2, 1, cache="write-through")
+            count  = VariableWidth(0x6, variable="_count_width")
+
+            def __init__(self, memory_window):
+                super().__init__(memory_window)
+                self._count_width = 16
+
+        with MmapWindow(self.path, size=0x20) as window:
+            window[0x0] = 0x00011248
+            timer = Timer(window)
+            self.assertEqual(timer.creator_id, 0x1248)
+            self.assertEqual(timer.creation_id, 0x0001)
+            periph = Periph(window)
+            periph.status = True
+            periph.count = 0x1234
+            self.assertTrue(periph.status)
+            self.assertEqual(periph.count, 0x1234)
+            self.assertEqual(window[0x0], 0x00031248)
+            self.assertEqual(window[0x4], 0x12340504)
+
+    def test_out_of_range(self):
+        with MmapWindow(self.path, size=0x10) as window:
+            with self.assertRaisesRegex(IndexError,
+                    r"Address 16 is outside of the 16 byte window"):
+                window[0x10]
+            with self.assertRaises(IndexError):
+                window.load(0xe, 32)
+
+    def test_block(self):
+        with MmapWindow(self.path, size=0x100) as window:
+            buffer = bytearray(8)
+            self.assertEqual(window.readinto(0x10, buffer), 8)
+            self.assertEqual(buffer, bytes(range(0x10, 0x18)))
+            window.write(0x20, b"\xaa\xbb\xcc")
+            self.assertEqual(window[0x1f:0x24], b"\x1f\xaa\xbb\xcc\x23")
+            window[0x30:0x32] = b"\x01\x02"
+            self.assertEqual(window.load(0x30, 16), 0x0201)
+            with self.assertRaises(IndexError):
+                window.readinto(0xfc, bytearray(8))
+            with self.assertRaisesRegex(ValueError,
+                    r"Cannot assign 1 bytes to a 2 byte slice"):
+                window[0x0:0x2] = b"\x00"
+
+    def test_wrong_width(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Access width must be one of 8, 16, 32, not 64"):
+            MmapWindow(self.path, size=0x10, width=64)
+        with MmapWindow(self.path, size=0x10) as window:
+            with self.assertRaisesRegex(ValueError,
+                    r"Access width must be one of 8, 16, 32, not 64"):
+                window.load(0x0, width=64)
+            with self.assertRaisesRegex(ValueError,
+                    r"Access width must be one of 8, 16, 32, not 64"):
+                window.store(0x0, 0, width=64)
+
+    def test_wrong_size(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Size must be a positive multiple of 4, not 6"):
+            MmapWindow(self.path, size=6)
+
+
+class DecoderWindowTestCase(unittest.TestCase):
+    def test_index(self):
+        memory = bytearray(range(32))
+        window = DecoderWindow(memory, 0x10, 0x10)
+        self.assertEqual(window[0x1], 0x11)
+        self.assertEqual(window[-1], 0x1f)
+        window[0x2] = 0xff
+        self.assertEqual(memory[0x12], 0xff)
+        with self.assertRaises(IndexError):
+            window[0x10]
+
+    def test_slice_fallback(self):
+        memory = bytearray(32)
+        window = DecoderWindow(memory, 0x10, 0x10)
+        window[0x4:0x8] = b"\x01\x02\x03\x04"
+        self.assertEqual(memory[0x14:0x18], b"\x01\x02\x03\x04")
+        self.assertEqual(window[0x3:0x6], b"\x00\x01\x02")
+        self.assertEqual(window[0xe:], b"\x00\x00")
+        with self.assertRaisesRegex(ValueError, r"Window slices must be contiguous"):
+            window[::2]
+
+    def test_block_mmap(self):
+        fd, path = tempfile.mkstemp()
+        os.write(fd, bytes(0x100))
+        os.close(fd)
+        try:
+            with MmapWindow(path, size=0x100) as memory:
+                window = DecoderWindow(memory, 0x80, 0x40)
+                window.write(0x0, bytes(range(0x40)))
+                self.assertEqual(memory[0x80:0xc0], bytes(range(0x40)))
+                buffer = bytearray(4)
+                window.readinto(0x3c, buffer)
+                self.assertEqual(buffer, b"\x3c\x3d\x3e\x3f")
+                with self.assertRaisesRegex(IndexError,
+                        r"Block of 8 bytes at 0x3c is outside of the 0x40 byte window"):
+                    window.readinto(0x3c, bytearray(8))
+        finally:
+            os.remove(path)
+
+    def test_block_functions(self):
+        memory = bytearray(8)
+        block.write(memory, 0x2, b"\x05\x06")
+        self.assertEqual(block.read(memory, 0x1, 3), b"\x00\x05\x06")
+        with self.assertRaises(IndexError):
+            block.read(memory, 0x6, 4)
+
+    def test_block_words(self):
+        words = {0x0: 0x03020100, 0x4: 0x07060504}
+        self.assertEqual(block.read(words, 0x0, 8), bytes(range(8)))
+        block.write(words, 0x4, b"\xaa\xbb\xcc\xdd")
+        self.assertEqual(words, {0x0: 0x03020100, 0x4: 0xddccbbaa})
+        with self.assertRaisesRegex(ValueError,
+                r"Block of 4 bytes at 0x2 is not aligned to 32-bit words"):
+            block.read(words, 0x2, 4)
+        with self.assertRaisesRegex(ValueError,
+                r"Block of 2 bytes at 0x0 is not aligned to 32-bit words"):
+            block.write(words, 0x0, b"\x00\x00")
@@ -0,0 +1,88 @@
+# nmigen: UnusedElaboratable=no
+
+import unittest
+
+from ..peripheral.timer import Timer
+from ..window.etherbone import *
+
+
+class WordMemory:
+    def __init__(self):
+        self.values = {}
+        self.reads  = 0
+
+    def __getitem__(self, address):
+        self.reads += 1
+        return self.values.get(address, 0)
+
+    def __setitem__(self, address, value):
+        self.values[address] = value
+
+
+class EtherboneTestCase(unittest.TestCase):
+    transport = "tcp"
+
+    def setUp(self):
+        self.memory = WordMemory()
+        self.server = EtherboneServer(self.memory, transport=self.transport)
+        self.window = EtherboneWindow(*self.server.address, transport=self.transport,
+                                      batch=16, window=2)
+
+    def tearDown(self):
+        self.window.close()
+        self.server.close()
+
+    def test_single(self):
+        self.window[0x10] = 0xdeadbeef
+        self.assertEqual(self.window[0x10], 0xdeadbeef)
+        self.assertEqual(self.window[0x14], 0)
+        self.assertEqual(self.window.packets, 3)
+
+    def test_many(self):
+        writes = [(4 * i, i * 3) for i in range(100)]
+        self.window.write_many(writes)
+        self.assertEqual(self.window.packets, 7)
+        values = self.window.read_many([4 * i for i in reversed(range(100))])
+        self.assertEqual(values, [i * 3 for i in reversed(range(100))])
+        self.assertEqual(self.window.packets, 14)
+
+    def test_scattered_writes(self):
+        self.window.write_many([(0x0, 1), (0x4, 2), (0x10, 3), (0x8, 4)])
+        self.assertEqual(self.window.packets, 1)
+        self.assertEqual(self.window.read_many([0x0, 0x4, 0x8, 0x10]), [1, 2, 4, 3])
+
+    def test_block(self):
+        self.window.write(0x100, bytes(range(16)))
+        buffer = bytearray(8)
+        self.window.readinto(0x108, buffer)
+        self.assertEqual(buffer, bytes(range(8, 16)))
+        self.assertEqual(self.memory.values[0x104], 0x07060504)
+        with self.assertRaisesRegex(ValueError,
+                r"Etherbone block transfers must be word aligned"):
+            self.window.readinto(0x2, bytearray(4))
+
+    def test_timer_transaction(self):
+        timer = Timer(self.window)
+        with timer.transaction():
+            timer.reload_ = 0xf
+            timer.value = 0xe
+            timer.enable = True
+        self.assertEqual(self.window.packets, 2)
+        self.assertTrue(timer.enable)
+        self.assertEqual(self.memory.values, {0x4: 0xf, 0xc: 0xe, 0x8: 0x1})
+
+
+class EtherboneUDPTestCase(EtherboneTestCase):
+    transport = "udp"
+
+
+class EtherboneWrongTestCase(unittest.TestCase):
+    def test_transport_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Invalid transport 'foo'; must be one of tcp, udp"):
+            EtherboneServer(WordMemory(), transport="foo")
+
+    def test_batch_wrong(self):
+        with self.assertRaisesRegex(ValueError,
+                r"Batch size must be an integer ranging from 1 to 255, not 256"):
+            EtherboneWindow("127.0.0.1", 0, batch=256)
@@ -0,0 +1,4 @@
+from .mapped import *
+from .trace import *
+from .asynchronous import *
+from .etherbone import *
@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+__all__ = ["AsyncWindow"]
+
+
+class AsyncWindow:
+    """Asynchronous memory window over a blocking one.
+
+    Asynchronous memory windows provide awaitable ``read(address)`` and ``write(address, value)``
+    methods, and may keep several requests in flight at once. Peripherals driven through one are
+    accessed with :meth:`..peripheral.Peripheral.aread` and
+    :meth:`..peripheral.Peripheral.awrite`.
+
+    This adapter runs each access of a blocking memory window in a thread pool, so slow transports
+    do not block the event loop. The wrapped window must be safe to use from several threads when
+    ``max_in_flight`` is greater than 1.
+
+    Parameters
+    ----------
+    memory_window : indexable
+        Blocking memory window.
+    max_in_flight : int
+        Maximum number of accesses running at once.
+    """
+    def __init__(self, memory_window, *, max_in_flight=1):
+        if not isinstance(max_in_flight, int) or max_in_flight <= 0:
+            raise ValueError("Maximum number of accesses in flight must be a positive integer, "
+                             "not {!r}".format(max_in_flight))
+        self._memory_window = memory_window
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    async def read(self, address):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._memory_window.__getitem__,
+                                          address)
+
+    async def write(self, address, value):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._memory_window.__setitem__,
+                                   address, value)
+
+    def close(self):
+        """Wait for pending accesses and stop the thread pool."""
+        self._executor.shutdown()
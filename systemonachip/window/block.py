@@ -0,0 +1,69 @@
+"""Block transfers through memory windows.
+
+A memory window may provide ``readinto(offset, buffer)`` and ``write(offset, data)`` to move a
+whole region in one operation, and the functions here use them when present. Bytes-like objects,
+such as a :class:`bytearray`, are copied directly. Any other window is indexed like the register
+windows of this library, with a 32-bit word per byte address, so it is accessed one word every 4
+bytes, in little endian order, and blocks must be aligned to words."""
+
+__all__ = ["readinto", "write", "read"]
+
+
+def _bytes(window):
+    try:
+        return memoryview(window).cast("B")
+    except TypeError:
+        return None
+
+
+def _words(offset, size):
+    if offset % 4 or size % 4:
+        raise ValueError("Block of {} bytes at {:#x} is not aligned to 32-bit words"
+                         .format(size, offset))
+    return range(offset, offset + size, 4)
+
+
+def readinto(window, offset, buffer):
+    """Fill the bytes-like `buffer` from `window`, starting at byte `offset`.
+
+    Returns the number of bytes read."""
+    method = getattr(window, "readinto", None)
+    if method is not None:
+        return method(offset, buffer)
+    view = memoryview(buffer).cast("B")
+    memory = _bytes(window)
+    if memory is not None:
+        if offset < 0 or offset + len(view) > len(memory):
+            raise IndexError("Block of {} bytes at {!r} is outside of the {} byte window"
+                             .format(len(view), offset, len(memory)))
+        view[:] = memory[offset:offset + len(view)]
+        return len(view)
+    for address in _words(offset, len(view)):
+        start = address - offset
+        view[start:start + 4] = (window[address] & 0xffffffff).to_bytes(4, "little")
+    return len(view)
+
+
+def read(window, offset, size):
+    """Read `size` bytes from `window` starting at byte `offset`."""
+    buffer = bytearray(size)
+    readinto(window, offset, buffer)
+    return buffer
+
+
+def write(window, offset, data):
+    """Write the bytes-like `data` to `window` starting at byte `offset`."""
+    method = getattr(window, "write", None)
+    if method is not None:
+        return method(offset, data)
+    view = memoryview(data).cast("B")
+    memory = _bytes(window)
+    if memory is not None:
+        if offset < 0 or offset + len(view) > len(memory):
+            raise IndexError("Block of {} bytes at {!r} is outside of the {} byte window"
+                             .format(len(view), offset, len(memory)))
+        memory[offset:offset + len(view)] = view
+        return
+    for address in _words(offset, len(view)):
+        start = address - offset
+        window[address] = int.from_bytes(view[start:start + 4], "little")
@@ -0,0 +1,310 @@
+"""Memory window tunnelled over the network in Etherbone records.
+
+Packets start with the Etherbone header (magic ``0x4e6f``, version 1, 32-bit addresses and data)
+and carry records of writes and reads to 32-bit words. A record writes ``wcount`` values to
+consecutive words starting at its write base address, then reads ``rcount`` arbitrary addresses.
+Reads are answered by a record writing the read values to the "base return address" of the
+request, which this client uses as a tag to match responses to requests.
+
+Over UDP every packet is a datagram. Over TCP, which has no packet boundaries, every packet is
+preceded by its length as a 32-bit big endian integer."""
+
+import socket
+import socketserver
+import struct
+import threading
+
+
+__all__ = ["EtherboneWindow", "EtherboneServer"]
+
+
+_MAGIC   = 0x4e6f
+_VERSION = 1
+_SIZE_32 = 0x4
+
+_HEADER  = struct.Struct(">HBBI")
+_RECORD  = struct.Struct(">BBBB")
+_WORD    = struct.Struct(">I")
+
+_FLAG_CYC = 0x08
+
+_MAX_COUNT = 255
+
+
+def _encode_packet(records):
+    """Encode `records`, a list of ``(write_base, values, return_base, addresses)``."""
+    data = [_HEADER.pack(_MAGIC, _VERSION << 4, _SIZE_32 << 4 | _SIZE_32, 0)]
+    for write_base, values, return_base, addresses in records:
+        data.append(_RECORD.pack(_FLAG_CYC, 0x0f, len(values), len(addresses)))
+        if values:
+            data.append(struct.pack(">{}I".format(len(values) + 1), write_base, *values))
+        if addresses:
+            data.append(struct.pack(">{}I".format(len(addresses) + 1), return_base, *addresses))
+    return b"".join(data)
+
+
+def _decode_packet(packet):
+    """Decode a packet into a list of ``(write_base, values, return_base, addresses)``."""
+    magic, version, sizes, _ = _HEADER.unpack_from(packet, 0)
+    if magic != _MAGIC:
+        raise ValueError("Invalid Etherbone magic {:#06x}".format(magic))
+    if version >> 4 != _VERSION or sizes != _SIZE_32 << 4 | _SIZE_32:
+        raise ValueError("Unsupported Etherbone version or bus width")
+    offset  = _HEADER.size
+    records = []
+    while offset < len(packet):
+        _, _, wcount, rcount = _RECORD.unpack_from(packet, offset)
+        offset += _RECORD.size
+        write_base, values = None, ()
+        if wcount:
+            write_base, *values = struct.unpack_from(">{}I".format(wcount + 1), packet, offset)
+            offset += 4 * (wcount + 1)
+        return_base, addresses = None, ()
+        if rcount:
+            return_base, *addresses = struct.unpack_from(">{}I".format(rcount + 1), packet, offset)
+            offset += 4 * (rcount + 1)
+        records.append((write_base, values, return_base, addresses))
+    return records
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data += chunk
+    return bytes(data)
+
+
+class EtherboneWindow:
+    """Memory window that accesses 32-bit words of a remote Wishbone bus.
+
+    Single accesses work like any other memory window: a read costs one round trip, and a write
+    is sent without waiting, as Etherbone does not acknowledge writes. :meth:`read_many` and
+    :meth:`write_many` pack up to `batch` accesses in each packet and keep up to `window` packets
+    in flight, so a long list of accesses costs a few round trips instead of one per access.
+    :class:`..register.Transaction` commits use them automatically.
+
+    Parameters
+    ----------
+    host : str
+        Host name of the Etherbone server.
+    port : int
+        Port of the Etherbone server.
+    transport : ``"tcp"`` or ``"udp"``
+        Transport protocol.
+    batch : int
+        Maximum number of reads or writes in one packet.
+    window : int
+        Maximum number of read packets sent before waiting for a response.
+    timeout : float
+        Seconds to wait for a response before raising :exc:`socket.timeout`.
+
+    Attributes
+    ----------
+    packets : int
+        Number of packets sent so far.
+    """
+    def __init__(self, host, port, *, transport="tcp", batch=64, window=4, timeout=5.):
+        if transport not in ("tcp", "udp"):
+            raise ValueError("Invalid transport {!r}; must be one of tcp, udp".format(transport))
+        if not isinstance(batch, int) or not 0 < batch <= _MAX_COUNT:
+            raise ValueError("Batch size must be an integer ranging from 1 to {}, not {!r}"
+                             .format(_MAX_COUNT, batch))
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError("Window must be a positive integer, not {!r}".format(window))
+
+        self._transport = transport
+        self._batch     = batch
+        self._window    = window
+        self._tag       = 0
+        if transport == "tcp":
+            self._socket = socket.create_connection((host, port), timeout=timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect((host, port))
+
+        self.packets = 0
+
+    def _send(self, records):
+        packet = _encode_packet(records)
+        if self._transport == "tcp":
+            packet = _WORD.pack(len(packet)) + packet
+        self._socket.sendall(packet)
+        self.packets += 1
+
+    def _recv(self):
+        if self._transport == "tcp":
+            size, = _WORD.unpack(_recv_exactly(self._socket, _WORD.size))
+            packet = _recv_exactly(self._socket, size)
+        else:
+            packet = self._socket.recv(65536)
+        return _decode_packet(packet)
+
+    def read_many(self, addresses):
+        """Read the words at `addresses` and return their values in the same order."""
+        addresses = list(addresses)
+        tags      = []
+        pending   = set()
+        results   = {}
+
+        def receive():
+            for write_base, values, _, _ in self._recv():
+                if write_base in pending:
+                    pending.discard(write_base)
+                    results[write_base] = values
+
+        for start in range(0, len(addresses), self._batch):
+            while len(pending) >= self._window:
+                receive()
+            tag = self._tag
+            self._tag = (self._tag + 4) & 0xffffffff
+            tags.append(tag)
+            pending.add(tag)
+            self._send([(None, (), tag, addresses[start:start + self._batch])])
+        while pending:
+            receive()
+
+        return [value for tag in tags for value in results[tag]]
+
+    def write_many(self, writes):
+        """Write a list of ``(address, value)`` pairs, in order.
+
+        Runs of consecutive words share one record, and records are packed `batch` writes at a
+        time into each packet.
+        """
+        records = []
+        count   = 0
+        for address, value in writes:
+            if count == self._batch:
+                self._send(records)
+                records, count = [], 0
+            if records and records[-1][0] + 4 * len(records[-1][1]) == address:
+                records[-1][1].append(value)
+            else:
+                records.append((address, [value], None, ()))
+            count += 1
+        if records:
+            self._send(records)
+
+    def __getitem__(self, address):
+        return self.read_many([address])[0]
+
+    def __setitem__(self, address, value):
+        self.write_many([(address, value)])
+
+    def _words(self, offset, size):
+        if offset % 4 or size % 4:
+            raise ValueError("Etherbone block transfers must be word aligned")
+        return range(offset, offset + size, 4)
+
+    def readinto(self, offset, buffer):
+        """Fill `buffer` with the little endian words starting at byte `offset`."""
+        view = memoryview(buffer).cast("B")
+        values = self.read_many(self._words(offset, len(view)))
+        view[:] = struct.pack("<{}I".format(len(values)), *values)
+        return len(view)
+
+    def write(self, offset, data):
+        """Write the bytes-like `data` as little endian words starting at byte `offset`."""
+        view = memoryview(data).cast("B")
+        addresses = self._words(offset, len(view))
+        values = struct.unpack("<{}I".format(len(addresses)), view)
+        self.write_many(zip(addresses, values))
+
+    def close(self):
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EtherboneServer:
+    """Etherbone server exposing a memory window on the local host.
+
+    A stand-in for a remote board: it serves the words of any memory window, such as an
+    in-process model of the bus or a simulator bus, so that :class:`EtherboneWindow` can be
+    tested and benchmarked offline. Requests are served in a background thread, one at a time.
+
+    Parameters
+    ----------
+    memory_window : indexable
+        Word-addressed memory window to serve.
+    host : str
+        Address to listen on.
+    port : int
+        Port to listen on. If 0, a free port is picked.
+    transport : ``"tcp"`` or ``"udp"``
+        Transport protocol.
+
+    Attributes
+    ----------
+    address : (str, int)
+        Host and port the server listens on.
+    """
+    def __init__(self, memory_window, *, host="127.0.0.1", port=0, transport="tcp"):
+        if transport not in ("tcp", "udp"):
+            raise ValueError("Invalid transport {!r}; must be one of tcp, udp".format(transport))
+        self._memory_window = memory_window
+        self._lock = threading.Lock()
+
+        server = self
+
+        class TCPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        size, = _WORD.unpack(_recv_exactly(self.request, _WORD.size))
+                        packet = _recv_exactly(self.request, size)
+                    except ConnectionError:
+                        return
+                    response = server._process(packet)
+                    if response is not None:
+                        self.request.sendall(_WORD.pack(len(response)) + response)
+
+        class UDPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                packet, sock = self.request
+                response = server._process(packet)
+                if response is not None:
+                    sock.sendto(response, self.client_address)
+
+        if transport == "tcp":
+            self._server = socketserver.ThreadingTCPServer((host, port), TCPHandler)
+            self._server.daemon_threads = True
+        else:
+            self._server = socketserver.UDPServer((host, port), UDPHandler)
+        self.address = self._server.server_address
+
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        daemon=True)
+        self._thread.start()
+
+    def _process(self, packet):
+        responses = []
+        with self._lock:
+            for write_base, values, return_base, addresses in _decode_packet(packet):
+                for index, value in enumerate(values):
+                    self._memory_window[write_base + 4 * index] = value
+                if addresses:
+                    data = [self._memory_window[address] for address in addresses]
+                    responses.append((return_base, data, None, ()))
+        if responses:
+            return _encode_packet(responses)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
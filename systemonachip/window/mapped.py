@@ -0,0 +1,160 @@
+import mmap
+import os
+import sys
+
+
+__all__ = ["MmapWindow"]
+
+
+_FORMATS = {8: "B", 16: "H", 32: "I"}
+
+
+class MmapWindow:
+    """Memory window backed by a memory mapping of a file.
+
+    Maps physical registers through ``/dev/mem`` or a UIO device, or a plain file as a stand-in.
+    Accesses are loads and stores through typed ``memoryview`` casts of the mapping, so they do
+    not make any system call. Values use the host byte order. Slices, :meth:`readinto` and
+    :meth:`write` copy whole blocks of bytes.
+
+    Parameters
+    ----------
+    file : str or int
+        Path or open file descriptor to map. A path is opened (and closed again by :meth:`close`)
+        for reading and writing, with ``O_SYNC`` when available.
+    size : int
+        Size of the window in bytes. Must be a multiple of 4.
+    offset : int
+        Offset of the window within the file. It does not need to be page aligned.
+    width : 8, 16 or 32
+        Width in bits of the accesses made by indexing the window. Indexing an address that is
+        not aligned to it makes the widest access the address is aligned to instead, like the
+        16-bit register at ``0x2`` of a peripheral.
+
+    Attributes
+    ----------
+    size : int
+        Size of the window in bytes.
+    width : int
+        Default access width in bits.
+    byteorder : str
+        Byte order of the values, ``"little"`` or ``"big"``.
+    """
+    byteorder = sys.byteorder
+
+    def __init__(self, file, *, size, offset=0, width=32):
+        if width not in _FORMATS:
+            raise ValueError("Access width must be one of 8, 16, 32, not {!r}".format(width))
+        if not isinstance(size, int) or size <= 0 or size % 4:
+            raise ValueError("Size must be a positive multiple of 4, not {!r}".format(size))
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Offset must be a non-negative integer, not {!r}".format(offset))
+
+        if isinstance(file, int):
+            self._fd = None
+            fd = file
+        else:
+            self._fd = fd = os.open(file, os.O_RDWR | getattr(os, "O_SYNC", 0))
+
+        # mmap offsets must be aligned to the allocation granularity; map from the boundary below.
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        delta = offset - start
+        try:
+            self._mmap = mmap.mmap(fd, delta + size, offset=start)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+            raise
+
+        self._buffer = memoryview(self._mmap)[delta:delta + size]
+        self._views = {w: self._buffer.cast(fmt) for w, fmt in _FORMATS.items()}
+
+        self.size  = size
+        self.width = width
+
+    def _index(self, address, width):
+        if width not in self._views:
+            raise ValueError("Access width must be one of 8, 16, 32, not {!r}".format(width))
+        if not isinstance(address, int) or not 0 <= address <= self.size - width // 8:
+            raise IndexError("Address {!r} is outside of the {} byte window"
+                             .format(address, self.size))
+        if address % (width // 8):
+            raise ValueError("Address {:#x} is not aligned to a {}-bit access"
+                             .format(address, width))
+        return address // (width // 8)
+
+    def _width_at(self, address):
+        """Width of the access made by indexing `address`."""
+        if isinstance(address, int) and address % (self.width // 8):
+            return 16 if address % 2 == 0 else 8
+        return self.width
+
+    def load(self, address, width=None):
+        """Load a `width` bit value (by default :attr:`width`) from byte `address`."""
+        width = width or self.width
+        index = self._index(address, width)
+        return self._views[width][index]
+
+    def store(self, address, value, width=None):
+        """Store a `width` bit value (by default :attr:`width`) to byte `address`."""
+        width = width or self.width
+        index = self._index(address, width)
+        self._views[width][index] = value
+
+    def _range(self, offset, size):
+        if not isinstance(offset, int) or offset < 0 or offset + size > self.size:
+            raise IndexError("Block of {} bytes at {!r} is outside of the {} byte window"
+                             .format(size, offset, self.size))
+        return self._buffer[offset:offset + size]
+
+    def readinto(self, offset, buffer):
+        """Copy ``len(buffer)`` bytes starting at byte `offset` into `buffer`."""
+        view = memoryview(buffer).cast("B")
+        view[:] = self._range(offset, len(view))
+        return len(view)
+
+    def write(self, offset, data):
+        """Copy the bytes-like `data` to the window starting at byte `offset`."""
+        view = memoryview(data).cast("B")
+        self._range(offset, len(view))[:] = view
+
+    def _slice(self, key):
+        start, stop, step = key.indices(self.size)
+        if step != 1:
+            raise ValueError("Window slices must be contiguous")
+        return start, max(stop - start, 0)
+
+    def __getitem__(self, address):
+        if isinstance(address, slice):
+            start, size = self._slice(address)
+            return bytes(self._range(start, size))
+        return self.load(address, self._width_at(address))
+
+    def __setitem__(self, address, value):
+        if isinstance(address, slice):
+            start, size = self._slice(address)
+            if len(value) != size:
+                raise ValueError("Cannot assign {} bytes to a {} byte slice"
+                                 .format(len(value), size))
+            self.write(start, value)
+            return
+        self.store(address, value, self._width_at(address))
+
+    def close(self):
+        """Unmap the window, and close its file if it was opened from a path."""
+        if self._mmap is None:
+            return
+        for view in self._views.values():
+            view.release()
+        self._buffer.release()
+        self._mmap.close()
+        self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,185 @@
+import sys
+import time
+
+from . import block
+
+
+__all__ = ["AccessStatistics", "AccessTrace", "TracingWindow"]
+
+
+class AccessStatistics:
+    """Counters for the accesses made to one register or address.
+
+    Attributes
+    ----------
+    reads : int
+        Number of reads that reached the memory window.
+    writes : int
+        Number of writes.
+    hits : int
+        Number of reads served by the shadow cache.
+    bytes : int
+        Number of bytes moved by reads and writes.
+    seconds : float
+        Total wall-clock time spent in reads and writes.
+    histogram : dict(int, int)
+        Number of accesses per latency bucket. Bucket ``n`` counts accesses that took less than
+        ``2 ** n`` microseconds (and at least ``2 ** (n - 1)``).
+    """
+    def __init__(self):
+        self.reads     = 0
+        self.writes    = 0
+        self.hits      = 0
+        self.bytes     = 0
+        self.seconds   = 0.
+        self.histogram = {}
+
+    def add(self, kind, nbytes, seconds):
+        if kind == "hit":
+            self.hits += 1
+            return
+        if kind == "read":
+            self.reads += 1
+        elif kind == "write":
+            self.writes += 1
+        else:
+            raise ValueError("Invalid access kind {!r}; must be one of read, write, hit"
+                             .format(kind))
+        self.bytes   += nbytes
+        self.seconds += seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+
+class AccessTrace:
+    """Collects register and memory window accesses of a peripheral.
+
+    This is the default tracer of :meth:`..peripheral.Peripheral.trace`. Any object with the same
+    ``register_access`` and ``window_access`` methods can be used as a tracer instead.
+
+    Parameters
+    ----------
+    name : str
+        Name of the traced peripheral, used in reports.
+
+    Attributes
+    ----------
+    registers : dict(str, :class:`AccessStatistics`)
+        Accesses made through register descriptors, by register name.
+    addresses : dict(int, :class:`AccessStatistics`)
+        Accesses that reached the memory window, by address.
+    """
+    def __init__(self, name=None):
+        self.name      = name
+        self.registers = {}
+        self.addresses = {}
+        self._names    = {}
+        self._widths   = {}
+
+    def register_access(self, name, kind, seconds=0.):
+        """Record a descriptor access to register `name`. `kind` is ``"read"``, ``"write"`` or
+        ``"hit"`` for a read served by the shadow cache. The bytes moved are those of the width
+        of the register if it was named by :meth:`name_addresses` with a fixed width, and of a
+        32-bit word otherwise."""
+        width = self._widths.get(name)
+        nbytes = (width + 7) // 8 if isinstance(width, int) else 4
+        stats = self.registers.setdefault(name, AccessStatistics())
+        stats.add(kind, nbytes, seconds)
+
+    def window_access(self, address, kind, nbytes, seconds):
+        """Record a memory window access of `nbytes` bytes at `address`."""
+        stats = self.addresses.setdefault(address, AccessStatistics())
+        stats.add(kind, nbytes, seconds)
+
+    def name_addresses(self, layout):
+        """Label addresses in reports with the register names of a peripheral `layout`, and learn
+        the widths of its registers."""
+        for field in layout:
+            names = self._names.setdefault(field.address, [])
+            if field.name not in names:
+                names.append(field.name)
+            self._widths[field.name] = field.width
+
+    def report(self, file=sys.stdout):
+        """Write a table of the collected statistics to `file`."""
+        def row(label, stats):
+            mean = stats.seconds / max(stats.reads + stats.writes, 1) * 1e6
+            file.write("{:<24} {:>8} {:>8} {:>8} {:>10} {:>10.2f}\n"
+                       .format(label, stats.reads, stats.writes, stats.hits, stats.bytes, mean))
+
+        header = "{:<24} {:>8} {:>8} {:>8} {:>10} {:>10}\n".format(
+            "", "reads", "writes", "hits", "bytes", "mean us")
+        if self.name is not None:
+            file.write("{}\n".format(self.name))
+        file.write(header)
+        for name, stats in sorted(self.registers.items()):
+            row(name, stats)
+        for address, stats in sorted(self.addresses.items()):
+            label = "{:#06x}".format(address)
+            if address in self._names:
+                label += " " + "/".join(self._names[address])
+            row(label, stats)
+
+
+class TracingWindow:
+    """Memory window that reports every access it forwards to `memory_window` to `tracer`.
+
+    Single accesses move one word, of the ``width`` in bits of the wrapped window if it has one,
+    and 32 bits otherwise. The batches of ``read_many`` and ``write_many`` are forwarded as they
+    are, and their time is shared evenly between the addresses they access."""
+    def __init__(self, memory_window, tracer):
+        self._memory_window = memory_window
+        self._tracer = tracer
+        self._word_bytes = getattr(memory_window, "width", 32) // 8
+
+    def __getitem__(self, address):
+        start = time.perf_counter()
+        value = self._memory_window[address]
+        self._tracer.window_access(address, "read", self._word_bytes,
+                                   time.perf_counter() - start)
+        return value
+
+    def __setitem__(self, address, value):
+        start = time.perf_counter()
+        self._memory_window[address] = value
+        self._tracer.window_access(address, "write", self._word_bytes,
+                                   time.perf_counter() - start)
+
+    def _batch(self, kind, addresses, seconds):
+        for address in addresses:
+            self._tracer.window_access(address, kind, self._word_bytes,
+                                       seconds / len(addresses))
+
+    def read_many(self, addresses):
+        addresses = list(addresses)
+        start = time.perf_counter()
+        method = getattr(self._memory_window, "read_many", None)
+        if method is not None:
+            values = list(method(addresses))
+        else:
+            values = [self._memory_window[address] for address in addresses]
+        self._batch("read", addresses, time.perf_counter() - start)
+        return values
+
+    def write_many(self, writes):
+        writes = list(writes)
+        start = time.perf_counter()
+        method = getattr(self._memory_window, "write_many", None)
+        if method is not None:
+            method(writes)
+        else:
+            for address, value in writes:
+                self._memory_window[address] = value
+        self._batch("write", [address for address, _ in writes], time.perf_counter() - start)
+
+    def readinto(self, offset, buffer):
+        start = time.perf_counter()
+        size = block.readinto(self._memory_window, offset, buffer)
+        self._tracer.window_access(offset, "read", size, time.perf_counter() - start)
+        return size
+
+    def write(self, offset, data):
+        start = time.perf_counter()
+        block.write(self._memory_window, offset, data)
+        self._tracer.window_access(offset, "write", memoryview(data).nbytes,
+                                   time.perf_counter() - start)